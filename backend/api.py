@@ -24,10 +24,9 @@ from pydantic import BaseModel
 import uuid
 
 from core.utils.rate_limiter import (
-    auth_rate_limiter,
-    api_key_rate_limiter,
-    admin_rate_limiter,
+    get_account_identifier,
     get_client_identifier,
+    get_rate_limiters,
 )
 
 from core import api as core_api
@@ -122,11 +121,17 @@ async def lifespan(app: FastAPI):
         # Start memory watchdog for observability
         _memory_watchdog_task = asyncio.create_task(_memory_watchdog())
         
+        # Keep the pre-warmed sandbox pool topped up (no-op unless SANDBOX_POOL_SIZE > 0)
+        from core.sandbox.sandbox_pool import sandbox_pool
+        sandbox_pool.start()
+        
         yield
         
         logger.debug("Cleaning up agent resources")
         await core_api.cleanup()
         
+        await sandbox_pool.stop()
+        
         # Stop CloudWatch queue metrics task
         if _queue_metrics_task is not None:
             _queue_metrics_task.cancel()
@@ -183,23 +188,20 @@ async def rate_limit_middleware(request: Request, call_next):
     if path in ["/v1/health", "/v1/health-docker"] or request.method == "OPTIONS":
         return await call_next(request)
     
-    # Get client identifier
-    client_id = get_client_identifier(request)
-    
-    # Apply appropriate rate limiter based on path
-    rate_limiter = None
-    
-    if "/v1/api-keys" in path:
-        rate_limiter = api_key_rate_limiter
-    elif "/v1/admin" in path:
-        rate_limiter = admin_rate_limiter
-    elif any(sensitive in path for sensitive in ["/v1/setup/initialize"]):
-        rate_limiter = auth_rate_limiter
-    
-    if rate_limiter:
-        is_limited, retry_after = rate_limiter.is_rate_limited(client_id)
+    # Route policy first, then the per-account policy (if enabled)
+    client_id = None
+    for rate_limiter in get_rate_limiters(path):
+        identifier = None
+        if rate_limiter.policy.scope == "account":
+            identifier = get_account_identifier(request)
+        if not identifier:
+            # IP-scoped policies, and account policies for anonymous requests
+            client_id = client_id or get_client_identifier(request)
+            identifier = client_id
+        
+        is_limited, retry_after = await rate_limiter.is_rate_limited(identifier)
         if is_limited:
-            logger.warning(f"Rate limited: {path} from {client_id[:8]}...")
+            logger.warning(f"Rate limited ({rate_limiter.policy.name}): {path} from {identifier[:8]}...")
             return JSONResponse(
                 status_code=429,
                 content={"detail": "Too many requests. Please try again later."},
@@ -341,7 +343,7 @@ async def queue_metrics_endpoint():
 
 @api_router.get("/metrics/workers", summary="Worker Metrics", operation_id="worker_metrics", tags=["system"])
 async def worker_metrics_endpoint():
-    """Get active Dramatiq worker count and thread utilization for monitoring."""
+    """Get active Dramatiq worker count, thread utilization and tool result cache hit rates for monitoring."""
     from core.services import worker_metrics
     try:
         return await worker_metrics.get_worker_metrics()
@@ -349,6 +351,48 @@ async def worker_metrics_endpoint():
         logger.error(f"Failed to get worker metrics: {e}")
         raise HTTPException(status_code=500, detail="Failed to get worker metrics")
 
+@api_router.get("/metrics/streams", summary="Stream Hub Metrics", operation_id="stream_metrics", tags=["system"])
+async def stream_metrics_endpoint():
+    """Get this process's agent run stream fan-out metrics (runs, subscribers, dropped frames)."""
+    from core.services.stream_hub import stream_hub
+    return {
+        **stream_hub.get_metrics(),
+        "instance_id": instance_id,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@api_router.get("/metrics/sandbox", summary="Sandbox Metrics", operation_id="sandbox_metrics", tags=["system"])
+async def sandbox_metrics_endpoint():
+    """Get this process's Docker sandbox call latency histograms (per operation), pool usage and sandbox pool stats."""
+    from core.sandbox.docker_sandbox import get_sandbox_metrics
+    from core.sandbox.sandbox_pool import sandbox_pool
+    return {
+        **get_sandbox_metrics(),
+        "pool": await sandbox_pool.get_metrics(),
+        "instance_id": instance_id,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@api_router.get("/metrics/rate-limits", summary="Rate Limiter Metrics", operation_id="rate_limit_metrics", tags=["system"])
+async def rate_limit_metrics_endpoint():
+    """Get this process's rate limiter policies, local fast-path hits, Redis calls and fallbacks."""
+    from core.utils.rate_limiter import get_rate_limiter_metrics
+    return {
+        **get_rate_limiter_metrics(),
+        "instance_id": instance_id,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@api_router.get("/metrics/auth", summary="Authorization Cache Metrics", operation_id="auth_metrics", tags=["system"])
+async def auth_metrics_endpoint():
+    """Get this process's thread/sandbox authorization decision cache hit rate."""
+    from core.utils.access_cache import get_access_cache_stats
+    return {
+        **get_access_cache_stats(),
+        "instance_id": instance_id,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
 @api_router.get("/metrics", summary="All Metrics", operation_id="all_metrics", tags=["system"])
 async def all_metrics_endpoint():
     """Get combined queue and worker metrics for monitoring."""
@@ -4,6 +4,7 @@ from typing import Optional
 from datetime import datetime, timedelta, timezone
 from core.services.supabase import DBConnection
 from core.utils.auth_utils import verify_and_get_user_id_from_jwt, verify_admin_api_key
+from core.utils.access_cache import invalidate_account_access, invalidate_user_access
 from core.utils.logger import logger
 from core.sandbox.sandbox import delete_sandbox
 # 已删除账单系统
@@ -403,6 +404,8 @@ async def delete_account_immediately(
         
         if result.data:
             logger.info(f"Successfully deleted account and auth user for {user_id}")
+            await invalidate_account_access(account_id)
+            await invalidate_user_access(user_id)
             
             return {
                 "success": True,
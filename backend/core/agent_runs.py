@@ -11,9 +11,17 @@ from core.utils.auth_utils import verify_and_get_user_id_from_jwt, get_user_id_f
 from core.utils.logger import logger, structlog
 # Billing removed
 from core.utils.config import config, EnvMode
-from core.services import redis
+from core.services.stream_hub import (
+    stream_hub,
+    agent_run_stream_keys,
+    read_stream_entries,
+    parse_stream_id,
+    is_valid_stream_id,
+    StreamFrameTranslator,
+)
+from core.utils import stream_protocol
 from core.sandbox.sandbox import create_sandbox, delete_sandbox, get_or_start_sandbox
-from core.utils.sandbox_utils import generate_unique_filename, get_uploads_directory
+from core.utils.sandbox_utils import generate_unique_filenames, get_uploads_directory
 from run_agent_background import run_agent_background
 import dramatiq
 
@@ -444,57 +452,44 @@ async def _handle_file_uploads(files: List[UploadFile], sandbox, project_id: str
     failed_uploads = []
     uploads_dir = get_uploads_directory()
     
+    # Read every file first, then move them into the sandbox in one tar stream
+    pending = []
     for file in files:
         if file.filename:
+            safe_filename = file.filename.replace('/', '_').replace('\\', '_')
             try:
-                safe_filename = file.filename.replace('/', '_').replace('\\', '_')
-                
-                # Generate unique filename to avoid conflicts
-                unique_filename = await generate_unique_filename(sandbox, uploads_dir, safe_filename)
-                target_path = f"{uploads_dir}/{unique_filename}"
-                
-                logger.debug(f"Attempting to upload {safe_filename} to {target_path} in sandbox {sandbox.id}")
-                
-                # Read the file content before any potential issues
                 content = await file.read()
-                await file.close()  # Close the file immediately after reading
-                
-                upload_successful = False
-                try:
-                    if hasattr(sandbox, 'fs') and hasattr(sandbox.fs, 'upload_file'):
-                        await sandbox.fs.upload_file(content, target_path)
-                        logger.debug(f"Called sandbox.fs.upload_file for {target_path}")
-                        upload_successful = True
-                    else:
-                        raise NotImplementedError("Suitable upload method not found on sandbox object.")
-                except Exception as upload_error:
-                    logger.error(f"Error during sandbox upload call for {safe_filename}: {str(upload_error)}", exc_info=True)
-
-                if upload_successful:
-                    try:
-                        await asyncio.sleep(0.2)
-                        files_in_dir = await sandbox.fs.list_files(uploads_dir)
-                        file_names_in_dir = [f.name for f in files_in_dir]
-                        if unique_filename in file_names_in_dir:
-                            successful_uploads.append(target_path)
-                            logger.debug(f"Successfully uploaded and verified file {safe_filename} as {unique_filename} to sandbox path {target_path}")
-                        else:
-                            logger.error(f"Verification failed for {safe_filename}: File not found in {uploads_dir} after upload attempt.")
-                            failed_uploads.append(safe_filename)
-                    except Exception as verify_error:
-                        logger.error(f"Error verifying file {safe_filename} after upload: {str(verify_error)}", exc_info=True)
-                        failed_uploads.append(safe_filename)
-                else:
-                    failed_uploads.append(safe_filename)
+                pending.append((safe_filename, content))
             except Exception as file_error:
                 logger.error(f"Error processing file {file.filename}: {str(file_error)}", exc_info=True)
                 failed_uploads.append(file.filename)
-                # Ensure file is closed in case of error during processing
+            finally:
+                # Close the file immediately after reading
                 try:
                     await file.close()
                 except:
                     pass  # File might already be closed
 
+    if pending:
+        # Generate unique filenames to avoid conflicts (one directory listing for the batch)
+        unique_filenames = await generate_unique_filenames(sandbox, uploads_dir, [name for name, _ in pending])
+        uploads = [(content, f"{uploads_dir}/{unique_filename}") for (_, content), unique_filename in zip(pending, unique_filenames)]
+        logger.debug(f"Attempting to upload {len(uploads)} files to {uploads_dir} in sandbox {sandbox.id}")
+        try:
+            if hasattr(sandbox, 'fs') and hasattr(sandbox.fs, 'upload_files'):
+                # put_archive extracts the whole archive or fails, so success is the verification
+                await sandbox.fs.upload_files(uploads)
+            elif hasattr(sandbox, 'fs') and hasattr(sandbox.fs, 'upload_file'):
+                for content, target_path in uploads:
+                    await sandbox.fs.upload_file(content, target_path)
+            else:
+                raise NotImplementedError("Suitable upload method not found on sandbox object.")
+            successful_uploads.extend(target_path for _, target_path in uploads)
+            logger.debug(f"Successfully uploaded {len(uploads)} files to {uploads_dir}")
+        except Exception as upload_error:
+            logger.error(f"Error during sandbox upload call for {len(uploads)} files: {str(upload_error)}", exc_info=True)
+            failed_uploads.extend(name for name, _ in pending)
+
     if successful_uploads:
         message_content += "\n\n" if message_content else ""
         for file_path in successful_uploads:
@@ -1395,21 +1390,62 @@ async def get_thread_agent(thread_id: str, user_id: str = Depends(verify_and_get
         logger.error(f"Error fetching agent for thread {thread_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch thread agent: {str(e)}")
 
+TERMINAL_RUN_STATUSES = ('completed', 'failed', 'stopped', 'error')
+
+# Control signals arrive on their own pubsub connection and can overtake the last stream
+# entries; on one, the stream is re-read until the terminal status shows up (bounded)
+CONTROL_DRAIN_ATTEMPTS = 3
+CONTROL_DRAIN_INTERVAL_SECONDS = 0.1
+
+
+def _is_terminal_status(data: str) -> bool:
+    """Whether a stored stream entry is a terminal status frame (only status frames are parsed)."""
+    if '"status"' not in data:
+        return False
+    try:
+        response = stream_protocol.loads(data)
+    except ValueError:
+        return False
+    return response.get('type') == 'status' and response.get('status') in TERMINAL_RUN_STATUSES
+
+
+def _sse_event(data: str, event_id: Optional[str] = None) -> str:
+    if event_id:
+        return f"id: {event_id}\ndata: {data}\n\n"
+    return f"data: {data}\n\n"
+
+
+def _sse_events(frames: List[str], event_id: str) -> str:
+    """SSE events for the frames of one stream entry; only the last carries the entry id."""
+    if not frames:
+        return ""
+    return "".join(_sse_event(frame) for frame in frames[:-1]) + _sse_event(frames[-1], event_id)
+
+
 @router.get("/agent-run/{agent_run_id}/stream", summary="Stream Agent Run", operation_id="stream_agent_run")
 async def stream_agent_run(
     agent_run_id: str,
     token: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    protocol: Optional[str] = None,
     request: Request = None
 ):
     """Stream agent run responses with minimum latency.
     
-    Ultra-low-latency streaming architecture:
-    - Uses pubsub.listen() async iterator (TRUE push, no polling!)
-    - XRANGE on connect for catch-up (reconnection support)
-    - Immediate yield on message receipt
-    
-    Previous: get_message(timeout=0.5) = up to 500ms latency per chunk
-    Now: listen() async iterator = instant delivery (<1ms)
+    Ultra-low-latency, gap-free streaming architecture:
+    - Every SSE event carries its Redis stream entry id as `id:`; reconnects resume
+      after `Last-Event-ID` (header, or `last_event_id` query param) instead of
+      replaying the whole run
+    - Catch-up pages through XRANGE and passes the stored JSON through unchanged
+    - Live frames come from one shared blocking XREAD cursor per run per process
+      (core.services.stream_hub), fanned out to every viewer through bounded
+      per-client queues; the consumer attaches before catching up and skips ids
+      it has already sent, so nothing published in between is lost
+    - Control signals (STOP/END_STREAM/ERROR) still arrive via pubsub; the stream is
+      drained up to the terminal status before one ends the response
+    - `protocol=compact` opts into the compact chunk format (a header frame with the
+      static fields, then {"t":"d","s":seq,"c":text} deltas, see
+      core.utils.stream_protocol); other clients get full legacy frames
     """
     logger.debug(f"🔐 Stream auth check - agent_run: {agent_run_id}, has_token: {bool(token)}")
     client = await utils.db.client
@@ -1423,148 +1459,135 @@ async def stream_agent_run(
     )
 
     # Redis keys
-    stream_key = f"agent_run:{agent_run_id}:stream"
-    pubsub_channel = f"agent_run:{agent_run_id}:pubsub"
-    control_channel = f"agent_run:{agent_run_id}:control"
+    stream_key, control_channel = agent_run_stream_keys(agent_run_id)
+
+    # Resume cursor: EventSource sends Last-Event-ID automatically on reconnect
+    resume_from = (request.headers.get('last-event-id') if request else None) or last_event_id
+    if not is_valid_stream_id(resume_from):
+        resume_from = None
+
+    compact = protocol == stream_protocol.STREAM_PROTOCOL_COMPACT
 
     async def stream_generator(agent_run_data):
-        logger.debug(f"Streaming responses for {agent_run_id} (pubsub: {pubsub_channel}, stream: {stream_key})")
+        logger.debug(f"Streaming responses for {agent_run_id} (stream: {stream_key}, resume from: {resume_from or 'start'}, protocol: {protocol or 'legacy'})")
+        translator = StreamFrameTranslator(stream_key, compact=compact)
         terminate_stream = False
         initial_yield_complete = False
-        pubsub = None
-        listener_task = None
+        subscriber = None
+        cursor = resume_from
 
         try:
-            # 1. Catch-up: fetch existing responses from stream (for reconnection)
-            initial_entries = await redis.xrange(stream_key)
-            if initial_entries:
-                logger.debug(f"Sending {len(initial_entries)} catch-up responses for {agent_run_id}")
-                for entry_id, fields in initial_entries:
-                    response = json.loads(fields.get('data', '{}'))
-                    yield f"data: {json.dumps(response)}\n\n"
-                    # Check if already completed
-                    if response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']:
-                        logger.debug(f"Detected completion in catch-up: {response.get('status')}")
-                        terminate_stream = True
+            current_status = agent_run_data.get('status') if agent_run_data else None
+
+            # 1. Attach to the shared reader first (its cursor is fixed on attach) so that
+            #    catch-up + live frames are gap-free
+            if current_status == 'running':
+                subscriber = await stream_hub.subscribe(agent_run_id)
+
+            # 2. Catch-up: entries after the client's cursor, in the client's protocol
+            catch_up_count = 0
+            async for entry_id, data in read_stream_entries(stream_key, cursor):
+                events = _sse_events(await translator.translate(entry_id, data), entry_id)
+                if events:
+                    yield events
+                cursor = entry_id
+                catch_up_count += 1
+                if _is_terminal_status(data):
+                    logger.debug(f"Detected completion in catch-up for {agent_run_id}")
+                    terminate_stream = True
+            if catch_up_count:
+                logger.debug(f"Sent {catch_up_count} catch-up responses for {agent_run_id}")
             initial_yield_complete = True
 
             if terminate_stream:
                 return
 
-            # 2. Check run status
-            current_status = agent_run_data.get('status') if agent_run_data else None
-            if current_status != 'running':
+            # 3. Check run status
+            if subscriber is None:
                 logger.debug(f"Agent run {agent_run_id} is not running (status: {current_status}). Ending stream.")
-                yield f"data: {json.dumps({'type': 'status', 'status': 'completed'})}\n\n"
+                yield _sse_event(json.dumps({'type': 'status', 'status': 'completed'}))
                 return
 
             structlog.contextvars.bind_contextvars(
                 thread_id=agent_run_data.get('thread_id'),
             )
 
-            # 3. Subscribe to BOTH response pubsub AND control channel
-            pubsub = await redis.create_pubsub()
-            await pubsub.subscribe(pubsub_channel, control_channel)
-            logger.debug(f"Subscribed to: {pubsub_channel}, {control_channel}")
-
-            # 4. Use async queue for zero-latency message passing
-            message_queue = asyncio.Queue()
-
-            async def pubsub_listener():
-                """Background task that pushes messages to queue instantly."""
-                try:
-                    async for message in pubsub.listen():
-                        if terminate_stream:
-                            break
-                        if message and message.get("type") == "message":
-                            await message_queue.put(message)
-                except asyncio.CancelledError:
-                    pass
-                except Exception as e:
-                    logger.warning(f"Pubsub listener error: {e}")
-                    await message_queue.put({"type": "error", "error": str(e)})
-
-            # Start listener in background
-            listener_task = asyncio.create_task(pubsub_listener())
-
-            # 5. Main loop - process messages from queue (instant, no polling!)
+            # 4. Main loop - process entries fanned out by the hub (instant, no polling!)
             while not terminate_stream:
                 try:
                     # Wait for message with timeout (for cleanup check)
-                    try:
-                        message = await asyncio.wait_for(message_queue.get(), timeout=30.0)
-                    except asyncio.TimeoutError:
+                    message = await subscriber.get(timeout=30.0)
+                    if message is None:
                         # Send keepalive ping every 30s to prevent connection timeout
-                        yield f"data: {json.dumps({'type': 'ping'})}\n\n"
+                        yield _sse_event(json.dumps({'type': 'ping'}))
                         continue
 
-                    # Handle error from listener
-                    if message.get("type") == "error":
-                        yield f"data: {json.dumps({'type': 'status', 'status': 'error', 'message': message.get('error')})}\n\n"
-                        terminate_stream = True
-                        break
-
-                    channel = message.get("channel")
-                    data = message.get("data")
-                    if isinstance(data, bytes):
-                        data = data.decode('utf-8')
-                    if isinstance(channel, bytes):
-                        channel = channel.decode('utf-8')
+                    message_type = message.get("type")
 
-                    if channel == pubsub_channel:
+                    if message_type == "entry":
+                        entry_id = message["id"]
+                        # Already sent during catch-up
+                        if cursor and parse_stream_id(entry_id) <= parse_stream_id(cursor):
+                            continue
+                        data = message["data"]
                         # Real-time response - yield IMMEDIATELY (this is the hot path!)
-                        yield f"data: {data}\n\n"
-                        
-                        # Check for terminal status (parse only for completion check)
-                        try:
-                            response = json.loads(data)
-                            if response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']:
-                                logger.debug(f"Detected completion via pubsub: {response.get('status')}")
-                                terminate_stream = True
-                        except json.JSONDecodeError:
-                            pass
-                            
-                    elif channel == control_channel:
-                        # Control signal
+                        events = _sse_events(await translator.translate(entry_id, data), entry_id)
+                        if events:
+                            yield events
+                        cursor = entry_id
+                        if _is_terminal_status(data):
+                            logger.debug(f"Detected completion via stream for {agent_run_id}")
+                            terminate_stream = True
+
+                    elif message_type == "control":
+                        data = message.get("data")
                         if data in ["STOP", "END_STREAM", "ERROR"]:
-                            logger.debug(f"Received control signal '{data}' for {agent_run_id}")
-                            yield f"data: {json.dumps({'type': 'status', 'status': data})}\n\n"
+                            logger.debug(f"Received control signal '{data}' for {agent_run_id}, draining stream")
+                            for attempt in range(CONTROL_DRAIN_ATTEMPTS):
+                                if attempt:
+                                    await asyncio.sleep(CONTROL_DRAIN_INTERVAL_SECONDS)
+                                async for entry_id, entry_data in read_stream_entries(stream_key, cursor):
+                                    events = _sse_events(await translator.translate(entry_id, entry_data), entry_id)
+                                    if events:
+                                        yield events
+                                    cursor = entry_id
+                                    if _is_terminal_status(entry_data):
+                                        terminate_stream = True
+                                if terminate_stream:
+                                    break
+                            yield _sse_event(json.dumps({'type': 'status', 'status': data}))
                             terminate_stream = True
 
+                    elif message_type == "reconnect":
+                        # Slow consumer or reader failure: end without a terminal status so the
+                        # client reconnects and resumes from its last event id
+                        logger.warning(f"Stream consumer for {agent_run_id} detached, closing stream for resume")
+                        break
+
                 except asyncio.CancelledError:
                     logger.debug(f"Stream generator cancelled for {agent_run_id}")
                     terminate_stream = True
                     break
                 except Exception as e:
                     logger.error(f"Error processing message for {agent_run_id}: {e}", exc_info=True)
-                    yield f"data: {json.dumps({'type': 'status', 'status': 'error', 'message': f'Stream failed: {e}'})}\n\n"
+                    yield _sse_event(json.dumps({'type': 'status', 'status': 'error', 'message': f'Stream failed: {e}'}))
                     terminate_stream = True
                     break
 
         except Exception as e:
             logger.error(f"Error setting up stream for agent run {agent_run_id}: {e}", exc_info=True)
             if not initial_yield_complete:
-                yield f"data: {json.dumps({'type': 'status', 'status': 'error', 'message': f'Failed to start stream: {e}'})}\n\n"
+                yield _sse_event(json.dumps({'type': 'status', 'status': 'error', 'message': f'Failed to start stream: {e}'}))
 
         finally:
             terminate_stream = True
             
-            # Cancel listener task
-            if listener_task and not listener_task.done():
-                listener_task.cancel()
-                try:
-                    await listener_task
-                except asyncio.CancelledError:
-                    pass
-            
-            # Clean up pubsub
-            if pubsub:
+            # Detach from the shared reader (the last consumer stops it)
+            if subscriber:
                 try:
-                    await pubsub.unsubscribe(pubsub_channel, control_channel)
-                    await pubsub.close()
-                    logger.debug(f"PubSub cleaned up for {agent_run_id}")
+                    await stream_hub.unsubscribe(subscriber)
                 except Exception as e:
-                    logger.warning(f"Error during pubsub cleanup for {agent_run_id}: {e}")
+                    logger.warning(f"Error detaching from stream hub for {agent_run_id}: {e}")
 
             logger.debug(f"Streaming cleanup complete for agent run: {agent_run_id}")
 
@@ -5,9 +5,10 @@ This module handles token counting and thread summarization to prevent
 reaching the context window limitations of LLM models.
 """
 
+import asyncio
 import json
 import os
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Set, Union
 
 from litellm.utils import token_counter
 from anthropic import Anthropic
@@ -15,9 +16,34 @@ from core.services.supabase import DBConnection
 from core.utils.logger import logger
 from core.ai_models import model_manager
 from core.agentpress.prompt_caching import apply_anthropic_caching_strategy
+from core.agentpress.token_counting import (
+    count_message_tokens,
+    count_messages_tokens_async,
+    count_text_tokens,
+    get_thread_token_tally,
+    apply_calibration,
+    needs_calibration,
+    mark_calibration_attempt,
+    record_calibration,
+)
 
 DEFAULT_TOKEN_THRESHOLD = 120000
 
+# Background calibration calls; the event loop only keeps weak references to tasks
+_calibration_tasks: Set[asyncio.Task] = set()
+
+# Set-based write for compressed messages: one statement for the whole batch,
+# only touching rows that are not already compressed.
+SAVE_COMPRESSED_MESSAGES_SQL = """
+    UPDATE messages AS m
+    SET metadata = COALESCE(m.metadata, '{}'::jsonb)
+        || jsonb_build_object('compressed', true, 'compressed_content', v.compressed_content)
+    FROM unnest($1::uuid[], $2::text[]) AS v(message_id, compressed_content)
+    WHERE m.message_id = v.message_id
+      AND NOT COALESCE(m.metadata @> '{"compressed": true}'::jsonb, false)
+    RETURNING m.message_id
+"""
+
 # Module-level singleton clients for memory efficiency
 # These are lazily initialized once and reused across all ContextManager instances
 _anthropic_client = None
@@ -78,6 +104,8 @@ class ContextManager:
         - metadata.compressed_content = the compressed content
         
         This allows future reads to use compressed content directly without re-compressing.
+        All messages are written in a single UPDATE; messages that are already
+        compressed are left untouched.
         
         Args:
             compressed_messages: List of dicts with 'message_id' and 'compressed_content'
@@ -88,42 +116,34 @@ class ContextManager:
         if not compressed_messages:
             return 0
         
-        saved_count = 0
-        client = await self.db.client
-        
+        # First entry wins for duplicate message_ids (later ones would hit an already compressed row)
+        to_save: Dict[str, str] = {}
         for msg_data in compressed_messages:
             message_id = msg_data.get('message_id')
             compressed_content = msg_data.get('compressed_content')
-            
-            if not message_id or not compressed_content:
-                continue
-            
-            try:
-                # Get existing metadata
-                result = await client.table('messages').select('metadata').eq('message_id', message_id).single().execute()
-                
-                if result.data:
-                    existing_metadata = result.data.get('metadata', {}) or {}
-                    
-                    # Skip if already compressed
-                    if existing_metadata.get('compressed'):
-                        continue
-                    
-                    # Update metadata with compressed content
-                    existing_metadata['compressed'] = True
-                    existing_metadata['compressed_content'] = compressed_content
-                    
-                    await client.table('messages').update({
-                        'metadata': existing_metadata
-                    }).eq('message_id', message_id).execute()
-                    
-                    saved_count += 1
-                    
-            except Exception as e:
-                logger.warning(f"Failed to save compressed message {message_id}: {e}")
+            if message_id and compressed_content and str(message_id) not in to_save:
+                to_save[str(message_id)] = compressed_content
+        
+        if not to_save:
+            return 0
+        
+        try:
+            from core.services.postgres import PostgresConnection
+            rows = await PostgresConnection().fetch(
+                SAVE_COMPRESSED_MESSAGES_SQL, list(to_save.keys()), list(to_save.values())
+            )
+        except Exception as e:
+            logger.warning(f"Failed to save {len(to_save)} compressed messages: {e}")
+            return 0
+        
+        saved_content = {str(row['message_id']): to_save[str(row['message_id'])] for row in rows}
+        saved_count = len(saved_content)
         
         if saved_count > 0:
             logger.info(f"💾 Saved {saved_count} compressed messages to database")
+            
+            from core.runtime_cache import apply_compressed_thread_messages
+            await apply_compressed_thread_messages(saved_content)
         
         return saved_count
     
@@ -131,47 +151,76 @@ class ContextManager:
         """Get the singleton Bedrock client."""
         return _get_bedrock_client_singleton()
 
-    async def count_tokens(self, model: str, messages: List[Dict[str, Any]], system_prompt: Optional[Dict[str, Any]] = None, apply_caching: bool = True) -> int:
-        """Count tokens using the correct tokenizer for the model.
+    async def count_tokens(self, model: str, messages: List[Dict[str, Any]], system_prompt: Optional[Dict[str, Any]] = None, apply_caching: bool = True, thread_id: Optional[str] = None) -> int:
+        """Count tokens with the local tokenizer, memoized per message.
         
-        For Anthropic/Claude models: Uses Anthropic's official tokenizer
-        For Bedrock models: Uses Bedrock's count_tokens API
-        For other models: Uses LiteLLM's token_counter
+        The primary path is offline: per-message counts are memoized by content
+        digest (in-process LRU + Redis), and with a thread_id a running per-thread
+        tally only re-tokenizes new or changed messages.
         
-        IMPORTANT: By default, applies caching transformation before counting to match
-        the actual token count that will be sent to the API.
+        For Anthropic/Bedrock models the provider count APIs are used as an
+        optional calibration, run off the event loop at most once per interval
+        per model; the resulting remote/local ratio scales the local count.
+        With apply_caching=True the calibration counts the caching-transformed
+        messages, so the ratio includes caching overhead.
         
         Args:
             model: Model name
             messages: List of messages
             system_prompt: Optional system prompt
-            apply_caching: If True, temporarily apply caching transformation before counting
+            apply_caching: If True, calibrate against the caching-transformed messages
+            thread_id: Optional thread ID for incremental per-thread tallies
             
         Returns:
-            Token count (with caching overhead if apply_caching=True)
+            Token count
         """
-        # Apply caching transformation if requested (to match API reality)
-        messages_to_count = messages
-        system_to_count = system_prompt
+        all_messages = [system_prompt] + messages if system_prompt else messages
+        if thread_id:
+            local_count = get_thread_token_tally(thread_id, model).update(all_messages)
+        else:
+            local_count = await count_messages_tokens_async(all_messages, model)
         
-        if apply_caching and ('claude' in model.lower() or 'anthropic' in model.lower()):
-            try:
-                # Temporarily apply caching transformation
-                prepared = await apply_anthropic_caching_strategy(
-                    system_prompt, messages, model, thread_id=None, force_recalc=False
-                )
-                # Separate system from messages
-                system_to_count = None
-                messages_to_count = []
-                for msg in prepared:
-                    if msg.get('role') == 'system':
-                        system_to_count = msg
-                    else:
-                        messages_to_count.append(msg)
-            except Exception as e:
-                logger.debug(f"Failed to apply caching for counting: {e}")
-                # Continue with uncached messages
+        model_lower = model.lower()
+        if ('claude' in model_lower or 'anthropic' in model_lower or 'bedrock' in model_lower) and needs_calibration(model):
+            mark_calibration_attempt(model)
+            task = asyncio.create_task(self._calibrate_token_count(model, messages, system_prompt, local_count, apply_caching))
+            _calibration_tasks.add(task)
+            task.add_done_callback(_calibration_tasks.discard)
         
+        return apply_calibration(model, local_count)
+
+    async def _calibrate_token_count(self, model: str, messages: List[Dict[str, Any]], system_prompt: Optional[Dict[str, Any]], local_count: int, apply_caching: bool) -> None:
+        """Compare the local count with the provider's count API (in a worker thread)."""
+        try:
+            messages_to_count = messages
+            system_to_count = system_prompt
+            
+            if apply_caching and ('claude' in model.lower() or 'anthropic' in model.lower()):
+                try:
+                    # Temporarily apply caching transformation
+                    prepared = await apply_anthropic_caching_strategy(
+                        system_prompt, messages, model, thread_id=None, force_recalc=False
+                    )
+                    # Separate system from messages
+                    system_to_count = None
+                    messages_to_count = []
+                    for msg in prepared:
+                        if msg.get('role') == 'system':
+                            system_to_count = msg
+                        else:
+                            messages_to_count.append(msg)
+                except Exception as e:
+                    logger.debug(f"Failed to apply caching for counting: {e}")
+                    # Continue with uncached messages
+            
+            remote_count = await asyncio.to_thread(self._count_tokens_remote, model, messages_to_count, system_to_count)
+            if remote_count:
+                record_calibration(model, local_count, remote_count)
+        except Exception as e:
+            logger.debug(f"Token count calibration failed for {model}: {e}")
+
+    def _count_tokens_remote(self, model: str, messages_to_count: List[Dict[str, Any]], system_to_count: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Count tokens with the provider API (blocking; Anthropic or Bedrock). Returns None if unavailable."""
         # Check if this is an Anthropic model
         if 'claude' in model.lower() or 'anthropic' in model.lower():
             # Use Anthropic's official tokenizer
@@ -204,7 +253,7 @@ class ContextManager:
                     result = client.messages.count_tokens(**count_params)
                     return result.input_tokens
             except Exception as e:
-                logger.debug(f"Anthropic token counting failed, falling back to LiteLLM: {e}")
+                logger.debug(f"Anthropic token counting failed, skipping calibration: {e}")
         
         # Check if this is a Bedrock model
         elif 'bedrock' in model.lower():
@@ -276,13 +325,9 @@ class ContextManager:
                     
                     return response['inputTokens']
             except Exception as e:
-                logger.debug(f"Bedrock token counting failed, falling back to LiteLLM: {e}")
+                logger.debug(f"Bedrock token counting failed, skipping calibration: {e}")
         
-        # Fallback to LiteLLM token_counter
-        if system_to_count:
-            return token_counter(model=model, messages=[system_to_count] + messages_to_count)
-        else:
-            return token_counter(model=model, messages=messages_to_count)
+        return None
 
     async def estimate_token_usage(self, prompt_messages: List[Dict[str, Any]], completion_content: str, model: str) -> Dict[str, Any]:
         """
@@ -307,7 +352,7 @@ class ContextManager:
             # Count completion tokens (just the text)
             completion_tokens = 0
             if completion_content:
-                completion_tokens = token_counter(model=model, text=completion_content)
+                completion_tokens = count_text_tokens(completion_content, model)
             
             total_tokens = prompt_tokens + completion_tokens
             
@@ -957,7 +1002,7 @@ class ContextManager:
                     continue  # Skip non-dict messages
                 if self.is_tool_result_message(msg):  # Only compress ToolResult messages
                     _i += 1  # Count the number of ToolResult messages
-                    msg_token_count = token_counter(messages=[msg])  # Count the number of tokens in the message
+                    msg_token_count = count_message_tokens(msg, llm_model)  # Count the number of tokens in the message (memoized)
                     if msg_token_count > token_threshold:  # If the message is too long
                         if _i > self.keep_recent_tool_outputs:  # If this is not one of the most recent N ToolResult messages
                             message_id = msg.get('message_id')  # Get the message_id
@@ -987,7 +1032,7 @@ class ContextManager:
                     continue  # Skip non-dict messages
                 if msg.get('role') == 'user':  # Only compress User messages
                     _i += 1  # Count the number of User messages
-                    msg_token_count = token_counter(messages=[msg])  # Count the number of tokens in the message
+                    msg_token_count = count_message_tokens(msg, llm_model)  # Count the number of tokens in the message (memoized)
                     if msg_token_count > token_threshold:  # If the message is too long
                         if _i > self.keep_recent_user_messages:  # If this is not one of the most recent N User messages
                             message_id = msg.get('message_id')  # Get the message_id
@@ -1017,7 +1062,7 @@ class ContextManager:
                     continue  # Skip non-dict messages
                 if msg.get('role') == 'assistant':  # Only compress Assistant messages
                     _i += 1  # Count the number of Assistant messages
-                    msg_token_count = token_counter(messages=[msg])  # Count the number of tokens in the message
+                    msg_token_count = count_message_tokens(msg, llm_model)  # Count the number of tokens in the message (memoized)
                     if msg_token_count > token_threshold:  # If the message is too long
                         if _i > self.keep_recent_assistant_messages:  # If this is not one of the most recent N Assistant messages
                             message_id = msg.get('message_id')  # Get the message_id
@@ -1095,7 +1140,7 @@ class ContextManager:
             uncompressed_total_token_count = actual_total_tokens
         else:
             # Count conversation + system prompt WITH caching (to match API reality)
-            uncompressed_total_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True)
+            uncompressed_total_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True, thread_id=thread_id)
             logger.info(f"Initial token count (with caching): {uncompressed_total_token_count}")
 
         # Calculate target tokens (hysteresis: compress to 60% of max to avoid repeated compressions)
@@ -1115,7 +1160,7 @@ class ContextManager:
             result = self.remove_old_tool_outputs(result, keep_last_n=self.keep_recent_tool_outputs)
             
             # Recalculate WITH caching
-            current_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True)
+            current_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True, thread_id=thread_id)
             
             logger.info(f"After tool compression: {uncompressed_total_token_count} -> {current_token_count} tokens")
             
@@ -1127,7 +1172,7 @@ class ContextManager:
                 result = self.compress_user_messages_in_memory(result, keep_last_n=self.keep_recent_user_messages)
                 
                 # Recalculate with in-memory compressed messages WITH caching
-                current_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True)
+                current_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True, thread_id=thread_id)
                 logger.info(f"After user compression: {current_token_count} tokens")
             
             # Tier 3: Compress assistant messages if still above target
@@ -1138,7 +1183,7 @@ class ContextManager:
                 result = self.compress_assistant_messages_in_memory(result, keep_last_n=self.keep_recent_assistant_messages)
                 
                 # Recalculate with in-memory compressed messages WITH caching
-                current_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True)
+                current_token_count = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True, thread_id=thread_id)
                 logger.info(f"After assistant compression: {current_token_count} tokens")
             
             logger.info(f"Tiered compression complete: {uncompressed_total_token_count} -> {current_token_count} tokens (target: {target_tokens})")
@@ -1160,7 +1205,7 @@ class ContextManager:
             result = await self.compress_assistant_messages(result, llm_model, max_tokens, token_threshold, uncompressed_total_token_count)
 
         # Recalculate WITH caching (to match API reality)
-        compressed_total = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True)
+        compressed_total = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True, thread_id=thread_id)
         
         if compressed_total != uncompressed_total_token_count:
             logger.info(f"Context compression: {uncompressed_total_token_count} -> {compressed_total} tokens (saved {uncompressed_total_token_count - compressed_total})")
@@ -1171,7 +1216,7 @@ class ContextManager:
         if max_iterations <= 0:
             logger.warning(f"Max iterations reached, omitting messages")
             result = await self.compress_messages_by_omitting_messages(result, llm_model, max_tokens, system_prompt=system_prompt)
-            compressed_total = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True)
+            compressed_total = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True, thread_id=thread_id)
             # Fall through to last_usage update
         elif compressed_total > max_tokens:
             logger.warning(f"Further compression needed: {compressed_total} > {max_tokens}")
@@ -1185,7 +1230,7 @@ class ContextManager:
             # Still over target but under max_tokens - use omit_messages to reach target
             logger.info(f"Secondary compression didn't reach target ({compressed_total} > {target_tokens}). Using message omission to reach target.")
             result = await self.compress_messages_by_omitting_messages(result, llm_model, target_tokens, system_prompt=system_prompt)
-            compressed_total = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True)
+            compressed_total = await self.count_tokens(llm_model, result, system_prompt, apply_caching=True, thread_id=thread_id)
             logger.info(f"After message omission to target: {compressed_total} tokens")
 
         logger.info(f"✨ Final compression complete: {compressed_total} tokens (target: {target_tokens}, max: {max_tokens})")
@@ -37,6 +37,7 @@ Based on Anthropic documentation and mathematical optimization (Sept 2025).
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 from core.utils.logger import logger
+from core.agentpress.token_counting import count_messages_tokens, count_text_tokens
 
 
 async def get_stored_threshold(thread_id: str, model: str) -> Optional[Dict[str, Any]]:
@@ -165,21 +166,13 @@ def is_anthropic_model(model_name: str) -> bool:
 
 def estimate_token_count(text: str, model: str = "claude-3-5-sonnet-20240620") -> int:
     """
-    Accurate token counting using LiteLLM's token_counter.
-    Uses model-specific tokenizers when available, falls back to tiktoken.
+    Accurate token counting using LiteLLM's tokenizers, memoized by content digest.
+    Uses model-specific tokenizers when available, falls back to word-based estimation.
     """
     if not text:
         return 0
     
-    try:
-        from litellm import token_counter
-        # Use LiteLLM's token counter with the specific model
-        return token_counter(model=model, text=str(text))
-    except Exception as e:
-        logger.warning(f"LiteLLM token counting failed: {e}, using fallback estimation")
-        # Fallback to word-based estimation
-        word_count = len(str(text).split())
-        return int(word_count * 1.3)
+    return count_text_tokens(str(text), model)
 
 def get_message_token_count(message: Dict[str, Any], model: str = "claude-3-5-sonnet-20240620") -> int:
     """Get estimated token count for a message, including base64 image data."""
@@ -398,9 +391,8 @@ async def apply_anthropic_caching_strategy(
     # Calculate mathematically optimized cache threshold
     if cache_threshold_tokens is None or should_recalculate:
         # Include system prompt tokens in calculation for accurate density (like compression does)
-        # Use token_counter on combined messages to match compression's calculation method
-        from litellm import token_counter
-        total_tokens = token_counter(model=model_name, messages=[working_system_prompt] + conversation_messages) if conversation_messages else 0
+        # Count combined messages to match compression's calculation method (memoized per message)
+        total_tokens = count_messages_tokens([working_system_prompt] + conversation_messages, model_name) if conversation_messages else 0
         
         cache_threshold_tokens = calculate_optimal_cache_threshold(
             context_window_tokens, 
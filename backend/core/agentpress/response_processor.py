@@ -20,11 +20,15 @@ if TYPE_CHECKING:
 from dataclasses import dataclass
 from core.utils.logger import logger
 from core.utils.config import config as global_config
-from core.agentpress.tool import ToolResult
+from core.agentpress.tool import ToolResult, ResultCachePolicy
+from core.agentpress import tool_result_cache
 from core.agentpress.tool_registry import ToolRegistry
+from core.agentpress.tool_scheduler import ToolScheduler, iter_completed
 from core.agentpress.xml_tool_parser import (
     extract_xml_chunks,
-    parse_xml_tool_calls_with_ids
+    parse_xml_tool_calls_with_ids,
+    xml_tool_call_to_dict,
+    StreamingXMLToolCallParser
 )
 from core.agentpress.native_tool_parser import (
     extract_tool_call_chunk_data,
@@ -49,6 +53,9 @@ from core.agentpress.xml_tool_parser import strip_xml_tool_calls
 # Type alias for tool execution strategy
 ToolExecutionStrategy = Literal["sequential", "parallel"]
 
+# Stop sequence ending an XML tool-calling turn (see ThreadManager); nothing after it is executed
+AGENT_STOP_TOKEN = "|||STOP_AGENT|||"
+
 @dataclass
 class ToolExecutionContext:
     """Context for a tool execution including call details, result, and display info."""
@@ -460,10 +467,13 @@ class ResponseProcessor:
         # Each assistant message should be separate
         accumulated_content = ""
         tool_calls_buffer = {}
-        current_xml_content = ""
+        xml_stream_parser = StreamingXMLToolCallParser() # Incremental parser, O(chunk) per content chunk
         xml_chunks_buffer = []
         pending_tool_executions = []
+        tool_scheduler = self._create_tool_scheduler(config.tool_execution_strategy)
+        stop_token_seen = False # No XML tool calls are dispatched past AGENT_STOP_TOKEN
         yielded_tool_indices = set() # Stores indices of tools whose *status* has been yielded
+        completed_tool_indices = set() # Tools whose completed/failed status was yielded as they finished
         executed_native_tool_indices = set() # Track which native tool call indices have been executed
         tool_index = 0
         xml_tool_call_count = 0
@@ -640,7 +650,7 @@ class ResponseProcessor:
                     finish_reason = chunk.choices[0].finish_reason
                     if finish_reason == "stop":
                         # Check if stop token appeared in content
-                        if "|||STOP_AGENT|||" in accumulated_content:
+                        if AGENT_STOP_TOKEN in accumulated_content:
                             logger.info(f"🛑 Stop sequence triggered - |||STOP_AGENT||| detected in content")
                         elif "<function_calls>" in accumulated_content:
                             logger.info(f"🛑 Stop sequence triggered after function call")
@@ -675,7 +685,6 @@ class ResponseProcessor:
                         if isinstance(chunk_content, list):
                             chunk_content = ''.join(str(item) for item in chunk_content)
                         accumulated_content += chunk_content
-                        current_xml_content += chunk_content
 
                         # Yield content chunk IMMEDIATELY - no datetime call, use pre-built metadata
                         # This is the hot path - every microsecond counts!
@@ -691,14 +700,25 @@ class ResponseProcessor:
                         __sequence += 1
 
                         # --- Process XML Tool Calls (if enabled) ---
-                        if config.xml_tool_calling:
-                            xml_chunks = extract_xml_chunks(current_xml_content)
-                            for xml_chunk in xml_chunks:
-                                current_xml_content = current_xml_content.replace(xml_chunk, "", 1)
-                                xml_chunks_buffer.append(xml_chunk)
-                                # Parse ALL tool calls from this chunk (can be multiple <invoke> tags)
+                        if config.xml_tool_calling and not stop_token_seen:
+                            xml_content = chunk_content
+                            chunk_start = len(accumulated_content) - len(chunk_content)
+                            stop_pos = accumulated_content.find(AGENT_STOP_TOKEN, max(0, chunk_start - len(AGENT_STOP_TOKEN)))
+                            if stop_pos != -1:
+                                # The model is done calling tools; only feed what precedes the token
+                                stop_token_seen = True
+                                xml_content = accumulated_content[chunk_start:stop_pos] if stop_pos > chunk_start else ""
+                                logger.debug("Stop token seen - no further XML tool calls will be dispatched")
+
+                            # Tool calls are emitted (and dispatched) as soon as their </invoke> arrives
+                            completed_xml_tool_calls = xml_stream_parser.feed(xml_content)
+                            xml_chunks_buffer.extend(xml_stream_parser.pop_completed_blocks())
+                            if completed_xml_tool_calls:
                                 current_assistant_id = last_assistant_message_object['message_id'] if last_assistant_message_object else None
-                                parsed_tool_calls = parse_xml_tool_calls_with_ids(xml_chunk, current_assistant_id, xml_tool_call_count)
+                                parsed_tool_calls = [
+                                    xml_tool_call_to_dict(xml_tool_call, current_assistant_id, xml_tool_call_count + idx)
+                                    for idx, xml_tool_call in enumerate(completed_xml_tool_calls)
+                                ]
                                 
                                 # Convert parsed XML tool calls to unified format
                                 for tool_call in parsed_tool_calls:
@@ -716,7 +736,7 @@ class ResponseProcessor:
                                 xml_tool_calls_updated = True
                                 
                                 # Execute XML tool calls if enabled
-                                for tool_call in parsed_tool_calls:
+                                for tool_call, xml_tool_call in zip(parsed_tool_calls, completed_xml_tool_calls):
                                     context = self._create_tool_context(
                                         tool_call, tool_index, current_assistant_id
                                     )
@@ -727,10 +747,12 @@ class ResponseProcessor:
                                         if started_msg_obj: yield format_for_yield(started_msg_obj)
                                         yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                        execution_task = asyncio.create_task(self._execute_tool(tool_call))
+                                        # Speculative until its <function_calls> block closes
+                                        execution_task = tool_scheduler.submit(tool_call)
                                         pending_tool_executions.append({
                                             "task": execution_task, "tool_call": tool_call,
-                                            "tool_index": tool_index, "context": context
+                                            "tool_index": tool_index, "context": context,
+                                            "xml_block": xml_tool_call.block_index
                                         })
                                         tool_index += 1
 
@@ -787,7 +809,7 @@ class ResponseProcessor:
                                 if started_msg_obj: yield format_for_yield(started_msg_obj)
                                 yielded_tool_indices.add(tool_index) # Mark status as yielded
 
-                                execution_task = asyncio.create_task(self._execute_tool(tool_call_data))
+                                execution_task = tool_scheduler.submit(tool_call_data)
                                 pending_tool_executions.append({
                                     "task": execution_task, "tool_call": tool_call_data,
                                     "tool_index": tool_index, "context": context
@@ -913,14 +935,37 @@ class ResponseProcessor:
                 logger.warning("⚠️ No usage data captured from streaming chunks")
 
 
+            # XML calls start when their </invoke> closes, before the model has committed to the
+            # whole <function_calls> block. On user stop, everything still running is cancelled.
+            # Otherwise calls from a block that never closed are cancelled, unless the model
+            # ended the turn with the stop token (its calls are complete then).
+            if pending_tool_executions:
+                abandoned_executions = []
+                if cancellation_event.is_set():
+                    abandoned_executions = pending_tool_executions
+                    cancel_reason = "Cancelled: the agent run was stopped"
+                elif not stop_token_seen and finish_reason != "stop":
+                    abandoned_executions = [
+                        execution for execution in pending_tool_executions
+                        if execution.get("xml_block") is not None
+                        and execution["xml_block"] >= xml_stream_parser.blocks_completed
+                    ]
+                    cancel_reason = "Cancelled: the response ended inside an unfinished <function_calls> block"
+                if abandoned_executions:
+                    async for cancelled_msg in self._cancel_tool_executions(abandoned_executions, cancel_reason, thread_id, thread_run_id):
+                        yield cancelled_msg
+
             tool_results_buffer = []
             if pending_tool_executions:
                 logger.info(f"Waiting for {len(pending_tool_executions)} pending streamed tool executions")
                 self.trace.event(name="waiting_for_pending_streamed_tool_executions", level="DEFAULT", status_message=(f"Waiting for {len(pending_tool_executions)} pending streamed tool executions"))
                 pending_tasks = [execution["task"] for execution in pending_tool_executions]
-                done, _ = await asyncio.wait(pending_tasks)
 
-                for execution in pending_tool_executions:
+                # Report each tool as soon as it finishes rather than in call order
+                async for position in iter_completed(pending_tasks):
+                    execution = pending_tool_executions[position]
+                    if execution.get("cancelled"):
+                        continue
                     tool_idx = execution.get("tool_index", -1)
                     context = execution["context"]
                     tool_name = context.function_name
@@ -937,6 +982,13 @@ class ResponseProcessor:
                                      logger.debug(f"Terminating tool '{tool_name}' completed during streaming. Setting termination flag.")
                                      self.trace.event(name="terminating_tool_completed_during_streaming", level="DEFAULT", status_message=(f"Terminating tool '{tool_name}' completed during streaming. Setting termination flag."))
                                      agent_should_terminate = True
+                                 
+                                 # Result messages are saved later in model order; the status goes out now
+                                 completed_msg_obj = await self._yield_and_save_tool_completed(
+                                     context, None, thread_id, thread_run_id
+                                 )
+                                 if completed_msg_obj: yield format_for_yield(completed_msg_obj)
+                                 completed_tool_indices.add(tool_idx)
                                      
                              else:
                                 logger.warning(f"Task for tool index {tool_idx} not done after wait.")
@@ -965,6 +1017,7 @@ class ResponseProcessor:
                             )
                             if completed_msg_obj: yield format_for_yield(completed_msg_obj)
                             yielded_tool_indices.add(tool_idx)
+                            completed_tool_indices.add(tool_idx)
                     except Exception as e:
                         logger.error(f"Error getting result/yielding status for pending tool execution {tool_idx}: {str(e)}")
                         self.trace.event(name="error_getting_result_yielding_status_for_pending_tool_execution", level="ERROR", status_message=(f"Error getting result/yielding status for pending tool execution {tool_idx}: {str(e)}"))
@@ -1000,8 +1053,8 @@ class ResponseProcessor:
 
                 # Remove stop token from content if present (Bedrock may include it due to batch generation)
                 final_content = accumulated_content
-                if "|||STOP_AGENT|||" in final_content:
-                    final_content = final_content.replace("|||STOP_AGENT|||", "").strip()
+                if AGENT_STOP_TOKEN in final_content:
+                    final_content = final_content.replace(AGENT_STOP_TOKEN, "").strip()
                     logger.debug("Removed |||STOP_AGENT||| stop token from assistant message")
 
                 message_data = { # Dict to be saved in 'content'
@@ -1089,7 +1142,7 @@ class ResponseProcessor:
                 parsed_xml_data = []
                 if config.xml_tool_calling:
                     # Reparse remaining content just in case (should be empty if processed correctly)
-                    xml_chunks = extract_xml_chunks(current_xml_content)
+                    xml_chunks = extract_xml_chunks(xml_stream_parser.pending_content)
                     xml_chunks_buffer.extend(xml_chunks)
 
                     for chunk in xml_chunks_buffer:
@@ -1128,6 +1181,58 @@ class ResponseProcessor:
 
                 tool_results_map = {} # tool_index -> (tool_call, result, context)
 
+                def map_tool_result(current_tool_idx, tc, res) -> bool:
+                    # Map back using all_tool_data_map which has correct indices
+                    if current_tool_idx not in all_tool_data_map:
+                        logger.warning(f"Could not map result for tool index {current_tool_idx}")
+                        self.trace.event(name="could_not_map_result_for_tool_index", level="WARNING", status_message=(f"Could not map result for tool index {current_tool_idx}"))
+                        return False
+                    context = self._create_tool_context(
+                        tc, current_tool_idx,
+                        last_assistant_message_object['message_id'] if last_assistant_message_object else None
+                    )
+                    context.result = res
+                    tool_results_map[current_tool_idx] = (tc, res, context)
+                    return True
+
+                async def emit_tool_result(tool_idx):
+                    tool_call, result, context = tool_results_map[tool_idx]
+                    context.result = result
+                    if not context.assistant_message_id and last_assistant_message_object:
+                        context.assistant_message_id = last_assistant_message_object['message_id']
+
+                    # Yield start status ONLY IF executing non-streamed (already yielded if streamed)
+                    if not config.execute_on_stream and tool_idx not in yielded_tool_indices:
+                        started_msg_obj = await self._yield_and_save_tool_started(context, thread_id, thread_run_id)
+                        if started_msg_obj: yield format_for_yield(started_msg_obj)
+                        yielded_tool_indices.add(tool_idx) # Mark status yielded
+
+                    # Save the tool result message to DB
+                    saved_tool_result_object = await self._add_tool_result( # Returns full object or None
+                        thread_id, tool_call, result,
+                        context.assistant_message_id
+                    )
+
+                    # Yield completed/failed status (linked to saved result ID if available),
+                    # unless it already went out when the tool finished
+                    if tool_idx not in completed_tool_indices:
+                        completed_msg_obj = await self._yield_and_save_tool_completed(
+                            context,
+                            saved_tool_result_object['message_id'] if saved_tool_result_object else None,
+                            thread_id, thread_run_id
+                        )
+                        if completed_msg_obj: yield format_for_yield(completed_msg_obj)
+                    # Don't add to yielded_tool_indices here, completion status is separate yield
+
+                    # Yield the saved tool result object
+                    if saved_tool_result_object:
+                        tool_result_message_objects[tool_idx] = saved_tool_result_object
+                        yield format_for_yield(saved_tool_result_object)
+                    else:
+                         logger.error(f"Failed to save tool result for index {tool_idx}, not yielding result message.")
+                         self.trace.event(name="failed_to_save_tool_result_for_index", level="ERROR", status_message=(f"Failed to save tool result for index {tool_idx}, not yielding result message."))
+                         # Optionally yield error status for saving failure?
+
                 # Populate from buffer if executed on stream
                 if config.execute_on_stream and tool_results_buffer:
                     logger.info(f"Processing {len(tool_results_buffer)} buffered tool results")
@@ -1143,68 +1248,52 @@ class ResponseProcessor:
                     self.trace.event(name="executing_tools_after_stream", level="DEFAULT", status_message=(f"Executing {len(final_tool_calls_to_process)} tools ({config.tool_execution_strategy}) after stream"))
 
                     try:
-                        results_list = await self._execute_tools(final_tool_calls_to_process, config.tool_execution_strategy)
-                        logger.debug(f"✅ STREAMING: Tool execution after stream completed, got {len(results_list)} results")
+                        if config.tool_execution_strategy == "parallel":
+                            # Statuses go out as each tool starts and finishes; result
+                            # messages are saved below in model order, like the execute-on-stream path
+                            scheduler = self._create_tool_scheduler(config.tool_execution_strategy)
+                            tasks = [scheduler.submit(tc) for tc in final_tool_calls_to_process]
+                            try:
+                                for current_tool_idx, tc in enumerate(final_tool_calls_to_process):
+                                    started_context = self._create_tool_context(
+                                        tc, current_tool_idx,
+                                        last_assistant_message_object['message_id'] if last_assistant_message_object else None
+                                    )
+                                    started_msg_obj = await self._yield_and_save_tool_started(started_context, thread_id, thread_run_id)
+                                    if started_msg_obj: yield format_for_yield(started_msg_obj)
+                                    yielded_tool_indices.add(current_tool_idx)
+                                async for current_tool_idx in iter_completed(tasks):
+                                    tc = final_tool_calls_to_process[current_tool_idx]
+                                    res = self._task_tool_result(tc, tasks[current_tool_idx])
+                                    if map_tool_result(current_tool_idx, tc, res):
+                                        completed_msg_obj = await self._yield_and_save_tool_completed(
+                                            tool_results_map[current_tool_idx][2], None, thread_id, thread_run_id
+                                        )
+                                        if completed_msg_obj: yield format_for_yield(completed_msg_obj)
+                                        completed_tool_indices.add(current_tool_idx)
+                            finally:
+                                for task in tasks:
+                                    if not task.done():
+                                        task.cancel()
+                            results_list = []
+                        else:
+                            results_list = await self._execute_tools(final_tool_calls_to_process, config.tool_execution_strategy)
+                        logger.debug(f"✅ STREAMING: Tool execution after stream completed, got {len(tool_results_map) or len(results_list)} results")
                     except Exception as stream_exec_error:
                         logger.error(f"❌ STREAMING: Tool execution after stream failed: {str(stream_exec_error)}")
                         logger.error(f"❌ Error type: {type(stream_exec_error).__name__}")
                         logger.error(f"❌ Tool calls that failed: {final_tool_calls_to_process}")
                         raise
-                    current_tool_idx = 0
-                    for tc, res in results_list:
-                       # Map back using all_tool_data_map which has correct indices
-                       if current_tool_idx in all_tool_data_map:
-                           tool_data = all_tool_data_map[current_tool_idx]
-                           context = self._create_tool_context(
-                               tc, current_tool_idx,
-                               last_assistant_message_object['message_id'] if last_assistant_message_object else None
-                           )
-                           context.result = res
-                           tool_results_map[current_tool_idx] = (tc, res, context)
-                       else:
-                           logger.warning(f"Could not map result for tool index {current_tool_idx}")
-                           self.trace.event(name="could_not_map_result_for_tool_index", level="WARNING", status_message=(f"Could not map result for tool index {current_tool_idx}"))
-                       current_tool_idx += 1
+                    for current_tool_idx, (tc, res) in enumerate(results_list):
+                        map_tool_result(current_tool_idx, tc, res)
 
                 # Save and Yield each result message
                 if tool_results_map:
                     logger.debug(f"Saving and yielding {len(tool_results_map)} final tool result messages")
                     self.trace.event(name="saving_and_yielding_final_tool_result_messages", level="DEFAULT", status_message=(f"Saving and yielding {len(tool_results_map)} final tool result messages"))
                     for tool_idx in sorted(tool_results_map.keys()):
-                        tool_call, result, context = tool_results_map[tool_idx]
-                        context.result = result
-                        if not context.assistant_message_id and last_assistant_message_object:
-                            context.assistant_message_id = last_assistant_message_object['message_id']
-
-                        # Yield start status ONLY IF executing non-streamed (already yielded if streamed)
-                        if not config.execute_on_stream and tool_idx not in yielded_tool_indices:
-                            started_msg_obj = await self._yield_and_save_tool_started(context, thread_id, thread_run_id)
-                            if started_msg_obj: yield format_for_yield(started_msg_obj)
-                            yielded_tool_indices.add(tool_idx) # Mark status yielded
-
-                        # Save the tool result message to DB
-                        saved_tool_result_object = await self._add_tool_result( # Returns full object or None
-                            thread_id, tool_call, result,
-                            context.assistant_message_id
-                        )
-
-                        # Yield completed/failed status (linked to saved result ID if available)
-                        completed_msg_obj = await self._yield_and_save_tool_completed(
-                            context,
-                            saved_tool_result_object['message_id'] if saved_tool_result_object else None,
-                            thread_id, thread_run_id
-                        )
-                        if completed_msg_obj: yield format_for_yield(completed_msg_obj)
-                        # Don't add to yielded_tool_indices here, completion status is separate yield
-
-                        # Yield the saved tool result object
-                        if saved_tool_result_object:
-                            tool_result_message_objects[tool_idx] = saved_tool_result_object
-                            yield format_for_yield(saved_tool_result_object)
-                        else:
-                             logger.error(f"Failed to save tool result for index {tool_idx}, not yielding result message.")
-                             self.trace.event(name="failed_to_save_tool_result_for_index", level="ERROR", status_message=(f"Failed to save tool result for index {tool_idx}, not yielding result message."))
-                             # Optionally yield error status for saving failure?
+                        async for msg in emit_tool_result(tool_idx):
+                            yield msg
 
             # --- Re-check auto-continue after tool executions ---
             # The should_auto_continue flag was set earlier, but tool executions may have set agent_should_terminate
@@ -1510,6 +1599,9 @@ class ResponseProcessor:
                                 'content': updated_content
                             }).eq('message_id', last_assistant_message_object['message_id']).execute()
                             
+                            from core.runtime_cache import invalidate_thread_messages_cache
+                            await invalidate_thread_messages_cache(thread_id)
+                            
                             logger.info(f"✅ Removed {len(tool_call_ids)} orphaned tool_calls from message {last_assistant_message_object['message_id']}: {tool_call_ids}")
                 except Exception as cleanup_e:
                     logger.error(f"Error cleaning up orphaned tool calls in finally block: {str(cleanup_e)}", exc_info=True)
@@ -1822,7 +1914,30 @@ class ResponseProcessor:
             if end_msg_obj: yield format_for_yield(end_msg_obj)
 
     # Tool execution methods
+    def _get_result_cache_policy(self, function_name: Optional[str]) -> Optional[ResultCachePolicy]:
+        tool_info = self.tool_registry.tools.get(function_name) if function_name else None
+        if not tool_info or not hasattr(tool_info["instance"], "get_result_cache_policies"):
+            return None
+        return tool_info["instance"].get_result_cache_policies().get(function_name)
+
     async def _execute_tool(self, tool_call: Dict[str, Any]) -> ToolResult:
+        """Execute a single tool call, serving idempotent tools from the tool result cache."""
+        policy = self._get_result_cache_policy(tool_call.get("function_name"))
+        if policy is None:
+            return await self._invoke_tool(tool_call)
+
+        if policy.scope == "project":
+            scope_id = self.project_id
+        elif policy.scope == "account":
+            scope_id = getattr(self.thread_manager, "account_id", None)
+        else:
+            scope_id = None
+        return await tool_result_cache.get_or_execute(
+            tool_call["function_name"], tool_call.get("arguments"), policy, scope_id,
+            lambda: self._invoke_tool(tool_call)
+        )
+
+    async def _invoke_tool(self, tool_call: Dict[str, Any]) -> ToolResult:
         """Execute a single tool call and return the result."""
         span = self.trace.span(name=f"execute_tool.{tool_call['function_name']}", input=tool_call["arguments"])
         function_name = "unknown"
@@ -2132,6 +2247,57 @@ class ResponseProcessor:
             logger.warning(f"❌ [JIT MCP AUTO] {result.to_user_message()}")
             return False
 
+    def _create_tool_scheduler(self, execution_strategy: ToolExecutionStrategy) -> ToolScheduler:
+        """Create a scheduler for one turn's tool calls (see core.agentpress.tool_scheduler)."""
+        return ToolScheduler(self.tool_registry, self._execute_tool, sequential=execution_strategy == "sequential")
+
+    async def _cancel_tool_executions(
+        self,
+        executions: List[Dict[str, Any]],
+        reason: str,
+        thread_id: str,
+        thread_run_id: str
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Cancel still-running streamed tool executions and yield a tool_error status for each.
+
+        Waits for the cancelled tasks to unwind so nothing keeps running in the background.
+        Cancelled executions are flagged ("cancelled") so their results are never persisted;
+        executions that finished anyway keep their results.
+        """
+        running = [execution for execution in executions if not execution["task"].done()]
+        if not running:
+            return
+        logger.info(f"🛑 Cancelling {len(running)} speculative tool executions: {reason}")
+        self.trace.event(name="cancelling_speculative_tool_executions", level="DEFAULT", status_message=(f"Cancelling {len(running)} speculative tool executions: {reason}"))
+        for execution in running:
+            execution["task"].cancel()
+        await asyncio.gather(*(execution["task"] for execution in running), return_exceptions=True)
+
+        for execution in running:
+            if not execution["task"].cancelled():
+                continue
+            execution["cancelled"] = True
+            context = execution["context"]
+            context.error = Exception(reason)
+            error_msg_obj = await self._yield_and_save_tool_error(context, thread_id, thread_run_id)
+            if error_msg_obj: yield format_for_yield(error_msg_obj)
+
+    def _task_tool_result(self, tool_call: Dict[str, Any], task: asyncio.Task) -> ToolResult:
+        """Result of a finished scheduler task, with exceptions turned into failed results."""
+        tool_name = tool_call.get('function_name', 'unknown')
+        if task.cancelled():
+            return ToolResult(success=False, output=f"Tool '{tool_name}' was cancelled")
+        error = task.exception()
+        if error is not None:
+            logger.error(f"❌ EXCEPTION in scheduled execution for tool {tool_name}: {str(error)}")
+            self.trace.event(name="error_executing_tool_parallel", level="ERROR", status_message=(f"Error executing tool {tool_name}: {str(error)}"))
+            return ToolResult(success=False, output=f"Error executing tool: {str(error)}")
+        result = task.result()
+        if not isinstance(result, ToolResult):
+            logger.error(f"❌ Tool {tool_name} returned invalid result type: {type(result)}")
+            return ToolResult(success=False, output=f"Invalid result type from tool: {type(result)}")
+        return result
+
     async def _execute_tools(
         self,
         tool_calls: List[Dict[str, Any]],
@@ -2256,8 +2422,9 @@ class ResponseProcessor:
     async def _execute_tools_in_parallel(self, tool_calls: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], ToolResult]]:
         """Execute tool calls in parallel and return results.
 
-        This method executes all tool calls simultaneously using asyncio.gather, which
-        can significantly improve performance when executing multiple independent tools.
+        Calls are submitted to a ToolScheduler: independent calls run at the same time,
+        calls touching the same resource (declared with execution_hints) run in order,
+        and every call is bounded by its tool class's concurrency limit and a timeout.
 
         Args:
             tool_calls: List of tool calls to execute
@@ -2277,10 +2444,11 @@ class ResponseProcessor:
 
             # Create tasks for all tool calls
             logger.debug("🛠️ Creating async tasks for parallel execution")
+            scheduler = self._create_tool_scheduler("parallel")
             tasks = []
             for i, tool_call in enumerate(tool_calls):
                 logger.debug(f"📋 Creating task {i+1} for tool: {tool_call.get('function_name', 'unknown')}")
-                task = self._execute_tool(tool_call)
+                task = scheduler.submit(tool_call)
                 tasks.append(task)
 
             logger.debug(f"✅ Created {len(tasks)} tasks for parallel execution")
@@ -4,6 +4,7 @@ Simplified conversation thread management system for AgentPress.
 
 import asyncio
 import json
+import time
 from typing import List, Dict, Any, Optional, Type, Union, AsyncGenerator, Literal, cast, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -19,13 +20,29 @@ from core.services.supabase import DBConnection
 from core.utils.logger import logger
 from langfuse.client import StatefulGenerationClient, StatefulTraceClient
 from core.services.langfuse import langfuse
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 # Billing removed
-from litellm.utils import token_counter
+from core.agentpress.token_counting import count_messages_tokens
 import litellm
 
 ToolChoice = Literal["auto", "required", "none"]
 
+# Incremental message fetches re-read this far behind the watermark: created_at is set
+# at insert time, so a row can commit after a newer one has already been read
+MESSAGE_FETCH_OVERLAP_SECONDS = 5
+
+
+def _overlap_since(watermark: Any) -> Any:
+    if watermark is None:
+        return None
+    if isinstance(watermark, str):
+        try:
+            parsed = datetime.fromisoformat(watermark.replace('Z', '+00:00'))
+        except ValueError:
+            return watermark
+        return (parsed - timedelta(seconds=MESSAGE_FETCH_OVERLAP_SECONDS)).isoformat()
+    return watermark - timedelta(seconds=MESSAGE_FETCH_OVERLAP_SECONDS)
+
 class ThreadManager:
     def __init__(self, trace: Optional[StatefulTraceClient] = None, agent_config: Optional[dict] = None, 
                  project_id: Optional[str] = None, thread_id: Optional[str] = None, account_id: Optional[str] = None,
@@ -56,6 +73,7 @@ class ThreadManager:
         )
         
         self._memory_context: Optional[Dict[str, Any]] = None
+        self._last_message_fetch_stats: Dict[str, Any] = {}
 
     def set_memory_context(self, memory_context: Optional[Dict[str, Any]]):
         self._memory_context = memory_context
@@ -223,6 +241,10 @@ class ThreadManager:
         """
         Get messages for a thread.
         
+        Full fetches go through a per-thread cache of parsed messages: only rows
+        from shortly before the cached created_at watermark on are read from the DB,
+        and rows already cached are skipped by message_id.
+        
         Args:
             thread_id: Thread ID to get messages for
             lightweight: If True, fetch only recent messages with minimal payload (for bootstrap)
@@ -231,95 +253,159 @@ class ThreadManager:
         client = await self.db.client
 
         try:
-            all_messages = []
-            
             if lightweight:
                 result = await client.table('messages').select('message_id, type, content').eq('thread_id', thread_id).eq('is_llm_message', True).order('created_at').limit(100).execute()
-                
-                if result.data:
-                    all_messages = result.data
-            else:
-                batch_size = 1000
-                offset = 0
-                
-                while True:
-                    result = await client.table('messages').select('message_id, type, content, metadata').eq('thread_id', thread_id).eq('is_llm_message', True).order('created_at').range(offset, offset + batch_size - 1).execute()
-                    
-                    if not result.data:
-                        break
-                        
-                    all_messages.extend(result.data)
-                    if len(result.data) < batch_size:
-                        break
-                    offset += batch_size
-
-            if not all_messages:
-                return []
-
-            messages = []
-            for item in all_messages:
-                content = item['content']
-                metadata = item.get('metadata', {})
-                is_compressed = False
-                
-                if not lightweight and isinstance(metadata, dict) and metadata.get('compressed'):
-                    compressed_content = metadata.get('compressed_content')
-                    if compressed_content:
-                        content = compressed_content
-                        is_compressed = True
-                
-                # Parse content and add message_id
-                if isinstance(content, str):
-                    try:
-                        parsed_item = json.loads(content)
-                        # 将 UUID 转换为字符串，避免 JSON 序列化错误
-                        parsed_item['message_id'] = str(item['message_id'])
-                        
-                        # Skip empty user messages (defensive filter for legacy data)
-                        if parsed_item.get('role') == 'user':
-                            msg_content = parsed_item.get('content', '')
-                            if isinstance(msg_content, str) and not msg_content.strip():
-                                logger.warning(f"Skipping empty user message {item['message_id']} from LLM context")
-                                continue
-                        
-                        messages.append(parsed_item)
-                    except json.JSONDecodeError:
-                        # If compressed, content is a plain string (not JSON) - this is expected
-                        if is_compressed:
-                            messages.append({
-                                'role': 'user',
-                                'content': content,
-                                'message_id': str(item['message_id'])  # 转换 UUID 为字符串
-                            })
-                        else:
-                            logger.error(f"Failed to parse message: {content[:100]}")
-                elif isinstance(content, dict):
-                    # 将 UUID 转换为字符串，避免 JSON 序列化错误
-                    content['message_id'] = str(item['message_id'])
-                    
-                    if content.get('role') == 'user':
-                        msg_content = content.get('content', '')
-                        if isinstance(msg_content, str) and not msg_content.strip():
-                            logger.warning(f"Skipping empty user message {item['message_id']} from LLM context")
-                            continue
-                    
-                    if content.get('role') == 'assistant' and content.get('tool_calls'):
-                        content = self._validate_tool_calls_in_message(content)
-                    
-                    messages.append(content)
-                else:
-                    logger.warning(f"Unexpected content type: {type(content)}, attempting to use as-is")
-                    messages.append({
-                        'role': 'user',
-                        'content': str(content),
-                        'message_id': str(item['message_id'])  # 转换 UUID 为字符串
-                    })
+                messages = []
+                for item in result.data or []:
+                    parsed = self._parse_llm_message_row(item, lightweight=True)
+                    if parsed is not None:
+                        messages.append(parsed)
+                return messages
+
+            from core.runtime_cache import (
+                get_thread_messages_generation, get_cached_thread_messages, set_cached_thread_messages
+            )
 
-            return messages
+            generation = await get_thread_messages_generation(thread_id)
+            entry = get_cached_thread_messages(thread_id, generation)
+            cache_hit = entry is not None
+            if not cache_hit:
+                entry = self._new_message_cache_entry(generation)
+
+            # Re-parse rows whose compression metadata changed since they were cached
+            if entry['pending']:
+                pending = entry['pending']
+                entry['pending'] = {}
+                entry['entries'] = [
+                    (message_id, self._parse_llm_message_row(pending[message_id]), size) if message_id in pending else (message_id, parsed, size)
+                    for message_id, parsed, size in entry['entries']
+                ]
+
+            bytes_saved = sum(size for _, _, size in entry['entries'])
+            rows = await self._fetch_llm_message_rows(client, thread_id, since=_overlap_since(entry['watermark']))
+            new_rows = [item for item in rows if str(item['message_id']) not in entry['message_ids']]
+
+            watermark = entry['watermark']
+            if watermark is not None and any(item.get('created_at') is not None and item['created_at'] < watermark for item in new_rows):
+                # A row committed late, behind the watermark: rebuild so entries stay in created_at order
+                logger.debug(f"Late message row in thread {thread_id}, rebuilding message cache")
+                entry = self._new_message_cache_entry(generation)
+                cache_hit = False
+                new_rows = await self._fetch_llm_message_rows(client, thread_id)
+
+            for item in new_rows:
+                message_id = str(item['message_id'])
+                created_at = item.get('created_at')
+                if entry['watermark'] is None or (created_at is not None and created_at > entry['watermark']):
+                    entry['watermark'] = created_at
+                entry['message_ids'].add(message_id)
+                content = item.get('content')
+                size = len(content) if isinstance(content, str) else 0
+                entry['entries'].append((message_id, self._parse_llm_message_row(item), size))
+
+            if generation is not None and entry['entries']:
+                set_cached_thread_messages(thread_id, entry)
+
+            self._last_message_fetch_stats = {
+                'cache_hit': cache_hit,
+                'new_rows': len(new_rows),
+                'bytes_saved': bytes_saved if cache_hit else 0,
+            }
+
+            # Shallow copies: callers replace top-level keys (e.g. content) during compression
+            return [dict(parsed) for _, parsed, _ in entry['entries'] if parsed is not None]
 
         except Exception as e:
             logger.error(f"Failed to get messages for thread {thread_id}: {str(e)}", exc_info=True)
             return []
+
+    @staticmethod
+    def _new_message_cache_entry(generation: Optional[str]) -> Dict[str, Any]:
+        return {
+            'generation': generation, 'entries': [], 'watermark': None,
+            'message_ids': set(), 'pending': {}, 'cached_at': time.time()
+        }
+
+    async def _fetch_llm_message_rows(self, client, thread_id: str, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch LLM message rows in created_at order, optionally only those at or after `since`."""
+        batch_size = 1000
+        offset = 0
+        rows = []
+        
+        while True:
+            query = client.table('messages').select('message_id, type, content, metadata, created_at').eq('thread_id', thread_id).eq('is_llm_message', True)
+            if since is not None:
+                query = query.gte('created_at', since)
+            result = await query.order('created_at').range(offset, offset + batch_size - 1).execute()
+            
+            if not result.data:
+                break
+                
+            rows.extend(result.data)
+            if len(result.data) < batch_size:
+                break
+            offset += batch_size
+        
+        return rows
+
+    def _parse_llm_message_row(self, item: Dict[str, Any], lightweight: bool = False) -> Optional[Dict[str, Any]]:
+        """Parse a messages row into an LLM message, resolving compressed content. Returns None to skip."""
+        content = item['content']
+        metadata = item.get('metadata', {})
+        is_compressed = False
+        
+        if not lightweight and isinstance(metadata, dict) and metadata.get('compressed'):
+            compressed_content = metadata.get('compressed_content')
+            if compressed_content:
+                content = compressed_content
+                is_compressed = True
+        
+        # Parse content and add message_id
+        if isinstance(content, str):
+            try:
+                parsed_item = json.loads(content)
+                # 将 UUID 转换为字符串，避免 JSON 序列化错误
+                parsed_item['message_id'] = str(item['message_id'])
+                
+                # Skip empty user messages (defensive filter for legacy data)
+                if parsed_item.get('role') == 'user':
+                    msg_content = parsed_item.get('content', '')
+                    if isinstance(msg_content, str) and not msg_content.strip():
+                        logger.warning(f"Skipping empty user message {item['message_id']} from LLM context")
+                        return None
+                
+                return parsed_item
+            except json.JSONDecodeError:
+                # If compressed, content is a plain string (not JSON) - this is expected
+                if is_compressed:
+                    return {
+                        'role': 'user',
+                        'content': content,
+                        'message_id': str(item['message_id'])  # 转换 UUID 为字符串
+                    }
+                logger.error(f"Failed to parse message: {content[:100]}")
+                return None
+        elif isinstance(content, dict):
+            # 将 UUID 转换为字符串，避免 JSON 序列化错误
+            content['message_id'] = str(item['message_id'])
+            
+            if content.get('role') == 'user':
+                msg_content = content.get('content', '')
+                if isinstance(msg_content, str) and not msg_content.strip():
+                    logger.warning(f"Skipping empty user message {item['message_id']} from LLM context")
+                    return None
+            
+            if content.get('role') == 'assistant' and content.get('tool_calls'):
+                content = self._validate_tool_calls_in_message(content)
+            
+            return content
+        else:
+            logger.warning(f"Unexpected content type: {type(content)}, attempting to use as-is")
+            return {
+                'role': 'user',
+                'content': str(content),
+                'message_id': str(item['message_id'])  # 转换 UUID 为字符串
+            }
     
     async def run_thread(
         self,
@@ -413,7 +499,6 @@ class ThreadManager:
             if ENABLE_PROMPT_CACHING:
                 try:
                     from core.ai_models import model_manager
-                    from litellm.utils import token_counter
                     client = await self.db.client
                     
                     # Query last llm_response_end message from messages table (already stored there!)
@@ -457,9 +542,8 @@ class ThreadManager:
                                 logger.debug(f"✅ Auto-continue detected (count={auto_continue_state['count']}), skipping new message token count")
                             elif latest_user_message_content:
                                 # First turn: Use passed content (avoids DB query)
-                                new_msg_tokens = token_counter(
-                                    model=llm_model, 
-                                    messages=[{"role": "user", "content": latest_user_message_content}]
+                                new_msg_tokens = count_messages_tokens(
+                                    [{"role": "user", "content": latest_user_message_content}], llm_model
                                 )
                                 logger.debug(f"First turn: counting {new_msg_tokens} tokens from latest_user_message_content")
                             else:
@@ -481,9 +565,8 @@ class ThreadManager:
                                     else:
                                         new_msg_content = db_content
                                     if new_msg_content:
-                                        new_msg_tokens = token_counter(
-                                            model=llm_model, 
-                                            messages=[{"role": "user", "content": new_msg_content}]
+                                        new_msg_tokens = count_messages_tokens(
+                                            [{"role": "user", "content": new_msg_content}], llm_model
                                         )
                                         logger.debug(f"First turn (DB fallback): counting {new_msg_tokens} tokens from DB query")
                             
@@ -525,7 +608,12 @@ class ThreadManager:
             import time
             fetch_start = time.time()
             messages = await self.get_llm_messages(thread_id)
-            logger.info(f"⏱️ [TIMING] get_llm_messages(): {(time.time() - fetch_start) * 1000:.1f}ms ({len(messages)} messages)")
+            fetch_stats = self._last_message_fetch_stats
+            logger.info(
+                f"⏱️ [TIMING] get_llm_messages(): {(time.time() - fetch_start) * 1000:.1f}ms ({len(messages)} messages, "
+                f"cache {'hit' if fetch_stats.get('cache_hit') else 'miss'}, {fetch_stats.get('new_rows', 0)} new rows, "
+                f"{fetch_stats.get('bytes_saved', 0)} bytes saved)"
+            )
             
             # Note: We no longer need to manually append partial assistant messages
             # because we now save complete assistant messages with tool calls before auto-continuing
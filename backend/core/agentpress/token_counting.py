@@ -0,0 +1,243 @@
+"""
+Token counting for AgentPress.
+
+Local, offline token counting (LiteLLM's tokenizers) with per-message
+memoization keyed by a content digest:
+- L1: in-process LRU of digest -> token count
+- L2 (optional): Redis, shared across workers
+- Per-thread tallies that only re-tokenize new or changed messages
+
+Remote provider count APIs (Anthropic, Bedrock) are not on the hot path; they
+are used as an optional, off-loop calibration of the local counts (see
+ContextManager.count_tokens).
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from litellm.utils import token_counter
+from core.utils.logger import logger
+
+TOKEN_MEMO_MAX_ENTRIES = 50_000
+TOKEN_COUNT_REDIS_TTL = 7 * 24 * 3600  # Token counts for a digest never change
+TOKEN_TALLY_MAX_THREADS = 256
+
+# LiteLLM adds 3 tokens of reply priming to every token_counter(messages=...) call.
+# Per-message counts are memoized without it and it is added once per list.
+_REPLY_PRIMING_TOKENS = 3
+
+# Calibration ratios (remote / local) per model, from off-loop provider counts
+CALIBRATION_INTERVAL_SECONDS = 600
+_CALIBRATION_MIN_RATIO = 0.5
+_CALIBRATION_MAX_RATIO = 2.0
+
+_token_memo: "OrderedDict[str, int]" = OrderedDict()
+_token_memo_stats = {'hits': 0, 'misses': 0}
+_calibration: Dict[str, Tuple[float, float]] = {}  # model -> (ratio, calibrated_at)
+_thread_tallies: "OrderedDict[str, ThreadTokenTally]" = OrderedDict()
+
+
+def message_digest(message: Dict[str, Any], model: str) -> str:
+    """Stable content digest for a message (role, content, tool calls) under a model's tokenizer."""
+    payload = {k: message.get(k) for k in ('role', 'content', 'tool_calls', 'tool_call_id', 'name') if message.get(k) is not None}
+    content = payload.get('content')
+    if isinstance(content, str) and len(payload) <= 2:
+        raw = f"{model}\x00{payload.get('role', '')}\x00{content}"
+    else:
+        raw = f"{model}\x00{json.dumps(payload, sort_keys=True, default=str)}"
+    return hashlib.blake2b(raw.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+def _tokenize_message(message: Dict[str, Any], model: str) -> int:
+    """Count tokens for a single message locally (without reply priming)."""
+    try:
+        return max(0, token_counter(model=model, messages=[message]) - _REPLY_PRIMING_TOKENS)
+    except Exception as e:
+        logger.debug(f"Local token counting failed for {model}: {e}, using word estimate")
+        return int(len(str(message.get('content', '')).split()) * 1.3)
+
+
+def _memo_get(key: str) -> Optional[int]:
+    count = _token_memo.get(key)
+    if count is None:
+        _token_memo_stats['misses'] += 1
+        return None
+    _token_memo.move_to_end(key)
+    _token_memo_stats['hits'] += 1
+    return count
+
+
+def _memo_put(key: str, count: int) -> None:
+    _token_memo[key] = count
+    if len(_token_memo) > TOKEN_MEMO_MAX_ENTRIES:
+        _token_memo.popitem(last=False)
+
+
+def count_message_tokens(message: Dict[str, Any], model: str) -> int:
+    """Memoized local token count for one message (without reply priming)."""
+    key = message_digest(message, model)
+    count = _memo_get(key)
+    if count is None:
+        count = _tokenize_message(message, model)
+        _memo_put(key, count)
+    return count
+
+
+def count_messages_tokens(messages: List[Dict[str, Any]], model: str) -> int:
+    """Memoized local token count for a message list (matches token_counter(messages=...))."""
+    if not messages:
+        return 0
+    return sum(count_message_tokens(msg, model) for msg in messages if isinstance(msg, dict)) + _REPLY_PRIMING_TOKENS
+
+
+def count_text_tokens(text: str, model: str) -> int:
+    """Memoized local token count for plain text."""
+    if not text:
+        return 0
+    key = hashlib.blake2b(f"{model}\x00text\x00{text}".encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+    count = _memo_get(key)
+    if count is None:
+        try:
+            count = token_counter(model=model, text=text)
+        except Exception as e:
+            logger.debug(f"Local text token counting failed for {model}: {e}, using word estimate")
+            count = int(len(text.split()) * 1.3)
+        _memo_put(key, count)
+    return count
+
+
+async def count_messages_tokens_async(messages: List[Dict[str, Any]], model: str, use_redis: bool = True) -> int:
+    """
+    Like count_messages_tokens, with Redis as a shared second-level memo.
+    Misses in the local LRU are looked up with one MGET; newly tokenized
+    messages are written back in one pipeline.
+    """
+    if not messages:
+        return 0
+
+    dict_messages = [msg for msg in messages if isinstance(msg, dict)]
+    keys = [message_digest(msg, model) for msg in dict_messages]
+    counts: List[Optional[int]] = [_memo_get(key) for key in keys]
+    missing = [i for i, count in enumerate(counts) if count is None]
+
+    if missing and use_redis:
+        try:
+            from core.services import redis as redis_service
+            redis_client = await redis_service.get_client()
+            cached = await redis_client.mget([f"token_count:{keys[i]}" for i in missing])
+            still_missing = []
+            for i, value in zip(missing, cached):
+                if value is not None:
+                    counts[i] = int(value)
+                    _memo_put(keys[i], counts[i])
+                else:
+                    still_missing.append(i)
+            missing = still_missing
+        except Exception as e:
+            logger.debug(f"Redis token count lookup failed: {e}")
+            use_redis = False
+
+    for i in missing:
+        counts[i] = _tokenize_message(dict_messages[i], model)
+        _memo_put(keys[i], counts[i])
+
+    if missing and use_redis:
+        try:
+            from core.services import redis as redis_service
+            redis_client = await redis_service.get_client()
+            pipe = redis_client.pipeline()
+            for i in missing:
+                pipe.set(f"token_count:{keys[i]}", counts[i], ex=TOKEN_COUNT_REDIS_TTL)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Redis token count write-back failed: {e}")
+
+    return sum(counts) + _REPLY_PRIMING_TOKENS
+
+
+class ThreadTokenTally:
+    """
+    Running token total for a thread's message list.
+
+    Keeps message_id -> (digest, tokens); update() only tokenizes messages
+    that are new or whose content changed, and adjusts the total by the diff.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.total = 0
+        self._entries: Dict[str, Tuple[str, int]] = {}
+
+    def update(self, messages: List[Dict[str, Any]]) -> int:
+        seen = set()
+        anonymous_total = 0
+        for msg in messages:
+            if not isinstance(msg, dict):
+                continue
+            message_id = msg.get('message_id')
+            if not message_id:
+                anonymous_total += count_message_tokens(msg, self.model)
+                continue
+            seen.add(message_id)
+            digest = message_digest(msg, self.model)
+            previous = self._entries.get(message_id)
+            if previous and previous[0] == digest:
+                continue
+            tokens = _memo_get(digest)
+            if tokens is None:
+                tokens = _tokenize_message(msg, self.model)
+                _memo_put(digest, tokens)
+            self.total += tokens - (previous[1] if previous else 0)
+            self._entries[message_id] = (digest, tokens)
+
+        for message_id in [mid for mid in self._entries if mid not in seen]:
+            self.total -= self._entries.pop(message_id)[1]
+
+        return self.total + anonymous_total + (_REPLY_PRIMING_TOKENS if messages else 0)
+
+
+def get_thread_token_tally(thread_id: str, model: str) -> ThreadTokenTally:
+    """Get (or create) the running token tally for a thread and model."""
+    tally = _thread_tallies.get(thread_id)
+    if tally is None or tally.model != model:
+        tally = ThreadTokenTally(model)
+        _thread_tallies[thread_id] = tally
+    _thread_tallies.move_to_end(thread_id)
+    while len(_thread_tallies) > TOKEN_TALLY_MAX_THREADS:
+        _thread_tallies.popitem(last=False)
+    return tally
+
+
+def apply_calibration(model: str, local_count: int) -> int:
+    """Scale a local count by the model's remote/local calibration ratio, if any."""
+    calibration = _calibration.get(model)
+    if not calibration:
+        return local_count
+    return int(local_count * calibration[0])
+
+
+def needs_calibration(model: str) -> bool:
+    calibration = _calibration.get(model)
+    return calibration is None or time.time() - calibration[1] > CALIBRATION_INTERVAL_SECONDS
+
+
+def record_calibration(model: str, local_count: int, remote_count: int) -> None:
+    """Store a remote/local ratio for a model (clamped to a sane range)."""
+    if local_count <= 0 or remote_count <= 0:
+        return
+    ratio = min(_CALIBRATION_MAX_RATIO, max(_CALIBRATION_MIN_RATIO, remote_count / local_count))
+    _calibration[model] = (ratio, time.time())
+    logger.debug(f"Token count calibration for {model}: local={local_count}, remote={remote_count}, ratio={ratio:.3f}")
+
+
+def mark_calibration_attempt(model: str) -> None:
+    """Throttle calibration attempts for a model without changing its ratio."""
+    ratio = _calibration.get(model, (1.0, 0.0))[0]
+    _calibration[model] = (ratio, time.time())
+
+
+def get_token_memo_stats() -> Dict[str, int]:
+    return {**_token_memo_stats, 'size': len(_token_memo)}
@@ -5,10 +5,12 @@ This module defines the base classes and decorators for creating tools:
 - Tool base class for implementing tool functionality
 - Schema decorators for OpenAPI tool definitions
 - Metadata decorators for tool and method information
+- Execution hints used to schedule concurrent tool calls
+- Result cache policies for idempotent tool methods
 - Result containers for standardized tool outputs
 """
 
-from typing import Dict, Any, Union, Optional, List
+from typing import Dict, Any, Union, Optional, List, Callable
 from dataclasses import dataclass, field
 from abc import ABC
 import json
@@ -80,6 +82,47 @@ class MethodMetadata:
     is_core: bool = False
     visible: bool = True
 
+# A resource key is either a template formatted with the call arguments
+# (e.g. "file:{file_path}") or a callable mapping the arguments to a key.
+# Keys that cannot be built from the arguments are ignored.
+ResourceKey = Union[str, Callable[[Dict[str, Any]], Optional[str]]]
+
+# The sandbox workspace as a whole. Shell commands (and git) can touch any file, so they
+# write it; file tools read it next to their per-file keys, so they never overlap a running
+# command while calls on different files still run concurrently.
+WORKSPACE_RESOURCE = "workspace"
+
+@dataclass
+class ExecutionHints:
+    """Scheduling hints for a tool method.
+    
+    Attributes:
+        writes (List[ResourceKey]): Resources the call modifies; conflicts with any other call on them
+        reads (List[ResourceKey]): Resources the call only reads; conflicts only with writes to them
+        exclusive (bool): Whether the call must run alone (after earlier calls, before later ones)
+        timeout (Optional[float]): Per-call timeout in seconds (None = AGENT_TOOL_CALL_TIMEOUT_SECONDS)
+        timeout_arg (Optional[str]): Argument carrying the tool's own timeout; when given, the call
+            may run that long plus a grace period
+    """
+    writes: List[ResourceKey] = field(default_factory=list)
+    reads: List[ResourceKey] = field(default_factory=list)
+    exclusive: bool = False
+    timeout: Optional[float] = None
+    timeout_arg: Optional[str] = None
+
+@dataclass
+class ResultCachePolicy:
+    """Result caching for an idempotent tool method.
+    
+    Attributes:
+        ttl_seconds (int): How long a successful result is reused
+        scope (str): Who shares entries: "global" (everyone), "account" or "project"
+        max_bytes (Optional[int]): Largest result cached (None = AGENT_TOOL_RESULT_CACHE_MAX_ENTRY_BYTES)
+    """
+    ttl_seconds: int
+    scope: str = "account"
+    max_bytes: Optional[int] = None
+
 class Tool(ABC):
     """Abstract base class for all tools.
     
@@ -90,20 +133,30 @@ class Tool(ABC):
         _schemas (Dict[str, List[ToolSchema]]): Registered schemas for tool methods
         _metadata (Optional[ToolMetadata]): Tool-level metadata
         _method_metadata (Dict[str, MethodMetadata]): Method-level metadata
+        _execution_hints (Dict[str, ExecutionHints]): Method-level scheduling hints
+        _result_cache_policies (Dict[str, ResultCachePolicy]): Methods whose results may be cached
+        max_concurrency (Optional[int]): Calls of this tool class that may run at once
+            within a turn (None = AGENT_TOOL_CLASS_CONCURRENCY)
         
     Methods:
         get_schemas: Get all registered tool schemas
         get_metadata: Get tool metadata
         get_method_metadata: Get metadata for all methods
+        get_execution_hints: Get scheduling hints for all methods
+        get_result_cache_policies: Get result cache policies for cacheable methods
         success_response: Create a successful result
         fail_response: Create a failed result
     """
     
+    max_concurrency: Optional[int] = None
+    
     def __init__(self):
         """Initialize tool with empty schema registry."""
         self._schemas: Dict[str, List[ToolSchema]] = {}
         self._metadata: Optional[ToolMetadata] = None
         self._method_metadata: Dict[str, MethodMetadata] = {}
+        self._execution_hints: Dict[str, ExecutionHints] = {}
+        self._result_cache_policies: Dict[str, ResultCachePolicy] = {}
         # logger.debug(f"Initializing tool class: {self.__class__.__name__}")
         self._register_metadata()
         self._register_schemas()
@@ -118,6 +171,10 @@ class Tool(ABC):
         for name, method in inspect.getmembers(self, predicate=inspect.ismethod):
             if hasattr(method, '__method_metadata__'):
                 self._method_metadata[name] = method.__method_metadata__
+            if hasattr(method, '__execution_hints__'):
+                self._execution_hints[name] = method.__execution_hints__
+            if hasattr(method, '__result_cache__'):
+                self._result_cache_policies[name] = method.__result_cache__
 
     def _register_schemas(self):
         """Register schemas from all decorated methods."""
@@ -150,6 +207,22 @@ class Tool(ABC):
         """
         return self._method_metadata
 
+    def get_execution_hints(self) -> Dict[str, ExecutionHints]:
+        """Get scheduling hints for all methods.
+        
+        Returns:
+            Dict mapping method names to their execution hints
+        """
+        return self._execution_hints
+
+    def get_result_cache_policies(self) -> Dict[str, ResultCachePolicy]:
+        """Get result cache policies for cacheable methods.
+        
+        Returns:
+            Dict mapping method names to their cache policies
+        """
+        return self._result_cache_policies
+
     def success_response(self, data: Union[Dict[str, Any], str, list]) -> ToolResult:
         """Create a successful tool result.
         
@@ -298,3 +371,74 @@ def method_metadata(
         return func
     return decorator
 
+
+def execution_hints(
+    writes: Optional[List[ResourceKey]] = None,
+    reads: Optional[List[ResourceKey]] = None,
+    exclusive: bool = False,
+    timeout: Optional[float] = None,
+    timeout_arg: Optional[str] = None
+):
+    """Decorator to declare how a tool method may be scheduled alongside other calls.
+    
+    Calls in the same turn run concurrently unless they conflict: a call that
+    writes a resource waits for earlier calls that read or write it, a call
+    that reads a resource waits for earlier writes to it, and exclusive calls
+    wait for (and hold back) everything. Methods without hints conflict with
+    nothing.
+    
+    Args:
+        writes: Resource keys the call modifies (templates like "file:{file_path}" or callables)
+        reads: Resource keys the call only reads
+        exclusive: Whether the call must run alone
+        timeout: Per-call timeout in seconds (default AGENT_TOOL_CALL_TIMEOUT_SECONDS)
+        timeout_arg: Argument carrying the tool's own timeout in seconds
+    
+    Usage:
+        @execution_hints(writes=["file:{file_path}"])
+        @openapi_schema({...})
+        async def str_replace(self, file_path: str, ...):
+            ...
+    """
+    def decorator(func):
+        func.__execution_hints__ = ExecutionHints(
+            writes=list(writes or []),
+            reads=list(reads or []),
+            exclusive=exclusive,
+            timeout=timeout,
+            timeout_arg=timeout_arg
+        )
+        return func
+    return decorator
+
+def result_cache(ttl_seconds: int, scope: str = "account", max_bytes: Optional[int] = None):
+    """Decorator to mark a tool method as idempotent so its results can be reused.
+    
+    Successful results are cached in Redis under the function name and its
+    normalized arguments (see core.agentpress.tool_result_cache). Only use it
+    for methods whose output depends on nothing but their arguments and that
+    have no side effects the caller relies on.
+    
+    Args:
+        ttl_seconds: How long a result is reused
+        scope: "global" to share results between all accounts, "account" to share
+               them within an account, "project" when the result refers to
+               project state (e.g. files written to the sandbox)
+        max_bytes: Largest result to cache (default AGENT_TOOL_RESULT_CACHE_MAX_ENTRY_BYTES)
+    
+    Usage:
+        @result_cache(ttl_seconds=3600, scope="global")
+        @openapi_schema({...})
+        async def web_search(self, query: str, ...):
+            ...
+    """
+    if scope not in ("global", "account", "project"):
+        raise ValueError(f"Unknown result cache scope: {scope}")
+    def decorator(func):
+        func.__result_cache__ = ResultCachePolicy(
+            ttl_seconds=ttl_seconds,
+            scope=scope,
+            max_bytes=max_bytes
+        )
+        return func
+    return decorator
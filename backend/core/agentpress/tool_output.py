@@ -0,0 +1,48 @@
+"""
+Partial tool output forwarding.
+
+Long-running tools (e.g. shell commands) can push output into the agent run
+stream while they are still executing. The worker installs a sink for the
+run (a context variable, inherited by the tasks tools run in); without one,
+emit_tool_output() is a no-op.
+
+Frames are status messages with status_type "tool_output", which clients
+that do not know them ignore. They are stream-only and never saved to the
+thread.
+"""
+
+import json
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+ToolOutputSink = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_tool_output_sink: ContextVar[Optional[ToolOutputSink]] = ContextVar("tool_output_sink", default=None)
+
+
+def set_tool_output_sink(sink: Optional[ToolOutputSink]) -> Token:
+    return _tool_output_sink.set(sink)
+
+
+def reset_tool_output_sink(token: Token) -> None:
+    _tool_output_sink.reset(token)
+
+
+def has_tool_output_sink() -> bool:
+    return _tool_output_sink.get() is not None
+
+
+async def emit_tool_output(tool_name: str, text: str, stream: str = "stdout", **details: Any) -> None:
+    """Forward a piece of partial tool output to the current agent run stream, if any."""
+    sink = _tool_output_sink.get()
+    if sink is None or not text:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    await sink({
+        "message_id": None, "type": "status",
+        "is_llm_message": False,
+        "content": json.dumps({"status_type": "tool_output", "tool_name": tool_name, "stream": stream, "text": text, **details}),
+        "metadata": json.dumps({}),
+        "created_at": now, "updated_at": now,
+    })
@@ -0,0 +1,278 @@
+"""
+Content-addressed cache for the results of idempotent tool calls.
+
+Tool methods opt in with @result_cache(ttl_seconds, scope) (see
+core.agentpress.tool); ResponseProcessor._execute_tool then serves repeated
+calls from Redis instead of paying for the external API again:
+
+- tool_result:{function}:{scope}:{scope_id}:{digest}        JSON ToolResult, policy TTL
+- tool_result:{function}:{scope}:{scope_id}:{digest}:lock   single-flight lock
+- tool_result:stats                                          per-function counters (hash)
+
+The digest is a SHA-256 of the function name and its normalized arguments
+(sorted keys, None values dropped, whitespace collapsed, JSON-encoded strings
+decoded), so trivially different spellings of one call share an entry. The
+scope decides who shares it: everyone ("global"), one account or one project.
+
+Identical calls in flight at the same time run once: callers in the same
+process await the first one, callers in other processes wait on its Redis lock
+and read the result it stores. Only successful results no larger than the
+size cap are stored. Redis errors never fail a call - it just runs uncached.
+"""
+
+import asyncio
+import hashlib
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.agentpress.tool import ResultCachePolicy, ToolResult
+from core.utils.config import config
+from core.utils.logger import logger
+
+_KEY_PREFIX = "tool_result"
+_STATS_KEY = f"{_KEY_PREFIX}:stats"
+
+SINGLE_FLIGHT_LOCK_SECONDS = 120  # Lock lifetime; a crashed owner blocks others at most this long
+SINGLE_FLIGHT_WAIT_SECONDS = 60  # How long other processes wait for the owner's result
+SINGLE_FLIGHT_POLL_SECONDS = 0.25
+
+# Releases the lock only if it still holds our token
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_in_flight: Dict[str, asyncio.Future] = {}
+_errors = 0
+
+
+def normalize_arguments(arguments: Any) -> Any:
+    """Canonical form of tool call arguments for hashing."""
+    if isinstance(arguments, dict):
+        return {
+            str(key): normalize_arguments(value)
+            for key, value in sorted(arguments.items(), key=lambda item: str(item[0]))
+            if value is not None
+        }
+    if isinstance(arguments, (list, tuple)):
+        return [normalize_arguments(value) for value in arguments]
+    if isinstance(arguments, str):
+        stripped = arguments.strip()
+        if stripped[:1] in ("[", "{"):
+            # Some models send arrays/objects as JSON strings
+            try:
+                return normalize_arguments(json.loads(stripped))
+            except ValueError:
+                pass
+        return " ".join(stripped.split())
+    return arguments
+
+
+def cache_key(function_name: str, arguments: Any, policy: ResultCachePolicy, scope_id: Optional[str]) -> str:
+    canonical = json.dumps(
+        {"function": function_name, "arguments": normalize_arguments(arguments)},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    digest = hashlib.sha256(canonical.encode()).hexdigest()
+    return f"{_KEY_PREFIX}:{function_name}:{policy.scope}:{scope_id or '-'}:{digest}"
+
+
+async def _client():
+    from core.services import redis
+    return await redis.get_client()
+
+
+def _note_error(action: str, error: Exception) -> None:
+    global _errors
+    _errors += 1
+    logger.debug(f"Tool result cache {action} failed: {error}")
+
+
+async def _count(function_name: str, event: str) -> None:
+    try:
+        client = await _client()
+        await client.hincrby(_STATS_KEY, f"{function_name}:{event}", 1)
+    except Exception as e:
+        _note_error("stats update", e)
+
+
+async def _load(key: str) -> Optional[ToolResult]:
+    try:
+        client = await _client()
+        cached = await client.get(key)
+    except Exception as e:
+        _note_error("lookup", e)
+        return None
+    if not cached:
+        return None
+    try:
+        entry = json.loads(cached)
+        return ToolResult(success=entry["success"], output=entry["output"])
+    except (ValueError, KeyError, TypeError) as e:
+        _note_error("decode", e)
+        return None
+
+
+async def _store(key: str, function_name: str, result: ToolResult, policy: ResultCachePolicy) -> None:
+    try:
+        encoded = json.dumps({"success": result.success, "output": result.output})
+    except (TypeError, ValueError):
+        await _count(function_name, "unserializable")
+        return
+    max_bytes = policy.max_bytes or config.AGENT_TOOL_RESULT_CACHE_MAX_ENTRY_BYTES
+    if max_bytes and len(encoded.encode()) > max_bytes:
+        await _count(function_name, "too_large")
+        return
+    try:
+        client = await _client()
+        pipe = client.pipeline(transaction=False)
+        pipe.set(key, encoded, ex=policy.ttl_seconds)
+        pipe.hincrby(_STATS_KEY, f"{function_name}:stores", 1)
+        await pipe.execute()
+    except Exception as e:
+        _note_error("store", e)
+
+
+async def _acquire_lock(key: str, token: str) -> bool:
+    try:
+        client = await _client()
+        return bool(await client.set(f"{key}:lock", token, nx=True, ex=SINGLE_FLIGHT_LOCK_SECONDS))
+    except Exception as e:
+        _note_error("lock", e)
+        return True
+
+
+async def _release_lock(key: str, token: str) -> None:
+    try:
+        client = await _client()
+        await client.eval(_RELEASE_SCRIPT, 1, f"{key}:lock", token)
+    except Exception as e:
+        _note_error("unlock", e)
+
+
+async def _wait_for_owner(key: str) -> Optional[ToolResult]:
+    """Poll for the result another process is producing; None if it doesn't show up."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SINGLE_FLIGHT_WAIT_SECONDS
+    while loop.time() < deadline:
+        await asyncio.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+        cached = await _load(key)
+        if cached is not None:
+            return cached
+        try:
+            client = await _client()
+            if not await client.exists(f"{key}:lock"):
+                # Owner finished without storing (failed or too large) - run it ourselves
+                return None
+        except Exception as e:
+            _note_error("lock check", e)
+            return None
+    return None
+
+
+async def _lookup_or_execute(
+    key: str,
+    function_name: str,
+    policy: ResultCachePolicy,
+    execute: Callable[[], Awaitable[ToolResult]],
+) -> ToolResult:
+    cached = await _load(key)
+    if cached is not None:
+        await _count(function_name, "hits")
+        return cached
+
+    token = uuid.uuid4().hex
+    acquired = await _acquire_lock(key, token)
+    if not acquired:
+        cached = await _wait_for_owner(key)
+        if cached is not None:
+            await _count(function_name, "coalesced")
+            return cached
+
+    await _count(function_name, "misses")
+    try:
+        result = await execute()
+        if isinstance(result, ToolResult) and result.success:
+            await _store(key, function_name, result, policy)
+        return result
+    finally:
+        if acquired:
+            await _release_lock(key, token)
+
+
+async def get_or_execute(
+    function_name: str,
+    arguments: Any,
+    policy: ResultCachePolicy,
+    scope_id: Optional[str],
+    execute: Callable[[], Awaitable[ToolResult]],
+) -> ToolResult:
+    """
+    Return the cached result of an identical earlier call, or run `execute` and cache it.
+
+    Args:
+        function_name: Tool function being called
+        arguments: Its arguments
+        policy: The method's ResultCachePolicy
+        scope_id: Account or project ID for non-global scopes (no caching without it)
+        execute: Runs the tool call when there is no usable cached result
+    """
+    if not config.AGENT_TOOL_RESULT_CACHE or (policy.scope != "global" and not scope_id):
+        return await execute()
+
+    key = cache_key(function_name, arguments, policy, scope_id)
+    leader = _in_flight.get(key)
+    if leader is not None:
+        result = await asyncio.shield(leader)
+        if result is None:
+            # The first call failed or was cancelled; don't inherit that
+            return await execute()
+        await _count(function_name, "coalesced")
+        return ToolResult(success=result.success, output=result.output)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        result = await _lookup_or_execute(key, function_name, policy, execute)
+        future.set_result(result if isinstance(result, ToolResult) else None)
+        return result
+    finally:
+        if not future.done():
+            future.set_result(None)
+        _in_flight.pop(key, None)
+
+
+async def get_tool_result_cache_stats() -> Dict[str, Any]:
+    """Hit rates per cacheable function, across all workers."""
+    functions: Dict[str, Dict[str, int]] = {}
+    try:
+        client = await _client()
+        counters = await client.hgetall(_STATS_KEY)
+    except Exception as e:
+        _note_error("stats read", e)
+        counters = {}
+    for field, value in counters.items():
+        if isinstance(field, bytes):
+            field = field.decode()
+        function_name, _, event = field.rpartition(":")
+        functions.setdefault(function_name, {})[event] = int(value)
+
+    totals = {"hits": 0, "coalesced": 0, "misses": 0, "stores": 0}
+    for counts in functions.values():
+        served = counts.get("hits", 0) + counts.get("coalesced", 0)
+        lookups = served + counts.get("misses", 0)
+        counts["hit_rate"] = round(served / lookups, 3) if lookups else None
+        for event in totals:
+            totals[event] += counts.get(event, 0)
+    served = totals["hits"] + totals["coalesced"]
+    lookups = served + totals["misses"]
+    return {
+        "enabled": bool(config.AGENT_TOOL_RESULT_CACHE),
+        "hit_rate": round(served / lookups, 3) if lookups else None,
+        **totals,
+        "process_errors": _errors,
+        "functions": functions,
+    }
@@ -0,0 +1,191 @@
+"""
+Conflict-aware scheduling of the tool calls of one turn.
+
+Each submitted call gets a footprint from its tool's ExecutionHints (see
+core.agentpress.tool.execution_hints): the resource keys it writes and reads,
+whether it is exclusive, and its timeout. A call waits only for earlier calls
+it conflicts with, so the submission order forms a dependency DAG:
+
+- write/write and write/read on the same key conflict (two edits of one file,
+  two commands in one tmux session)
+- read/read does not (two reads of one file)
+- shell commands write the whole workspace (WORKSPACE_RESOURCE) and file tools
+  read it, so a command never overlaps a file edit; edits of different files do
+- an exclusive call (ask, complete) conflicts with every other call
+
+Calls that may run then also take a per-tool-class semaphore and run under a
+per-call timeout. Every call is its own task, so callers can consume results
+in completion order (iter_completed) instead of waiting for the slowest call.
+"""
+
+import asyncio
+import posixpath
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from core.agentpress.tool import ExecutionHints, ResourceKey, ToolResult
+from core.agentpress.tool_registry import ToolRegistry
+from core.utils.config import config
+from core.utils.logger import logger
+
+TIMEOUT_GRACE_SECONDS = 30  # Added to a tool's own timeout argument (ExecutionHints.timeout_arg)
+WORKSPACE_PREFIX = "/workspace/"
+
+
+@dataclass(frozen=True)
+class CallFootprint:
+    """What a tool call touches, resolved from its hints and arguments."""
+    tool_class: str
+    writes: FrozenSet[str] = frozenset()
+    reads: FrozenSet[str] = frozenset()
+    exclusive: bool = False
+    timeout: Optional[float] = None
+    max_concurrency: Optional[int] = None
+
+    def conflicts_with(self, other: "CallFootprint") -> bool:
+        if self.exclusive or other.exclusive:
+            return True
+        return bool(self.writes & (other.writes | other.reads) or other.writes & self.reads)
+
+
+class _KeyArguments(dict):
+    """Call arguments for key templates: missing/empty values fail, paths are normalized."""
+
+    def __missing__(self, key):
+        raise KeyError(key)
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if value is None or value == "":
+            raise KeyError(key)
+        if isinstance(value, str):
+            value = value.strip()
+            if value.startswith(WORKSPACE_PREFIX):
+                value = value[len(WORKSPACE_PREFIX):]
+            if "/" in value or value.startswith("."):
+                value = posixpath.normpath(value)
+        return value
+
+
+def _resolve_key(key: ResourceKey, arguments: Dict[str, Any]) -> Optional[str]:
+    try:
+        if callable(key):
+            return key(arguments)
+        return key.format_map(_KeyArguments(arguments))
+    except (KeyError, IndexError, ValueError, AttributeError, TypeError):
+        return None
+
+
+class ToolScheduler:
+    """
+    Runs tool calls as soon as the calls they conflict with have finished.
+
+    One scheduler covers one turn (or one batch of calls): conflicts are only
+    tracked between calls submitted to the same scheduler, in submission order.
+
+    Usage:
+        scheduler = ToolScheduler(tool_registry, self._execute_tool)
+        tasks = [scheduler.submit(tool_call) for tool_call in tool_calls]
+        async for index in iter_completed(tasks):
+            result = tasks[index].result()
+    """
+
+    def __init__(
+        self,
+        tool_registry: ToolRegistry,
+        execute: Callable[[Dict[str, Any]], Awaitable[ToolResult]],
+        sequential: bool = False,
+    ):
+        """
+        Args:
+            tool_registry: Registry used to look up each call's tool and hints
+            execute: Coroutine function running a single tool call
+            sequential: Treat every call as exclusive (one at a time, in order)
+        """
+        self.tool_registry = tool_registry
+        self._execute = execute
+        self.sequential = sequential
+        self._submitted: List[Tuple[CallFootprint, asyncio.Task]] = []
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.metrics = {"submitted": 0, "waited": 0, "timed_out": 0}
+
+    def footprint(self, tool_call: Dict[str, Any]) -> CallFootprint:
+        function_name = tool_call.get("function_name", "unknown")
+        arguments = tool_call.get("arguments")
+        if not isinstance(arguments, dict):
+            arguments = {}
+
+        tool_info = self.tool_registry.tools.get(function_name)
+        if tool_info is None and "execute_mcp_tool" in self.tool_registry.tools:
+            # Unregistered MCP tools are redirected through execute_mcp_tool by _execute_tool
+            tool_info = self.tool_registry.tools["execute_mcp_tool"]
+            arguments = {"tool_name": function_name, "args": arguments}
+            function_name = "execute_mcp_tool"
+
+        instance = tool_info["instance"] if tool_info else None
+        hints: Optional[ExecutionHints] = None
+        if instance is not None and hasattr(instance, "get_execution_hints"):
+            hints = instance.get_execution_hints().get(function_name)
+        hints = hints or ExecutionHints()
+
+        timeout = hints.timeout if hints.timeout is not None else config.AGENT_TOOL_CALL_TIMEOUT_SECONDS
+        if hints.timeout_arg and arguments.get(hints.timeout_arg) is not None:
+            try:
+                timeout = max(timeout or 0, float(arguments[hints.timeout_arg]) + TIMEOUT_GRACE_SECONDS)
+            except (TypeError, ValueError):
+                pass
+
+        return CallFootprint(
+            tool_class=instance.__class__.__name__ if instance is not None else function_name,
+            writes=frozenset(k for k in (_resolve_key(key, arguments) for key in hints.writes) if k),
+            reads=frozenset(k for k in (_resolve_key(key, arguments) for key in hints.reads) if k),
+            exclusive=hints.exclusive or self.sequential,
+            timeout=timeout or None,
+            max_concurrency=getattr(instance, "max_concurrency", None),
+        )
+
+    def submit(self, tool_call: Dict[str, Any]) -> asyncio.Task:
+        """Schedule a tool call; the task resolves to its ToolResult."""
+        footprint = self.footprint(tool_call)
+        blockers = [
+            task for earlier, task in self._submitted
+            if not task.done() and earlier.conflicts_with(footprint)
+        ]
+        task = asyncio.create_task(self._run(tool_call, footprint, blockers))
+        self._submitted.append((footprint, task))
+        self.metrics["submitted"] += 1
+        return task
+
+    def _semaphore(self, footprint: CallFootprint) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(footprint.tool_class)
+        if semaphore is None:
+            limit = footprint.max_concurrency or config.AGENT_TOOL_CLASS_CONCURRENCY or 1
+            semaphore = asyncio.Semaphore(max(1, limit))
+            self._semaphores[footprint.tool_class] = semaphore
+        return semaphore
+
+    async def _run(self, tool_call: Dict[str, Any], footprint: CallFootprint, blockers: List[asyncio.Task]) -> ToolResult:
+        function_name = tool_call.get("function_name", "unknown")
+        if blockers:
+            self.metrics["waited"] += 1
+            logger.debug(f"⏳ {function_name} waits for {len(blockers)} conflicting tool call(s)")
+            await asyncio.wait(blockers)
+
+        async with self._semaphore(footprint):
+            if not footprint.timeout:
+                return await self._execute(tool_call)
+            try:
+                return await asyncio.wait_for(self._execute(tool_call), timeout=footprint.timeout)
+            except asyncio.TimeoutError:
+                self.metrics["timed_out"] += 1
+                logger.warning(f"⏱️ Tool {function_name} timed out after {footprint.timeout:g}s")
+                return ToolResult(success=False, output=f"Tool '{function_name}' timed out after {footprint.timeout:g} seconds")
+
+
+async def iter_completed(tasks: List[asyncio.Task]) -> AsyncIterator[int]:
+    """Yield the indices of `tasks` as they finish (submission order among ties)."""
+    pending = {task: index for index, task in enumerate(tasks)}
+    while pending:
+        done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+        for index in sorted(pending.pop(task) for task in done):
+            yield index
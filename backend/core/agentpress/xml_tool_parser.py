@@ -7,7 +7,7 @@ the XML format with structured function_calls blocks.
 
 import re
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import json
 import logging
@@ -21,6 +21,7 @@ class XMLToolCall:
     function_name: str
     parameters: Dict[str, Any]
     raw_xml: str
+    block_index: int = 0  # Which <function_calls> block of the stream it belongs to (streaming parser)
 
 
 # Regex patterns for extracting XML blocks
@@ -188,6 +189,230 @@ def extract_xml_chunks(content: str) -> List[str]:
     return chunks
 
 
+class StreamingXMLToolCallParser:
+    """
+    Incremental parser for XML tool calls arriving in streamed chunks.
+
+    Keeps a cursor into a buffer of not-yet-consumed text and a small state
+    machine over <function_calls>/<invoke>/<parameter>, so each call to
+    feed() only scans the newly arrived text (plus a tag-sized overlap).
+    A tool call is emitted as soon as its closing </invoke> arrives; complete
+    <function_calls> blocks are collected for final reconciliation.
+    """
+
+    _OUTSIDE = 0
+    _IN_BLOCK = 1
+    _IN_INVOKE = 2
+    _IN_PARAMETER = 3
+
+    _BLOCK_OPEN = '<function_calls>'
+    _BLOCK_CLOSE = '</function_calls>'
+    _INVOKE_OPEN = '<invoke'
+    _INVOKE_CLOSE = '</invoke>'
+    _PARAMETER_OPEN = '<parameter'
+    _PARAMETER_CLOSE = '</parameter>'
+
+    _INVOKE_TAG_PATTERN = re.compile(r'<invoke\s+name=["\']([^"\']+)["\']>', re.IGNORECASE)
+    _PARAMETER_TAG_PATTERN = re.compile(r'<parameter\s+name=["\']([^"\']+)["\']>', re.IGNORECASE)
+
+    def __init__(self):
+        self._buffer = ""
+        self._cursor = 0
+        self._state = self._OUTSIDE
+        self._block_start = 0
+        self._invoke_start = 0
+        self._invoke_name = ""
+        self._invoke_parameters: Dict[str, Any] = {}
+        self._parameter_name = ""
+        self._parameter_start = 0
+        self._completed_blocks: List[str] = []
+        self._blocks_completed = 0
+
+    @property
+    def blocks_completed(self) -> int:
+        """Number of <function_calls> blocks closed so far.
+
+        A call with block_index < blocks_completed belongs to a closed block;
+        otherwise its block is still open (the model may yet abandon it).
+        """
+        return self._blocks_completed
+
+    @property
+    def pending_content(self) -> str:
+        """Text received but not yet consumed by a complete <function_calls> block."""
+        if self._state == self._OUTSIDE:
+            return self._buffer
+        return self._buffer[self._block_start:]
+
+    def pop_completed_blocks(self) -> List[str]:
+        """Return and clear the complete <function_calls> blocks seen so far."""
+        blocks = self._completed_blocks
+        self._completed_blocks = []
+        return blocks
+
+    def feed(self, chunk: str) -> List[XMLToolCall]:
+        """
+        Consume a streamed chunk and return tool calls completed by it.
+
+        Args:
+            chunk: Newly streamed text
+
+        Returns:
+            List of XMLToolCall objects whose closing </invoke> arrived in this chunk
+        """
+        if not chunk:
+            return []
+        # Detach before appending so CPython can grow the string in place
+        buffer, self._buffer = self._buffer, ""
+        buffer += chunk
+        self._buffer = buffer
+        completed: List[XMLToolCall] = []
+
+        try:
+            while self._step(completed):
+                pass
+        except Exception as e:
+            logger.error(f"Error in streaming XML parser: {e}")
+
+        self._compact()
+        return completed
+
+    def _find(self, tag: str) -> int:
+        return self._buffer.find(tag, self._cursor)
+
+    def _hold_back(self, tag: str) -> None:
+        # Nothing found: next scan only needs to revisit a possible partial tag
+        self._cursor = max(self._cursor, len(self._buffer) - len(tag) + 1)
+
+    def _read_open_tag(self, start: int, pattern: re.Pattern) -> Optional[Tuple[str, int]]:
+        """Return (name, end) for an open tag at start, None if incomplete, ('', end) if malformed."""
+        end = self._buffer.find('>', start)
+        if end == -1:
+            return None
+        match = pattern.match(self._buffer, start, end + 1)
+        return (match.group(1) if match else "", end + 1)
+
+    def _step(self, completed: List[XMLToolCall]) -> bool:
+        """Advance the state machine once. Returns False when more input is needed."""
+        if self._state == self._OUTSIDE:
+            pos = self._find(self._BLOCK_OPEN)
+            if pos == -1:
+                self._hold_back(self._BLOCK_OPEN)
+                return False
+            self._block_start = pos
+            self._cursor = pos + len(self._BLOCK_OPEN)
+            self._state = self._IN_BLOCK
+            return True
+
+        if self._state == self._IN_BLOCK:
+            close_pos = self._find(self._BLOCK_CLOSE)
+            invoke_pos = self._find(self._INVOKE_OPEN)
+            if invoke_pos != -1 and (close_pos == -1 or invoke_pos < close_pos):
+                tag = self._read_open_tag(invoke_pos, self._INVOKE_TAG_PATTERN)
+                if tag is None:
+                    self._cursor = invoke_pos
+                    return False
+                name, tag_end = tag
+                self._cursor = tag_end
+                if name:
+                    self._invoke_start = invoke_pos
+                    self._invoke_name = name
+                    self._invoke_parameters = {}
+                    self._state = self._IN_INVOKE
+                return True
+            if close_pos != -1:
+                block_end = close_pos + len(self._BLOCK_CLOSE)
+                self._completed_blocks.append(self._buffer[self._block_start:block_end])
+                self._blocks_completed += 1
+                self._cursor = block_end
+                self._state = self._OUTSIDE
+                return True
+            self._hold_back(self._BLOCK_CLOSE)
+            return False
+
+        if self._state == self._IN_INVOKE:
+            close_pos = self._find(self._INVOKE_CLOSE)
+            param_pos = self._find(self._PARAMETER_OPEN)
+            if param_pos != -1 and (close_pos == -1 or param_pos < close_pos):
+                tag = self._read_open_tag(param_pos, self._PARAMETER_TAG_PATTERN)
+                if tag is None:
+                    self._cursor = param_pos
+                    return False
+                name, tag_end = tag
+                self._cursor = tag_end
+                if name:
+                    self._parameter_name = name
+                    self._parameter_start = tag_end
+                    self._state = self._IN_PARAMETER
+                return True
+            if close_pos != -1:
+                invoke_end = close_pos + len(self._INVOKE_CLOSE)
+                completed.append(XMLToolCall(
+                    function_name=self._invoke_name,
+                    parameters=self._invoke_parameters,
+                    raw_xml=self._buffer[self._invoke_start:invoke_end],
+                    block_index=self._blocks_completed
+                ))
+                self._cursor = invoke_end
+                self._state = self._IN_BLOCK
+                return True
+            self._hold_back(self._PARAMETER_OPEN)
+            return False
+
+        # _IN_PARAMETER
+        close_pos = self._find(self._PARAMETER_CLOSE)
+        if close_pos == -1:
+            self._hold_back(self._PARAMETER_CLOSE)
+            return False
+        value = self._buffer[self._parameter_start:close_pos]
+        self._invoke_parameters[self._parameter_name] = _parse_parameter_value(value)
+        self._cursor = close_pos + len(self._PARAMETER_CLOSE)
+        self._state = self._IN_INVOKE
+        return True
+
+    def _compact(self) -> None:
+        """Drop consumed text so the buffer only holds the open block (or a tag-sized tail)."""
+        keep_from = self._block_start if self._state != self._OUTSIDE else self._cursor
+        if keep_from <= 0:
+            return
+        self._buffer = self._buffer[keep_from:]
+        self._cursor -= keep_from
+        self._invoke_start -= keep_from
+        self._parameter_start -= keep_from
+        self._block_start = 0
+
+
+def xml_tool_call_to_dict(
+    xml_tool_call: XMLToolCall,
+    assistant_message_id: Optional[str] = None,
+    tool_index: int = 0
+) -> Dict[str, Any]:
+    """
+    Convert an XMLToolCall into the tool call dict format with a generated ID.
+
+    Args:
+        xml_tool_call: Parsed XML tool call
+        assistant_message_id: ID of the assistant message (for tool_call_id generation)
+        tool_index: Index of this XML tool call (for tool_call_id generation)
+
+    Returns:
+        Tool call dictionary with 'function_name', 'arguments', 'id', 'source'
+    """
+    # Generate tool_call_id in format: xml_tool_index{id}_AssistantMessageId
+    if assistant_message_id:
+        tool_call_id = f"xml_tool_index{tool_index}_{assistant_message_id}"
+    else:
+        # Fallback if no assistant_message_id yet
+        tool_call_id = f"xml_tool_index{tool_index}_{str(uuid.uuid4())}"
+
+    return {
+        "function_name": xml_tool_call.function_name,
+        "id": tool_call_id,
+        "arguments": xml_tool_call.parameters,
+        "source": "xml"  # Mark as XML tool call for detection
+    }
+
+
 def parse_xml_tool_calls_with_ids(
     xml_chunk: str, 
     assistant_message_id: Optional[str] = None, 
@@ -217,22 +442,9 @@ def parse_xml_tool_calls_with_ids(
             
             # Process ALL tool calls found in the chunk
             for idx, xml_tool_call in enumerate(parsed_calls):
-                # Generate tool_call_id in format: xml_tool_index{id}_AssistantMessageId
-                tool_index = start_index + idx
-                if assistant_message_id:
-                    tool_call_id = f"xml_tool_index{tool_index}_{assistant_message_id}"
-                else:
-                    # Fallback if no assistant_message_id yet
-                    tool_call_id = f"xml_tool_index{tool_index}_{str(uuid.uuid4())}"
-                
-                tool_call = {
-                    "function_name": xml_tool_call.function_name,
-                    "id": tool_call_id,
-                    "arguments": xml_tool_call.parameters,
-                    "source": "xml"  # Mark as XML tool call for detection
-                }
+                tool_call = xml_tool_call_to_dict(xml_tool_call, assistant_message_id, start_index + idx)
                 
-                logger.debug(f"Parsed tool call from chunk: {tool_call['function_name']} (id: {tool_call_id})")
+                logger.debug(f"Parsed tool call from chunk: {tool_call['function_name']} (id: {tool_call['id']})")
                 results.append(tool_call)
             
             logger.debug(f"Parsed {len(results)} tool call(s) from XML chunk")
@@ -31,6 +31,10 @@ async def cleanup():
     """Clean up resources on shutdown."""
     logger.debug("Starting cleanup of agent API resources")
 
+    # Close pooled MCP sessions
+    from core.mcp_module import mcp_session_pool
+    await mcp_session_pool.close()
+
     # Close Redis connection
     await redis.close()
     logger.debug("Completed cleanup of agent API resources")
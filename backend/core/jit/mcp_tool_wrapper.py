@@ -27,8 +27,7 @@ class MCPToolExecutor:
     async def _execute_composio_tool(self, tool_name: str, args: Dict[str, Any]) -> Any:
         from core.composio_integration.composio_profile_service import ComposioProfileService
         from core.services.supabase import DBConnection
-        from mcp.client.streamable_http import streamablehttp_client
-        from mcp import ClientSession
+        from core.mcp_module import mcp_session_pool
         from core.agentpress.tool import ToolResult
         
         custom_config = self.tool_info['custom_config']
@@ -44,13 +43,10 @@ class MCPToolExecutor:
             
             logger.debug(f"⚡ [MCP EXEC] Executing {tool_name} via Composio")
             
-            async with streamablehttp_client(mcp_url) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    result = await session.call_tool(tool_name, arguments=args)
-                    content = self._extract_result_content(result)
-                    
-                    return ToolResult(success=True, output=str(content))
+            result = await mcp_session_pool.call_tool("http", {"url": mcp_url}, tool_name, args, profile_id=profile_id)
+            content = self._extract_result_content(result)
+            
+            return ToolResult(success=True, output=str(content))
             
         except Exception as e:
             logger.error(f"❌ [MCP EXEC] Composio execution failed for {tool_name}: {e}")
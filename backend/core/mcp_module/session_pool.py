@@ -0,0 +1,291 @@
+"""
+Pool of long-lived MCP client sessions for tool execution.
+
+Opening an MCP session costs a transport connection (for stdio servers, a new
+process) plus the initialize handshake. MCPToolExecutor used to pay that on
+every tool call; it now borrows a session from this pool instead:
+
+- sessions are keyed by a hash of the server's transport config and the
+  credential profile, so different profiles never share a session
+- each session is owned by its own task, which enters and exits the
+  transport/session context managers (anyio requires one task for both)
+  and pings the server while the session is idle
+- sessions idle for MCP_SESSION_IDLE_SECONDS are closed, and the least
+  recently used idle session once the pool is full
+- tool calls in flight per session are bounded (MCP_SESSION_MAX_CONCURRENCY)
+- a call that fails because the transport is already gone (the request never
+  reached the server) is retried once on a fresh session
+- close() shuts every session down; API and worker processes call it on exit
+"""
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from time import time
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Dict, Optional, Set
+from urllib.parse import urlparse
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from core.utils.config import config
+from core.utils.logger import logger
+
+CONNECT_TIMEOUT_SECONDS = 30
+KEEPALIVE_INTERVAL_SECONDS = 60
+PING_TIMEOUT_SECONDS = 10
+CLOSE_TIMEOUT_SECONDS = 5
+MAX_POOLED_SESSIONS = 100
+
+# Raised when leasing a closed session or writing to a closed transport - the request was
+# never sent. Read-side errors (anyio.EndOfStream) come after the write and are not retried:
+# the server may already have run a non-idempotent tool.
+_RECONNECTABLE_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, ConnectionError)
+
+TransportFactory = Callable[[], AsyncContextManager]
+
+
+def _transport_factory(transport: str, params: Dict[str, Any]) -> TransportFactory:
+    if transport == "stdio":
+        server_params = StdioServerParameters(
+            command=params["command"],
+            args=params.get("args", []),
+            env=params.get("env", {})
+        )
+        return lambda: stdio_client(server_params)
+
+    url = params["url"]
+    headers = params.get("headers")
+    if transport == "sse":
+        def open_sse():
+            try:
+                return sse_client(url, headers=headers or {})
+            except TypeError as e:
+                if "unexpected keyword argument" not in str(e):
+                    raise
+                return sse_client(url)
+        return open_sse
+    if transport == "http":
+        return lambda: streamablehttp_client(url, headers=headers) if headers else streamablehttp_client(url)
+    raise ValueError(f"Unsupported MCP transport: {transport}")
+
+
+def _session_label(transport: str, params: Dict[str, Any]) -> str:
+    """Log-safe name for a session (URLs and env may carry credentials)."""
+    if transport == "stdio":
+        return f"stdio:{params.get('command')}"
+    return f"{transport}:{urlparse(params.get('url', '')).hostname}"
+
+
+class _PooledSession:
+    """One MCP session, owned by a background task for its whole lifetime."""
+
+    def __init__(self, label: str, open_transport: TransportFactory, max_concurrency: int):
+        self.label = label
+        self._open_transport = open_transport
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.loop = asyncio.get_running_loop()
+        self.session: Optional[ClientSession] = None
+        self.in_use = 0
+        self.last_used = time()
+        self._ready = self.loop.create_future()
+        self._stop = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    @property
+    def alive(self) -> bool:
+        return not self.task.done() and not self._stop.is_set()
+
+    async def wait_ready(self) -> None:
+        await asyncio.wait_for(asyncio.shield(self._ready), timeout=CONNECT_TIMEOUT_SECONDS)
+
+    async def _run(self) -> None:
+        try:
+            async with self._open_transport() as streams:
+                async with ClientSession(streams[0], streams[1]) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set_result(None)
+                    logger.debug(f"MCP session {self.label} connected")
+                    await self._keepalive(session)
+        except Exception as e:
+            if self._ready.done():
+                logger.info(f"MCP session {self.label} dropped: {e}")
+            else:
+                self._ready.set_exception(e)
+        finally:
+            self.session = None
+            if not self._ready.done():
+                self._ready.set_exception(ConnectionError(f"MCP session {self.label} closed"))
+            if self._ready.exception() is not None:
+                logger.debug(f"MCP session {self.label} failed to connect: {self._ready.exception()}")
+
+    async def _keepalive(self, session: ClientSession) -> None:
+        """Ping the server while idle; return (closing the session) on stop or idle timeout."""
+        idle_seconds = config.MCP_SESSION_IDLE_SECONDS
+        interval = min(KEEPALIVE_INTERVAL_SECONDS, idle_seconds or KEEPALIVE_INTERVAL_SECONDS)
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            if self.in_use:
+                continue
+            if idle_seconds and time() - self.last_used > idle_seconds:
+                logger.debug(f"Closing idle MCP session {self.label}")
+                # Stop handing the session out while the transport shuts down
+                self._stop.set()
+                self.session = None
+                return
+            await asyncio.wait_for(session.send_ping(), timeout=PING_TIMEOUT_SECONDS)
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[ClientSession]:
+        async with self.semaphore:
+            if self.session is None:
+                raise ConnectionError(f"MCP session {self.label} is closed")
+            self.in_use += 1
+            try:
+                yield self.session
+            finally:
+                self.in_use -= 1
+                self.last_used = time()
+
+    async def close(self) -> None:
+        self._stop.set()
+        if self.session is None:
+            # Still connecting (or already gone); nothing to shut down gracefully
+            self.task.cancel()
+        try:
+            await asyncio.wait_for(asyncio.shield(self.task), timeout=CLOSE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.task.cancel()
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+class MCPSessionPool:
+    """
+    Shared MCP client sessions, one per server config and credential profile.
+
+    Usage:
+        result = await mcp_session_pool.call_tool("http", {"url": url}, "GMAIL_SEND_EMAIL", arguments, profile_id=profile_id)
+    """
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, _PooledSession]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+        self.metrics = {"handshakes": 0, "reused": 0, "reconnects": 0, "evicted": 0}
+
+    @staticmethod
+    def session_key(transport: str, params: Dict[str, Any], profile_id: Optional[str] = None) -> str:
+        raw = json.dumps({"transport": transport, "params": params, "profile": profile_id}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def call_tool(
+        self,
+        transport: str,
+        params: Dict[str, Any],
+        tool_name: str,
+        arguments: Dict[str, Any],
+        profile_id: Optional[str] = None,
+    ) -> Any:
+        """
+        Call a tool on an MCP server through a pooled session.
+
+        Args:
+            transport: "http" (streamable HTTP), "sse" or "stdio"
+            params: {"url", "headers"} for http/sse, {"command", "args", "env"} for stdio
+            tool_name: Tool name as the server knows it
+            arguments: Tool arguments
+            profile_id: Credential profile the session authenticates as
+        """
+        open_transport = _transport_factory(transport, params)
+        if not config.MCP_SESSION_POOL:
+            self.metrics["handshakes"] += 1
+            async with open_transport() as streams:
+                async with ClientSession(streams[0], streams[1]) as session:
+                    await session.initialize()
+                    return await session.call_tool(tool_name, arguments)
+
+        key = self.session_key(transport, params, profile_id)
+        label = _session_label(transport, params)
+        for attempt in range(2):
+            entry = await self._acquire(key, label, open_transport)
+            try:
+                async with entry.lease() as session:
+                    return await session.call_tool(tool_name, arguments)
+            except _RECONNECTABLE_ERRORS as e:
+                self._discard(key, entry)
+                if attempt:
+                    raise
+                self.metrics["reconnects"] += 1
+                logger.info(f"MCP session {label} lost ({type(e).__name__}), reconnecting")
+
+    async def _acquire(self, key: str, label: str, open_transport: TransportFactory) -> _PooledSession:
+        entry = self._sessions.get(key)
+        if entry is not None and (not entry.alive or entry.loop is not asyncio.get_running_loop()):
+            self._discard(key, entry)
+            entry = None
+
+        if entry is None:
+            # Registered before the first await, so concurrent callers share one handshake
+            entry = _PooledSession(label, open_transport, config.MCP_SESSION_MAX_CONCURRENCY)
+            self._sessions[key] = entry
+            entry.task.add_done_callback(lambda _: self._forget(key, entry))
+            self.metrics["handshakes"] += 1
+            self._evict_overflow()
+        else:
+            self._sessions.move_to_end(key)
+            self.metrics["reused"] += 1
+
+        try:
+            await entry.wait_ready()
+        except Exception:
+            self._discard(key, entry)
+            raise
+        return entry
+
+    def _evict_overflow(self) -> None:
+        while len(self._sessions) > MAX_POOLED_SESSIONS:
+            idle_key = next((key for key, entry in self._sessions.items() if not entry.in_use), None)
+            if idle_key is None:
+                return
+            self._discard(idle_key, self._sessions[idle_key])
+            self.metrics["evicted"] += 1
+
+    def _forget(self, key: str, entry: _PooledSession) -> None:
+        if self._sessions.get(key) is entry:
+            del self._sessions[key]
+
+    def _discard(self, key: str, entry: _PooledSession) -> None:
+        self._forget(key, entry)
+        if entry.loop is asyncio.get_running_loop():
+            task = asyncio.create_task(entry.close())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def close(self) -> None:
+        """Close every pooled session (process shutdown)."""
+        loop = asyncio.get_running_loop()
+        entries = [entry for entry in self._sessions.values() if entry.loop is loop]
+        self._sessions.clear()
+        await asyncio.gather(*(entry.close() for entry in entries), *self._closing, return_exceptions=True)
+        if entries:
+            logger.info(f"Closed {len(entries)} pooled MCP sessions")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "sessions": len(self._sessions),
+            "in_use": sum(entry.in_use for entry in self._sessions.values()),
+        }
+
+
+mcp_session_pool = MCPSessionPool()
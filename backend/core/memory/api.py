@@ -207,7 +207,7 @@ async def create_memory(
         await db.initialize()
         client = await db.client
         
-        current_count_result = await client.table('user_memories').select('memory_id', count='exact').eq('account_id', user_id).execute()
+        current_count_result = await client.table('user_memories').select('memory_id', count='exact', head=True).eq('account_id', user_id).execute()
         current_count = current_count_result.count or 0
         
         if current_count >= max_memories:
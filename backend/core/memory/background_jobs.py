@@ -1,6 +1,7 @@
 import dramatiq
 import asyncio
-from typing import List, Dict, Any
+import json
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
 from core.utils.logger import logger, structlog
 from core.services.supabase import DBConnection
@@ -141,7 +142,7 @@ async def embed_and_store_memories(
         tier_name = "default"
         memory_config = {'max_memories': 10000, 'retrieval_limit': 100}
         
-        current_count_result = await client.table('user_memories').select('memory_id', count='exact').eq('account_id', account_id).execute()
+        current_count_result = await client.table('user_memories').select('memory_id', count='exact', head=True).eq('account_id', account_id).execute()
         current_count = current_count_result.count or 0
         
         texts_to_embed = [mem['content'] for mem in extracted_memories]
@@ -176,6 +177,75 @@ async def embed_and_store_memories(
     except Exception as e:
         logger.error(f"Memory embedding and storage failed: {str(e)}")
 
+CONSOLIDATION_SIMILARITY_THRESHOLD = 0.95
+CONSOLIDATION_MAX_MEMORIES = 10000
+CONSOLIDATION_BLOCK_SIZE = 1024
+CONSOLIDATION_DELETE_BATCH_SIZE = 1000
+
+
+def _parse_embedding(embedding: Any) -> Optional[List[float]]:
+    if embedding is None:
+        return None
+    if isinstance(embedding, str):
+        # pgvector values come back as text ("[0.1,0.2,...]") without a registered codec
+        try:
+            embedding = json.loads(embedding)
+        except ValueError:
+            return None
+    return list(embedding) if len(embedding) else None
+
+
+def find_duplicate_memories(
+    memories: List[Dict[str, Any]],
+    similarity_threshold: float = CONSOLIDATION_SIMILARITY_THRESHOLD,
+    block_size: int = CONSOLIDATION_BLOCK_SIZE
+) -> List[str]:
+    """
+    Return the memory_ids to drop as near-duplicates.
+    
+    Memories are ranked by confidence_score (ties keep the input order, i.e.
+    newest first). Embeddings are stacked into one L2-normalized matrix and
+    cosine similarities are computed blockwise with a matrix product, so memory
+    stays at block_size x n floats. Walking the ranking greedily, each kept
+    memory drops every lower-ranked memory at or above the threshold.
+    """
+    import numpy as np
+    
+    by_dimension: Dict[int, List[tuple]] = {}
+    for mem in memories:
+        embedding = _parse_embedding(mem.get('embedding'))
+        if embedding:
+            by_dimension.setdefault(len(embedding), []).append((mem, embedding))
+    
+    to_delete: List[str] = []
+    for group in by_dimension.values():
+        if len(group) < 2:
+            continue
+        
+        order = sorted(range(len(group)), key=lambda i: (-(group[i][0].get('confidence_score') or 0), i))
+        matrix = np.asarray([group[i][1] for i in order], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        
+        n = len(order)
+        dropped = np.zeros(n, dtype=bool)
+        for block_start in range(0, n, block_size):
+            block_end = min(block_start + block_size, n)
+            # Only lower-ranked (later) columns can be dropped by rows in this block
+            similarities = matrix[block_start:block_end] @ matrix[block_start:].T
+            for row in range(block_start, block_end):
+                if dropped[row]:
+                    continue
+                candidates = similarities[row - block_start, row - block_start + 1:] >= similarity_threshold
+                if candidates.any():
+                    dropped[row + 1:] |= candidates
+        
+        to_delete.extend(group[order[i]][0]['memory_id'] for i in np.flatnonzero(dropped))
+    
+    return to_delete
+
+
 @dramatiq.actor
 async def consolidate_memories(account_id: str):
     structlog.contextvars.clear_contextvars()
@@ -190,7 +260,7 @@ async def consolidate_memories(account_id: str):
     client = await db.client
     
     try:
-        memories_result = await client.table('user_memories').select('*').eq('account_id', account_id).order('created_at', desc=True).limit(500).execute()
+        memories_result = await client.table('user_memories').select('memory_id, embedding, confidence_score').eq('account_id', account_id).order('created_at', desc=True).limit(CONSOLIDATION_MAX_MEMORIES).execute()
         
         memories = memories_result.data or []
         
@@ -198,33 +268,13 @@ async def consolidate_memories(account_id: str):
             logger.debug(f"Not enough memories to consolidate for {account_id}")
             return
         
-        similarity_threshold = 0.95
-        consolidated_count = 0
+        memory_ids_to_delete = await asyncio.to_thread(find_duplicate_memories, memories)
         
-        for i, mem1 in enumerate(memories):
-            if not mem1.get('embedding'):
-                continue
-            
-            for mem2 in memories[i+1:]:
-                if not mem2.get('embedding'):
-                    continue
-                
-                import numpy as np
-                embedding1 = np.array(mem1['embedding'])
-                embedding2 = np.array(mem2['embedding'])
-                
-                similarity = np.dot(embedding1, embedding2) / (np.linalg.norm(embedding1) * np.linalg.norm(embedding2))
-                
-                if similarity >= similarity_threshold:
-                    if mem1.get('confidence_score', 0) >= mem2.get('confidence_score', 0):
-                        await client.table('user_memories').delete().eq('memory_id', mem2['memory_id']).execute()
-                    else:
-                        await client.table('user_memories').delete().eq('memory_id', mem1['memory_id']).execute()
-                        break
-                    
-                    consolidated_count += 1
-        
-        logger.info(f"Consolidated {consolidated_count} duplicate memories for account {account_id}")
+        for i in range(0, len(memory_ids_to_delete), CONSOLIDATION_DELETE_BATCH_SIZE):
+            batch = memory_ids_to_delete[i:i + CONSOLIDATION_DELETE_BATCH_SIZE]
+            await client.table('user_memories').delete(returning='minimal').in_('memory_id', batch).execute()
+        
+        logger.info(f"Consolidated {len(memory_ids_to_delete)} duplicate memories for account {account_id} (compared {len(memories)})")
     
     except Exception as e:
         logger.error(f"Memory consolidation failed for {account_id}: {str(e)}")
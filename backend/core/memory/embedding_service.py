@@ -1,10 +1,53 @@
 import asyncio
-from typing import List, Optional, Dict, Any
+import base64
+import hashlib
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple
 from abc import ABC, abstractmethod
 from core.utils.logger import logger
 from core.utils.config import config
 
+# Embeddings are deterministic per (provider, model, text); cache them by content digest
+EMBEDDING_CACHE_TTL = 7 * 24 * 3600
+# How long embed_text waits for concurrent requests to merge into one call
+EMBEDDING_COALESCE_WINDOW_SECONDS = 0.005
+
+class EmbeddingMetrics:
+    """Per-provider call counters for throughput and latency."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.texts = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+    
+    def record(self, texts: int, seconds: float, error: bool = False):
+        self.calls += 1
+        self.texts += texts
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if error:
+            self.errors += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "texts": self.texts,
+            "errors": self.errors,
+            "avg_latency_ms": round(self.total_seconds / self.calls * 1000, 2) if self.calls else 0.0,
+            "max_latency_ms": round(self.max_seconds * 1000, 2),
+            "texts_per_second": round(self.texts / self.total_seconds, 1) if self.total_seconds else 0.0,
+        }
+
 class EmbeddingProvider(ABC):
+    def __init__(self, batch_size: Optional[int] = None, max_concurrency: Optional[int] = None):
+        self.batch_size = batch_size or config.MEMORY_EMBEDDING_BATCH_SIZE or 64
+        self.max_concurrency = max_concurrency or config.MEMORY_EMBEDDING_CONCURRENCY or 4
+        self.metrics = EmbeddingMetrics()
+    
     @abstractmethod
     async def embed(self, texts: List[str]) -> List[List[float]]:
         pass
@@ -12,9 +55,36 @@ class EmbeddingProvider(ABC):
     @abstractmethod
     async def embed_single(self, text: str) -> List[float]:
         pass
+    
+    async def embed_many(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Embed texts in batches, running up to max_concurrency batches at once (order is preserved)."""
+        batch_size = batch_size or self.batch_size
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        if len(batches) == 1:
+            return await self._timed_embed(batches[0])
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._timed_embed(batch)
+        
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        return [embedding for result in results for embedding in result]
+    
+    async def _timed_embed(self, texts: List[str]) -> List[List[float]]:
+        start = time.monotonic()
+        try:
+            embeddings = await self.embed(texts)
+        except Exception:
+            self.metrics.record(len(texts), time.monotonic() - start, error=True)
+            raise
+        self.metrics.record(len(texts), time.monotonic() - start)
+        return embeddings
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
-    def __init__(self, model: str = "text-embedding-3-small", api_key: Optional[str] = None):
+    def __init__(self, model: str = "text-embedding-3-small", api_key: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
         self.model = model
         self.api_key = api_key or config.OPENAI_API_KEY
         self._client = None
@@ -46,7 +116,8 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         return embeddings[0]
 
 class VoyageAIEmbeddingProvider(EmbeddingProvider):
-    def __init__(self, model: str = "voyage-2", api_key: Optional[str] = None):
+    def __init__(self, model: str = "voyage-2", api_key: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
         self.model = model
         self.api_key = api_key or config.VOYAGE_API_KEY
         self._client = None
@@ -79,9 +150,15 @@ class VoyageAIEmbeddingProvider(EmbeddingProvider):
         return embeddings[0]
 
 class LocalEmbeddingProvider(EmbeddingProvider):
-    def __init__(self, model: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model: str = "all-MiniLM-L6-v2", workers: Optional[int] = None, **kwargs):
+        workers = workers or config.MEMORY_EMBEDDING_LOCAL_WORKERS or 1
+        # Batches beyond the worker count would only queue on the executor
+        kwargs.setdefault('max_concurrency', workers)
+        super().__init__(**kwargs)
         self.model = model
         self._model_instance = None
+        # Dedicated pool so encode() does not compete with other run_in_executor users
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embedding-local")
     
     @property
     def model_instance(self):
@@ -96,10 +173,10 @@ class LocalEmbeddingProvider(EmbeddingProvider):
     
     async def embed(self, texts: List[str]) -> List[List[float]]:
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             embeddings = await loop.run_in_executor(
-                None,
-                lambda: self.model_instance.encode(texts, convert_to_numpy=True)
+                self._executor,
+                lambda: self.model_instance.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
             )
             return embeddings.tolist()
         except Exception as e:
@@ -110,11 +187,72 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         embeddings = await self.embed([text])
         return embeddings[0]
 
+class EmbeddingCoalescer:
+    """
+    Merges concurrent single-text requests into one batched embedding call.
+    
+    Requests arriving within a short window (or until max_batch_size is
+    reached) are flushed together; each caller gets its own result or error.
+    """
+    
+    def __init__(self, embed_texts, max_batch_size: int, window_seconds: float = EMBEDDING_COALESCE_WINDOW_SECONDS):
+        self._embed_texts = embed_texts
+        self._max_batch_size = max_batch_size
+        self._window_seconds = window_seconds
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+        self.flushes = 0
+        self.requests = 0
+    
+    async def submit(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+        
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window_seconds, self._flush)
+        return await future
+    
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.flushes += 1
+        task = asyncio.create_task(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, pending: List[Tuple[str, asyncio.Future]]):
+        try:
+            embeddings = await self._embed_texts([text for text, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), embedding in zip(pending, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
 class EmbeddingService:
-    def __init__(self, provider: Optional[str] = None, model: Optional[str] = None):
+    def __init__(self, provider: Optional[str] = None, model: Optional[str] = None, use_cache: bool = True):
         self.provider_name = provider or config.MEMORY_EMBEDDING_PROVIDER or "openai"
         self.model = model
+        self.use_cache = use_cache
         self._provider = None
+        self._coalescer: Optional[EmbeddingCoalescer] = None
     
     @property
     def provider(self) -> EmbeddingProvider:
@@ -144,13 +282,54 @@ class EmbeddingService:
             logger.warning(f"Unknown embedding provider: {provider_name}, falling back to OpenAI")
             return OpenAIEmbeddingProvider()
     
+    def _cache_key(self, text: str) -> str:
+        digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+        return f"embedding:{self.provider_name.lower()}:{self.provider.model}:{digest}"
+    
+    @staticmethod
+    def _encode_embedding(embedding: List[float]) -> str:
+        return base64.b64encode(array('f', embedding).tobytes()).decode('ascii')
+    
+    @staticmethod
+    def _decode_embedding(value: str) -> List[float]:
+        embedding = array('f')
+        embedding.frombytes(base64.b64decode(value))
+        return embedding.tolist()
+    
+    async def _get_cached_embeddings(self, keys: List[str]) -> List[Optional[List[float]]]:
+        if not self.use_cache:
+            return [None] * len(keys)
+        try:
+            from core.services import redis
+            redis_client = await redis.get_client()
+            values = await redis_client.mget(keys)
+            return [self._decode_embedding(v) if v else None for v in values]
+        except Exception as e:
+            logger.debug(f"Embedding cache lookup failed: {str(e)}")
+            return [None] * len(keys)
+    
+    async def _set_cached_embeddings(self, entries: Dict[str, List[float]]) -> None:
+        if not self.use_cache:
+            return
+        try:
+            from core.services import redis
+            redis_client = await redis.get_client()
+            pipe = redis_client.pipeline()
+            for key, embedding in entries.items():
+                pipe.set(key, self._encode_embedding(embedding), ex=EMBEDDING_CACHE_TTL)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Embedding cache write failed: {str(e)}")
+    
     async def embed_text(self, text: str) -> List[float]:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
-        return await self.provider.embed_single(text)
+        if self._coalescer is None:
+            self._coalescer = EmbeddingCoalescer(self.embed_texts, max_batch_size=self.provider.batch_size)
+        return await self._coalescer.submit(text)
     
-    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+    async def embed_texts(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
         if not texts:
             return []
         
@@ -158,18 +337,32 @@ class EmbeddingService:
         if not valid_texts:
             raise ValueError("All texts are empty")
         
-        return await self.provider.embed(valid_texts)
+        keys = [self._cache_key(t) for t in valid_texts]
+        embeddings = await self._get_cached_embeddings(keys)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            # Embed each distinct uncached text once
+            unique_texts = list(dict.fromkeys(valid_texts[i] for i in missing))
+            fresh = dict(zip(unique_texts, await self.provider.embed_many(unique_texts, batch_size)))
+            for i in missing:
+                embeddings[i] = fresh[valid_texts[i]]
+            await self._set_cached_embeddings({keys[i]: embeddings[i] for i in missing})
+        
+        logger.debug(f"Embedded {len(valid_texts)} texts ({len(valid_texts) - len(missing)} from cache)")
+        return embeddings
     
     async def embed_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
         if not texts:
             return []
         
-        all_embeddings = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            embeddings = await self.embed_texts(batch)
-            all_embeddings.extend(embeddings)
-        
-        return all_embeddings
+        return await self.embed_texts(texts, batch_size=batch_size)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = {"provider": self.provider_name, "model": self.provider.model, **self.provider.metrics.snapshot()}
+        if self._coalescer is not None:
+            metrics["coalesced_requests"] = self._coalescer.requests
+            metrics["coalesced_flushes"] = self._coalescer.flushes
+        return metrics
 
 embedding_service = EmbeddingService()
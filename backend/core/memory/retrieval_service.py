@@ -1,3 +1,4 @@
+import hashlib
 from typing import List, Dict, Any, Optional
 from core.utils.logger import logger
 from core.utils.cache import Cache
@@ -22,7 +23,8 @@ class MemoryRetrievalService:
             # Billing removed - assume memory is enabled for all tiers
             retrieval_limit = 100  # Default limit
             
-            cache_key = f"memories:retrieved:{account_id}:{hash(query_text)}"
+            query_digest = hashlib.blake2b(query_text.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+            cache_key = f"memories:retrieved:{account_id}:{query_digest}"
             cached = await Cache.get(cache_key)
             if cached:
                 logger.debug(f"Retrieved memories from cache for {account_id}")
@@ -31,10 +33,10 @@ class MemoryRetrievalService:
             await self.db.initialize()
             client = await self.db.client
             
-            count_result = await client.table('user_memories').select('memory_id', count='exact').eq('account_id', account_id).execute()
-            total_memories = count_result.count or 0
+            # Existence probe (LIMIT 1 on the account index) instead of an exact COUNT
+            probe_result = await client.table('user_memories').select('memory_id').eq('account_id', account_id).limit(1).execute()
             
-            if total_memories == 0:
+            if not probe_result.data:
                 logger.debug(f"No memories stored for account {account_id}")
                 return []
             
@@ -1,8 +1,11 @@
 import os
 import json
+import time
 import asyncio
+import hashlib
 import datetime
-from typing import Optional
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 from core.tools.mcp_tool_wrapper import MCPToolWrapper
 from core.agentpress.tool import SchemaType
 from core.prompts.agent_builder_prompt import get_agent_builder_prompt
@@ -11,6 +14,38 @@ from core.prompts.core_prompt import get_dynamic_system_prompt
 from core.tools.tool_guide_registry import get_minimal_tool_index, get_tool_guide
 from core.utils.logger import logger
 
+# Fragment cache for the static parts of the system prompt (agent/base prompt, builder prompt,
+# MCP tool listing, XML calling instructions), keyed by a digest of the inputs each fragment is
+# built from. Fragments are built deterministically (sorted tools), so the same inputs always
+# give the same bytes and provider prompt caching keeps hitting. KB, user context and the
+# datetime are composed per run, after the static prefix.
+PROMPT_FRAGMENT_CACHE_MAX_ENTRIES = 256
+_fragment_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_fragment_stats: Dict[str, Dict[str, int]] = {}  # fragment -> {'hits', 'misses'}
+
+
+def _fragment_key(*inputs: Any) -> str:
+    raw = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+def _fragment_get(fragment: str, key: str, fragment_hits: Optional[Dict[str, bool]] = None) -> Optional[str]:
+    cached = _fragment_cache.get((fragment, key))
+    stats = _fragment_stats.setdefault(fragment, {'hits': 0, 'misses': 0})
+    stats['hits' if cached is not None else 'misses'] += 1
+    if fragment_hits is not None:
+        fragment_hits[fragment] = cached is not None
+    if cached is not None:
+        _fragment_cache.move_to_end((fragment, key))
+    return cached
+
+
+def _fragment_put(fragment: str, key: str, content: str) -> None:
+    _fragment_cache[(fragment, key)] = content
+    if len(_fragment_cache) > PROMPT_FRAGMENT_CACHE_MAX_ENTRIES:
+        _fragment_cache.popitem(last=False)
+
+
 class PromptManager:
     @staticmethod
     async def build_minimal_prompt(agent_config: Optional[dict], tool_registry=None, mcp_loader=None, user_id: Optional[str] = None, thread_id: Optional[str] = None, client=None) -> dict:
@@ -70,18 +105,19 @@ If relevant context seems missing, ask a clarifying question.
                                   use_dynamic_tools: bool = True,
                                   mcp_loader=None) -> dict:
         
-        system_content = PromptManager._build_base_prompt(use_dynamic_tools)
-        system_content = PromptManager._append_agent_system_prompt(system_content, agent_config, use_dynamic_tools)
-        system_content = await PromptManager._append_builder_tools_prompt(system_content, agent_config)
+        assembly_start = time.time()
+        fragment_hits: Dict[str, bool] = {}
+        
+        system_content = await PromptManager._build_instructions_prompt(agent_config, use_dynamic_tools, fragment_hits)
         
         kb_task = PromptManager._fetch_knowledge_base(agent_config, client)
         user_context_task = PromptManager._fetch_user_context_data(user_id, client)
         memory_task = PromptManager._fetch_user_memories(user_id, thread_id, client)
         
         system_content = PromptManager._append_mcp_tools_info(system_content, agent_config, mcp_wrapper_instance)
-        system_content = await PromptManager._append_jit_mcp_info(system_content, mcp_loader)
-        system_content = PromptManager._append_xml_tool_calling_instructions(system_content, xml_tool_calling, tool_registry)
-        system_content = PromptManager._append_datetime_info(system_content)
+        system_content = await PromptManager._append_jit_mcp_info(system_content, mcp_loader, fragment_hits)
+        system_content = PromptManager._append_xml_tool_calling_instructions(system_content, xml_tool_calling, tool_registry, fragment_hits)
+        assembly_ms = (time.time() - assembly_start) * 1000
         
         kb_data, user_context_data, memory_data = await asyncio.gather(kb_task, user_context_task, memory_task)
         
@@ -91,7 +127,10 @@ If relevant context seems missing, ask a clarifying question.
         if user_context_data:
             system_content += user_context_data
         
-        PromptManager._log_prompt_stats(system_content, use_dynamic_tools)
+        # Last, so it doesn't break the cacheable prefix above
+        system_content = PromptManager._append_datetime_info(system_content)
+        
+        PromptManager._log_prompt_stats(system_content, use_dynamic_tools, assembly_ms, fragment_hits)
         
         system_message = {"role": "system", "content": system_content}
         
@@ -119,6 +158,22 @@ If relevant context seems missing, ask a clarifying question.
         
         return default_system_content
     
+    @staticmethod
+    async def _build_instructions_prompt(agent_config: Optional[dict], use_dynamic_tools: bool, fragment_hits: Optional[Dict[str, bool]] = None) -> str:
+        """Base (or agent) prompt plus the builder prompt, cached per prompt text and tool set."""
+        custom_prompt = agent_config.get('system_prompt') if agent_config else None
+        key = _fragment_key(custom_prompt, use_dynamic_tools, PromptManager._has_builder_tools(agent_config))
+        cached = _fragment_get('instructions', key, fragment_hits)
+        if cached is not None:
+            return cached
+        
+        # An agent prompt replaces the base prompt, so don't build that for nothing
+        system_content = "" if custom_prompt else PromptManager._build_base_prompt(use_dynamic_tools)
+        system_content = PromptManager._append_agent_system_prompt(system_content, agent_config, use_dynamic_tools)
+        system_content = await PromptManager._append_builder_tools_prompt(system_content, agent_config)
+        _fragment_put('instructions', key, system_content)
+        return system_content
+    
     @staticmethod
     def _get_preloaded_tool_guides() -> str:
         from core.jit.loader import JITLoader
@@ -148,9 +203,9 @@ If relevant context seems missing, ask a clarifying question.
         return system_content
     
     @staticmethod
-    async def _append_builder_tools_prompt(system_content: str, agent_config: Optional[dict]) -> str:
+    def _has_builder_tools(agent_config: Optional[dict]) -> bool:
         if not agent_config:
-            return system_content
+            return False
         
         agentpress_tools = agent_config.get('agentpress_tools', {})
         
@@ -164,9 +219,11 @@ If relevant context seems missing, ask a clarifying question.
                 return False
         
         builder_tool_names = ['agent_creation_tool', 'agent_config_tool', 'mcp_search_tool', 'credential_profile_tool', 'trigger_tool']
-        has_builder_tools = any(is_tool_enabled(tool) for tool in builder_tool_names)
-        
-        if has_builder_tools:
+        return any(is_tool_enabled(tool) for tool in builder_tool_names)
+    
+    @staticmethod
+    async def _append_builder_tools_prompt(system_content: str, agent_config: Optional[dict]) -> str:
+        if PromptManager._has_builder_tools(agent_config):
             builder_prompt = get_agent_builder_prompt()
             system_content += f"\n\n{builder_prompt}"
         
@@ -262,7 +319,7 @@ If relevant context seems missing, ask a clarifying question.
         return system_content + mcp_info
     
     @staticmethod
-    async def _append_jit_mcp_info(system_content: str, mcp_loader) -> str:
+    async def _append_jit_mcp_info(system_content: str, mcp_loader, fragment_hits: Optional[Dict[str, bool]] = None) -> str:
         if not mcp_loader:
             return system_content
         
@@ -273,6 +330,17 @@ If relevant context seems missing, ask a clarifying question.
             if not available_tools:
                 return system_content
             
+            # Keyed on each tool's toolkit and server config, not just the names, so a
+            # reconfigured MCP server doesn't keep serving the old listing
+            tool_infos = {tool_name: await mcp_loader.get_tool_info(tool_name) for tool_name in sorted(available_tools)}
+            key = _fragment_key(
+                sorted(toolkits),
+                [(tool_name, info.toolkit_slug, info.mcp_config) if info else (tool_name,) for tool_name, info in tool_infos.items()]
+            )
+            cached = _fragment_get('mcp_tools', key, fragment_hits)
+            if cached is not None:
+                return system_content + cached
+            
             mcp_jit_info = "\n\n--- EXTERNAL MCP TOOLS ---\n"
             mcp_jit_info += f"🔥 You have {len(available_tools)} external MCP tools from {len(toolkits)} connected services.\n"
             mcp_jit_info += "⚡ TWO-STEP WORKFLOW: (1) discover_mcp_tools() → (2) execute_mcp_tool()\n"
@@ -280,8 +348,7 @@ If relevant context seems missing, ask a clarifying question.
             mcp_jit_info += "🎯 EXECUTION: execute_mcp_tool(tool_name=\"TOOL_NAME\", args={...})\n\n"
             
             toolkit_tools = {}
-            for tool_name in available_tools:
-                tool_info = await mcp_loader.get_tool_info(tool_name)
+            for tool_name, tool_info in tool_infos.items():
                 if tool_info:
                     toolkit = tool_info.toolkit_slug.upper()
                     if toolkit not in toolkit_tools:
@@ -292,7 +359,7 @@ If relevant context seems missing, ask a clarifying question.
                         api_name = f"{toolkit}_{tool_name.upper()}"
                     toolkit_tools[toolkit].append(api_name)
             
-            for toolkit, tools in toolkit_tools.items():
+            for toolkit, tools in sorted(toolkit_tools.items()):
                 if toolkit == "TWITTER":
                     mcp_jit_info += f"**Twitter Functions**: {', '.join(tools)}\n"
                 elif toolkit == "GOOGLESHEETS":
@@ -320,13 +387,14 @@ If relevant context seems missing, ask a clarifying question.
             mcp_jit_info += "3. NEVER re-discover tools already in conversation history\n"
             mcp_jit_info += "4. Check history first - if schemas exist, skip directly to execute_mcp_tool!\n\n"
             
+            _fragment_put('mcp_tools', key, mcp_jit_info)
             return system_content + mcp_jit_info
         except Exception as e:
             logger.warning(f"⚠️  [MCP JIT] Failed to load dynamic tools for prompt: {e}")
             return system_content
     
     @staticmethod
-    def _append_xml_tool_calling_instructions(system_content: str, xml_tool_calling: bool, tool_registry) -> str:
+    def _append_xml_tool_calling_instructions(system_content: str, xml_tool_calling: bool, tool_registry, fragment_hits: Optional[Dict[str, bool]] = None) -> str:
         if not (xml_tool_calling and tool_registry):
             return system_content
         
@@ -335,6 +403,14 @@ If relevant context seems missing, ask a clarifying question.
         if not openapi_schemas:
             return system_content
         
+        # Keyed on the schemas themselves: MCP tool schemas come from the remote server and
+        # can change under the same name. Sorted so registration order doesn't change the prompt bytes
+        openapi_schemas = sorted(openapi_schemas, key=lambda schema: schema.get('function', {}).get('name', ''))
+        key = _fragment_key(openapi_schemas)
+        cached = _fragment_get('xml_tools', key, fragment_hits)
+        if cached is not None:
+            return system_content + cached
+        
         schemas_json = json.dumps(openapi_schemas, indent=2)
         
         examples_content = f"""
@@ -402,6 +478,7 @@ Example of correct tool call format (multiple invokes in one block):
 [Generation stops here automatically - do not continue]
 """
         
+        _fragment_put('xml_tools', key, examples_content)
         logger.debug("Appended XML tool examples to system prompt")
         return system_content + examples_content
     
@@ -559,7 +636,7 @@ Example of correct tool call format (multiple invokes in one block):
             return None
     
     @staticmethod
-    def _log_prompt_stats(system_content: str, use_dynamic_tools: bool):
+    def _log_prompt_stats(system_content: str, use_dynamic_tools: bool, assembly_ms: Optional[float] = None, fragment_hits: Optional[Dict[str, bool]] = None):
         final_prompt_size = len(system_content)
         if use_dynamic_tools:
             estimated_legacy_size = final_prompt_size * 3.5
@@ -567,3 +644,17 @@ Example of correct tool call format (multiple invokes in one block):
             logger.info(f"✅ [DYNAMIC TOOLS] Final system prompt: {final_prompt_size:,} chars (est. {reduction_pct:.0f}% reduction vs legacy)")
         else:
             logger.info(f"📝 [LEGACY MODE] Final system prompt: {final_prompt_size:,} chars")
+        
+        if assembly_ms is not None:
+            cached = [name for name, hit in (fragment_hits or {}).items() if hit]
+            hits = sum(stats['hits'] for stats in _fragment_stats.values())
+            lookups = hits + sum(stats['misses'] for stats in _fragment_stats.values())
+            rates = ", ".join(
+                f"{name} {stats['hits'] / (stats['hits'] + stats['misses']):.0%}"
+                for name, stats in sorted(_fragment_stats.items()) if stats['hits'] + stats['misses']
+            )
+            logger.info(
+                f"🧩 [PROMPT FRAGMENTS] Static prompt assembled in {assembly_ms:.1f}ms, "
+                f"{len(cached)}/{len(fragment_hits or {})} fragments cached ({', '.join(cached) or 'none'}); "
+                f"process hit rate {hits / lookups if lookups else 0:.0%} ({rates or 'no lookups'})"
+            )
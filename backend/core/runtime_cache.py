@@ -6,11 +6,13 @@ This module provides Redis-based caching for frequently accessed data:
 - Project metadata (sandbox info)
 - Running runs count (concurrent limit checks)
 - Thread count (thread limit checks)
+- Thread LLM messages (process memory, incremental per-turn fetches)
 
 All caches use explicit invalidation on data changes, with TTL as safety net.
 """
 import json
 import time
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 from core.utils.logger import logger
 
@@ -394,3 +396,113 @@ async def invalidate_thread_count_cache(account_id: str) -> None:
     except Exception as e:
         logger.warning(f"Failed to invalidate thread count cache: {e}")
 
+
+
+# ============================================================================
+# THREAD LLM MESSAGE CACHE - Process memory, invalidated via Redis generation
+# Holds parsed, compression-resolved LLM messages per thread plus a created_at
+# watermark, so each turn only fetches rows from around the watermark on.
+# Writers that modify or delete existing messages bump a per-thread generation
+# counter in Redis; a generation mismatch discards the local entry.
+# ============================================================================
+THREAD_MESSAGES_TTL = 600  # 10 minutes - local entries are rebuilt from DB after this
+THREAD_MESSAGES_GEN_TTL = 86400  # 24 hours - generation keys outlive any local entry
+THREAD_MESSAGES_MAX_THREADS = 256
+
+_thread_messages_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _get_thread_messages_gen_key(thread_id: str) -> str:
+    """Generate Redis key for a thread's message cache generation."""
+    return f"thread_messages_gen:{thread_id}"
+
+
+async def get_thread_messages_generation(thread_id: str) -> Optional[str]:
+    """
+    Get the current message cache generation for a thread.
+    Returns None if Redis is unavailable (callers must treat this as a miss).
+    """
+    try:
+        from core.services import redis as redis_service
+        generation = await redis_service.get(_get_thread_messages_gen_key(thread_id))
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+        return generation or "0"
+    except Exception as e:
+        logger.warning(f"Failed to get thread messages generation: {e}")
+        return None
+
+
+def get_cached_thread_messages(thread_id: str, generation: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Get the local message cache entry for a thread if it is still valid.
+
+    Entry keys: generation, entries (list of (message_id, parsed message or None, raw size)),
+    watermark (created_at of newest row), message_ids (every cached message_id),
+    pending (message_id -> row to re-parse after compression), cached_at.
+    """
+    if generation is None:
+        return None
+    entry = _thread_messages_cache.get(thread_id)
+    if not entry:
+        return None
+    if entry['generation'] != generation or time.time() - entry['cached_at'] > THREAD_MESSAGES_TTL:
+        _thread_messages_cache.pop(thread_id, None)
+        return None
+    _thread_messages_cache.move_to_end(thread_id)
+    return entry
+
+
+def set_cached_thread_messages(thread_id: str, entry: Dict[str, Any]) -> None:
+    """Store the local message cache entry for a thread (LRU-bounded)."""
+    _thread_messages_cache[thread_id] = entry
+    _thread_messages_cache.move_to_end(thread_id)
+    while len(_thread_messages_cache) > THREAD_MESSAGES_MAX_THREADS:
+        _thread_messages_cache.popitem(last=False)
+
+
+async def _bump_thread_messages_generation(thread_id: str) -> Optional[str]:
+    from core.services import redis as redis_service
+    key = _get_thread_messages_gen_key(thread_id)
+    generation = await redis_service.incr(key)
+    await redis_service.expire(key, THREAD_MESSAGES_GEN_TTL)
+    return str(generation)
+
+
+async def invalidate_thread_messages_cache(thread_id: str) -> None:
+    """Invalidate cached LLM messages for a thread in every process (message updated/deleted)."""
+    _thread_messages_cache.pop(thread_id, None)
+    try:
+        await _bump_thread_messages_generation(thread_id)
+        logger.debug(f"🗑️ Invalidated thread messages cache: {thread_id}")
+    except Exception as e:
+        logger.warning(f"Failed to invalidate thread messages cache: {e}")
+
+
+async def apply_compressed_thread_messages(compressed: Dict[str, str]) -> None:
+    """
+    Apply freshly saved compression metadata to cached threads.
+
+    Affected local entries keep their watermark; the compressed rows are queued
+    in the entry's 'pending' map for the reader to re-parse. Other processes
+    are invalidated through the generation counter.
+
+    Args:
+        compressed: message_id -> compressed_content
+    """
+    for thread_id, entry in list(_thread_messages_cache.items()):
+        touched = [message_id for message_id, _, _ in entry['entries'] if message_id in compressed]
+        if not touched:
+            continue
+        for message_id in touched:
+            compressed_content = compressed[message_id]
+            entry['pending'][message_id] = {
+                'message_id': message_id,
+                'content': compressed_content,
+                'metadata': {'compressed': True, 'compressed_content': compressed_content},
+            }
+        try:
+            entry['generation'] = await _bump_thread_messages_generation(thread_id)
+        except Exception as e:
+            logger.warning(f"Failed to bump thread messages generation: {e}")
+            _thread_messages_cache.pop(thread_id, None)
@@ -1,17 +1,29 @@
 """
 Docker-based sandbox implementation replacing Daytona.
 Manages on-demand container creation, execution, and cleanup.
+
+docker-py is synchronous, so every Docker call runs on a dedicated bounded
+thread pool (never on the event loop), with a per-container concurrency limit
+so one busy sandbox cannot take all the threads. Attached exec streams, which
+hold a thread for a command's whole lifetime, get a separate bounded pool so
+long-running commands never starve short Docker calls. Per-operation latencies
+are kept in histograms (see get_sandbox_metrics).
 """
 
 import docker
 import asyncio
+import bisect
+import codecs
+import functools
 import uuid
 import os
 import shlex
 import tarfile
 import io
+import threading
 import time
-from typing import Optional, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, List, Iterable, Callable, Awaitable
 from dataclasses import dataclass
 from core.utils.logger import logger
 from core.utils.config import config, Configuration
@@ -26,6 +38,7 @@ class SessionExecuteRequest:
 
 # Docker client singleton
 _docker_client = None
+_docker_host_id: Optional[str] = None
 
 def get_docker_client():
     """Get or create Docker client."""
@@ -42,6 +55,177 @@ def get_docker_client():
     return _docker_client
 
 
+async def get_docker_client_async():
+    """get_docker_client() off the event loop (the first call connects and pings)."""
+    return await run_docker_op("client.connect", get_docker_client)
+
+
+async def get_docker_host_id() -> str:
+    """ID of the Docker daemon this process talks to (stable across restarts of the daemon)."""
+    global _docker_host_id
+    if _docker_host_id is None:
+        client = await get_docker_client_async()
+        info = await run_docker_op("client.info", client.info)
+        _docker_host_id = info["ID"]
+    return _docker_host_id
+
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is +inf)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one sandbox operation."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float, error: bool = False):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile (None for the +inf bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": n for bound, n in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+_docker_executor: Optional[ThreadPoolExecutor] = None
+_stream_executor: Optional[ThreadPoolExecutor] = None
+_container_limits: Dict[str, asyncio.Semaphore] = {}
+_op_latency: Dict[str, LatencyHistogram] = {}
+_in_flight = 0
+
+# Host ports recently handed to new containers (port -> reserved at, monotonic)
+PORT_RESERVATION_SECONDS = 60
+_reserved_ports: Dict[int, float] = {}
+_port_reservation_lock = threading.Lock()
+
+
+def _get_docker_executor() -> ThreadPoolExecutor:
+    global _docker_executor
+    if _docker_executor is None:
+        workers = config.SANDBOX_DOCKER_WORKERS or 32
+        _docker_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docker-sandbox")
+    return _docker_executor
+
+
+def _get_stream_executor() -> ThreadPoolExecutor:
+    global _stream_executor
+    if _stream_executor is None:
+        workers = config.SANDBOX_STREAM_WORKERS or 64
+        _stream_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docker-stream")
+    return _stream_executor
+
+
+def _container_limit(container_id: str) -> asyncio.Semaphore:
+    limit = _container_limits.get(container_id)
+    if limit is None:
+        limit = asyncio.Semaphore(config.SANDBOX_CONTAINER_CONCURRENCY or 8)
+        _container_limits[container_id] = limit
+    return limit
+
+
+async def run_docker_op(op: str, fn: Callable, *args, container_id: Optional[str] = None,
+                        executor: Optional[ThreadPoolExecutor] = None, **kwargs):
+    """
+    Run a blocking docker-py call on the Docker thread pool and record its latency.
+
+    Calls for the same container_id share that container's concurrency limit.
+    `executor` overrides the pool (exec streams use their own, see _get_stream_executor).
+    """
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    limit = _container_limit(container_id) if container_id else None
+    if limit is not None:
+        await limit.acquire()
+    start = time.perf_counter()
+    error = False
+    _in_flight += 1
+    try:
+        return await loop.run_in_executor(executor or _get_docker_executor(), call)
+    except Exception:
+        error = True
+        raise
+    finally:
+        _in_flight -= 1
+        histogram = _op_latency.get(op)
+        if histogram is None:
+            histogram = _op_latency[op] = LatencyHistogram()
+        histogram.observe((time.perf_counter() - start) * 1000, error)
+        if limit is not None:
+            limit.release()
+
+
+def get_sandbox_metrics() -> Dict[str, Any]:
+    """Per-operation latency histograms and pool state for Docker sandbox calls."""
+    return {
+        "docker_workers": _docker_executor._max_workers if _docker_executor else 0,
+        "stream_workers": _stream_executor._max_workers if _stream_executor else 0,
+        "in_flight": _in_flight,
+        "tracked_containers": len(_container_limits),
+        "operations": {op: histogram.snapshot() for op, histogram in sorted(_op_latency.items())},
+    }
+
+
+def _decode_output(output) -> str:
+    return output.decode('utf-8', errors='ignore') if isinstance(output, bytes) else str(output)
+
+
+def _build_files_tar(files: List[Tuple[bytes, str]]) -> bytes:
+    """In-memory tar archive of files, member names relative to / (for put_archive at /)."""
+    tar_stream = io.BytesIO()
+    now = time.time()
+    with tarfile.open(fileobj=tar_stream, mode='w') as tar:
+        for content, container_path in files:
+            tarinfo = tarfile.TarInfo(name=container_path.lstrip('/'))
+            tarinfo.size = len(content)
+            tarinfo.mode = 0o644  # Default file permissions
+            tarinfo.mtime = now
+            tar.addfile(tarinfo, io.BytesIO(content))
+    return tar_stream.getvalue()
+
+
+def _read_files_tar(tar_data: bytes) -> Dict[str, bytes]:
+    """Regular files in a tar archive, by member name."""
+    contents = {}
+    with tarfile.open(fileobj=io.BytesIO(tar_data), mode='r:') as tar:
+        for member in tar:
+            if member.isfile():
+                contents[member.name] = tar.extractfile(member).read()
+    return contents
+
+
 @dataclass
 class DockerSandboxInfo:
     """Information about a Docker sandbox container."""
@@ -65,82 +249,72 @@ class DockerFilesystem:
     
     async def upload_file(self, content: bytes, container_path: str) -> bool:
         """Upload file content to the container using Docker put_archive API."""
+        return await self.upload_files([(content, container_path)])
+    
+    async def upload_files(self, files: List[Tuple[bytes, str]]) -> bool:
+        """
+        Upload many files in one tar stream (a single put_archive call).
+        
+        Args:
+            files: (content, absolute container path) pairs
+        
+        Missing parent directories are created by the archive extraction.
+        put_archive extracts the whole archive or fails, so a True result is
+        the verification; any failure raises.
+        """
+        if not files:
+            return True
+        paths = [path for _, path in files]
+        total = sum(len(content) for content, _ in files)
         try:
-            logger.debug(f"Starting upload_file: path={container_path}, size={len(content)} bytes")
-            
-            # Create directory if needed
-            dirname = os.path.dirname(container_path)
-            if dirname and dirname != '/':
-                logger.debug(f"Creating directory: {dirname}")
-                result = self.sandbox.container.exec_run(
-                    ['mkdir', '-p', dirname],
-                    demux=False
-                )
-                if result.exit_code != 0:
-                    error_output = result.output.decode('utf-8', errors='ignore') if isinstance(result.output, bytes) else str(result.output)
-                    logger.warning(f"Failed to create directory {dirname}: {error_output}")
-            
-            # Get the filename from the path
-            filename = os.path.basename(container_path)
-            logger.debug(f"Filename: {filename}, dirname: {dirname}")
-            
-            # Always use put_archive - it's the most reliable method
-            # Create a tar archive in memory
-            tar_stream = io.BytesIO()
-            with tarfile.open(fileobj=tar_stream, mode='w') as tar:
-                # Create a TarInfo object for the file
-                # The name should be just the filename, not the full path
-                tarinfo = tarfile.TarInfo(name=filename)
-                tarinfo.size = len(content)
-                tarinfo.mode = 0o644  # Default file permissions
-                
-                # Set current time for the file
-                tarinfo.mtime = time.time()
-                
-                # Add the file to the tar archive
-                tar.addfile(tarinfo, io.BytesIO(content))
+            logger.debug(f"Starting upload_files: {len(files)} files, {total} bytes")
             
-            # Reset the stream position
-            tar_stream.seek(0)
-            tar_data = tar_stream.read()
+            # Create a tar archive in memory (off the loop: content can be large)
+            tar_data = await run_docker_op('fs.build_tar', _build_files_tar, files)
             logger.debug(f"Created tar archive: {len(tar_data)} bytes")
             
-            # Upload the tar archive to the container
-            # put_archive extracts the tar to the specified directory
-            # Since our tar contains just "filename", it will be extracted as "dirname/filename"
-            target_dir = dirname if dirname else '/'
-            logger.debug(f"Calling put_archive: target_dir={target_dir}, container_path={container_path}")
-            put_result = self.sandbox.container.put_archive(target_dir, tar_data)
-            logger.debug(f"put_archive result: {put_result}")
-            
+            # Member names are relative to /, so the archive lands at the given paths
+            put_result = await self.sandbox.call('fs.put_archive', self.sandbox.container.put_archive, '/', tar_data)
             if not put_result:
-                raise Exception(f"put_archive returned False for {container_path}")
+                raise Exception(f"put_archive returned False for {', '.join(paths)}")
             
-            # Verify file was created
-            logger.debug(f"Verifying file exists: {container_path}")
-            verify_result = self.sandbox.container.exec_run(
-                ['test', '-f', container_path],
-                demux=False
-            )
-            if verify_result.exit_code != 0:
-                # Try to list files in the directory to debug
-                list_result = self.sandbox.container.exec_run(
-                    ['ls', '-la', dirname if dirname else '/'],
-                    demux=False
-                )
-                list_output = list_result.output.decode('utf-8', errors='ignore') if isinstance(list_result.output, bytes) else str(list_result.output)
-                raise Exception(f"File was not created at {container_path}. Directory contents: {list_output}")
-            
-            logger.info(f"Successfully uploaded file to {container_path} ({len(content)} bytes)")
+            logger.info(f"Successfully uploaded {len(files)} file(s) ({total} bytes): {', '.join(paths[:5])}{' ...' if len(paths) > 5 else ''}")
             return True
         except Exception as e:
-            logger.error(f"Error uploading file {container_path}: {e}", exc_info=True)
+            logger.error(f"Error uploading files {', '.join(paths[:5])}: {e}", exc_info=True)
             raise e
     
+    async def download_files(self, container_paths: List[str]) -> Dict[str, Optional[bytes]]:
+        """
+        Download many files with one exec that streams them back as a tar archive.
+        
+        Symlinks are followed, like cat. Returns a dict of path -> content, with
+        None for paths that are missing or are not regular files.
+        """
+        results: Dict[str, Optional[bytes]] = {path: None for path in container_paths}
+        if not container_paths:
+            return results
+        members = [path.lstrip('/') for path in container_paths]
+        result = await self.sandbox.exec_run(
+            'fs.download_many',
+            ['tar', '-C', '/', '--no-recursion', '--dereference', '--ignore-failed-read', '-cf', '-', '--', *members],
+            demux=True
+        )
+        stdout, stderr = result.output if isinstance(result.output, tuple) else (result.output, None)
+        if stderr:
+            logger.debug(f"download_files: {_decode_output(stderr).strip()}")
+        if not stdout:
+            return results
+        contents = await run_docker_op('fs.read_tar', _read_files_tar, stdout)
+        for path, member in zip(container_paths, members):
+            results[path] = contents.get(member)
+        return results
+    
     async def is_directory(self, container_path: str) -> bool:
         """Check if the path is a directory."""
         try:
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'fs.test',
                 ['test', '-d', container_path],
                 demux=False
             )
@@ -152,7 +326,8 @@ class DockerFilesystem:
     async def is_file(self, container_path: str) -> bool:
         """Check if the path is a file."""
         try:
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'fs.test',
                 ['test', '-f', container_path],
                 demux=False
             )
@@ -168,7 +343,8 @@ class DockerFilesystem:
             if await self.is_directory(container_path):
                 raise Exception(f"Path is a directory, not a file: {container_path}")
             
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'fs.download',
                 ['cat', container_path],
                 demux=False
             )
@@ -191,7 +367,7 @@ class DockerFilesystem:
             
             # Reload container to get latest status
             try:
-                self.sandbox.container.reload()
+                await self.sandbox.call('container.reload', self.sandbox.container.reload)
             except docker.errors.NotFound:
                 logger.error(f"Container {self.sandbox.container.id} not found")
                 return []
@@ -203,7 +379,8 @@ class DockerFilesystem:
                 logger.error(f"Container {self.sandbox.container.id} is not running (status: {self.sandbox.container.status})")
                 return []
             
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'fs.list',
                 ['ls', '-la', path],
                 demux=False
             )
@@ -259,7 +436,8 @@ class DockerFilesystem:
     async def delete_file(self, container_path: str) -> bool:
         """Delete a file from the container."""
         try:
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'fs.delete',
                 ['rm', '-f', container_path],
                 demux=False
             )
@@ -272,17 +450,18 @@ class DockerFilesystem:
         """Create a folder (directory) in the container."""
         try:
             logger.debug(f"Creating folder: {folder_path} with permissions {permissions}")
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'fs.mkdir',
                 ['mkdir', '-p', folder_path],
                 demux=False
             )
             if result.exit_code != 0:
-                error_output = result.output.decode('utf-8', errors='ignore') if isinstance(result.output, bytes) else str(result.output)
-                raise Exception(f"Failed to create folder {folder_path}: {error_output}")
+                raise Exception(f"Failed to create folder {folder_path}: {_decode_output(result.output)}")
             
             # Set permissions if specified
             if permissions:
-                chmod_result = self.sandbox.container.exec_run(
+                chmod_result = await self.sandbox.exec_run(
+                    'fs.chmod',
                     ['chmod', permissions, folder_path],
                     demux=False
                 )
@@ -298,13 +477,13 @@ class DockerFilesystem:
     async def set_file_permissions(self, file_path: str, permissions: str) -> bool:
         """Set file permissions."""
         try:
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'fs.chmod',
                 ['chmod', permissions, file_path],
                 demux=False
             )
             if result.exit_code != 0:
-                error_output = result.output.decode('utf-8', errors='ignore') if isinstance(result.output, bytes) else str(result.output)
-                logger.warning(f"Failed to set permissions {permissions} on file {file_path}: {error_output}")
+                logger.warning(f"Failed to set permissions {permissions} on file {file_path}: {_decode_output(result.output)}")
                 return False
             return True
         except Exception as e:
@@ -337,7 +516,8 @@ class DockerProcess:
             
             # Execute command
             full_cmd = f"cd {shlex.quote(cwd)} && {command}"
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'process.session_command',
                 ['bash', '-lc', full_cmd],
                 demux=True
             )
@@ -370,7 +550,8 @@ class DockerProcess:
     async def exec(self, command: str, timeout: int = 30) -> Any:
         """Execute a command in the container."""
         try:
-            result = self.sandbox.container.exec_run(
+            result = await self.sandbox.exec_run(
+                'process.exec',
                 command if isinstance(command, list) else ['bash', '-lc', command],
                 demux=False,
                 timeout=timeout
@@ -383,6 +564,80 @@ class DockerProcess:
         except Exception as e:
             logger.error(f"Error executing command: {e}")
             raise e
+    
+    async def exec_stream(
+        self,
+        command: str,
+        cwd: str = '/workspace',
+        timeout: Optional[int] = None,
+        on_output: Optional[Callable[[str, str], Awaitable[None]]] = None
+    ) -> int:
+        """
+        Execute a command with an attached exec stream.
+        
+        stdout/stderr are decoded incrementally and passed to on_output(stream, text)
+        as the container produces them; completion is the end of the stream and
+        the exit code comes from exec_inspect (no polling). With a timeout the
+        command runs under coreutils `timeout` inside the container, so it is
+        killed there (exit code 124, or 137 if it ignored SIGTERM).
+        
+        Returns:
+            The command's exit code
+        """
+        cmd = ['bash', '-lc', f"cd {shlex.quote(cwd)} && {command}"]
+        if timeout:
+            cmd = ['timeout', '-k', '5', str(int(timeout))] + cmd
+        api = self.sandbox.container.client.api
+        exec_id = (await self.sandbox.call('process.exec_create', api.exec_create, self.sandbox.container.id, cmd))['Id']
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def pump():
+            decoders = {
+                'stdout': codecs.getincrementaldecoder('utf-8')(errors='replace'),
+                'stderr': codecs.getincrementaldecoder('utf-8')(errors='replace'),
+            }
+            try:
+                for stdout, stderr in api.exec_start(exec_id, stream=True, demux=True):
+                    for name, data in (('stdout', stdout), ('stderr', stderr)):
+                        if data:
+                            text = decoders[name].decode(data)
+                            if text:
+                                loop.call_soon_threadsafe(queue.put_nowait, (name, text))
+                for name, decoder in decoders.items():
+                    text = decoder.decode(b'', final=True)
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, (name, text))
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+        
+        # Holds a thread for the command's lifetime: use the stream pool, not the Docker call pool
+        reader = asyncio.ensure_future(run_docker_op('process.exec_stream', pump, executor=_get_stream_executor()))
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if on_output is not None:
+                    await on_output(*item)
+            await reader
+        finally:
+            if not reader.done():
+                reader.cancel()
+        
+        inspect = await self.sandbox.call('process.exec_inspect', api.exec_inspect, exec_id)
+        return inspect.get('ExitCode')
+
+
+def _put_local_file(container, local_path: str, target_dir: str) -> bool:
+    with open(local_path, 'rb') as f:
+        return container.put_archive(target_dir, f)
+
+
+def _read_archive(container, container_path: str) -> bytes:
+    bits, stat = container.get_archive(container_path)
+    return b"".join(bits)
 
 
 class DockerSandbox:
@@ -395,13 +650,23 @@ class DockerSandbox:
         self.name = container.name
         self.fs = DockerFilesystem(self)  # Add file system interface
         self.process = DockerProcess(self)  # Add process execution interface
+        self.from_pool = False  # Claimed from the pre-warmed pool (see sandbox_pool)
+    
+    async def call(self, op: str, fn: Callable, *args, **kwargs):
+        """Run a blocking docker-py call for this container off the event loop."""
+        return await run_docker_op(op, fn, *args, container_id=self.container.id, **kwargs)
+    
+    async def exec_run(self, op: str, cmd, **kwargs):
+        """container.exec_run() off the event loop, under this container's concurrency limit."""
+        return await self.call(op, self.container.exec_run, cmd, **kwargs)
         
     async def execute_command(self, command: str, cwd: str = "/workspace") -> Dict[str, Any]:
         """Execute a command in the container."""
         try:
             # Create a session-like command execution
             full_cmd = f"cd {shlex.quote(cwd)} && {command}"
-            result = self.container.exec_run(
+            result = await self.exec_run(
+                'process.execute_command',
                 ["bash", "-lc", full_cmd],
                 demux=True
             )
@@ -422,8 +687,7 @@ class DockerSandbox:
         """Upload a file to the container."""
         try:
             # Read file and put to container
-            with open(local_path, 'rb') as f:
-                self.container.put_archive(os.path.dirname(container_path), f)
+            await self.call('fs.put_archive', _put_local_file, self.container, local_path, os.path.dirname(container_path))
             return True
         except Exception as e:
             logger.error(f"Error uploading file to container {self.id}: {e}")
@@ -432,11 +696,7 @@ class DockerSandbox:
     async def download_file(self, container_path: str) -> bytes:
         """Download a file from the container."""
         try:
-            bits, stat = self.container.get_archive(container_path)
-            file_data = b""
-            for chunk in bits:
-                file_data += chunk
-            return file_data
+            return await self.call('fs.get_archive', _read_archive, self.container, container_path)
         except Exception as e:
             logger.error(f"Error downloading file from container {self.id}: {e}")
             raise e
@@ -451,83 +711,96 @@ class DockerSandbox:
         return f"http://localhost:{port}"
 
 
-async def create_sandbox(password: str, project_id: Optional[str] = None) -> Tuple[DockerSandbox, str]:
+def _ensure_image(client, image_name: str):
+    """Make sure the sandbox image exists locally, pulling it if needed (blocking)."""
+    try:
+        logger.info(f"Checking for Docker image: {image_name}")
+        client.images.get(image_name)
+        logger.info(f"Docker image {image_name} found locally")
+    except docker.errors.ImageNotFound:
+        logger.info(f"Image not found locally, attempting to pull {image_name}")
+        try:
+            # Pull with timeout and better error handling
+            pull_start = time.time()
+            pull_timeout = 300  # 5 minutes timeout
+            
+            # Use low-level API for better control
+            pull_result = client.api.pull(
+                image_name,
+                stream=True,
+                decode=True
+            )
+            
+            # Process pull stream
+            last_error = None
+            for line in pull_result:
+                if time.time() - pull_start > pull_timeout:
+                    raise TimeoutError(f"Image pull timeout after {pull_timeout} seconds")
+                
+                if 'error' in line:
+                    last_error = line.get('error', 'Unknown error')
+                    logger.warning(f"Pull error: {last_error}")
+                elif 'status' in line:
+                    status = line.get('status', '')
+                    if 'Downloading' in status or 'Extracting' in status:
+                        progress = line.get('progress', '')
+                        logger.debug(f"Pull progress: {status} {progress}")
+            
+            if last_error:
+                raise Exception(f"Image pull failed: {last_error}")
+            
+            pull_duration = time.time() - pull_start
+            logger.info(f"Successfully pulled {image_name} in {pull_duration:.2f} seconds")
+            
+        except TimeoutError as e:
+            error_msg = f"Timeout pulling Docker image {image_name}. This may be due to network issues. Please try: docker pull {image_name} on the host machine first."
+            logger.error(error_msg)
+            raise Exception(error_msg) from e
+        except Exception as e:
+            error_msg = f"Failed to pull Docker image {image_name}: {e}. Please ensure the image is available or pull it manually: docker pull {image_name}"
+            logger.error(error_msg)
+            raise Exception(error_msg) from e
+
+
+def _remove_containers(client, container_name: str):
+    for c in client.containers.list(filters={'name': container_name}):
+        c.stop()
+        c.remove()
+
+
+async def create_sandbox(password: str, project_id: Optional[str] = None, labels: Optional[Dict[str, str]] = None) -> Tuple[DockerSandbox, str]:
     """
     Create a new Docker container sandbox on-demand.
     
     Args:
         password: VNC password for the sandbox
         project_id: Optional project ID to label the container
+        labels: Optional extra container labels
         
     Returns:
         Tuple of (DockerSandbox wrapper, container_id)
     """
     logger.info(f"Creating new Docker sandbox for project {project_id}")
     
-    client = get_docker_client()
+    client = await get_docker_client_async()
     container_name = f"aurora-sandbox-{uuid.uuid4().hex[:8]}"
     
     try:
         # Pull the image if not exists
         image_name = Configuration.SANDBOX_IMAGE_NAME
-        try:
-            logger.info(f"Checking for Docker image: {image_name}")
-            client.images.get(image_name)
-            logger.info(f"Docker image {image_name} found locally")
-        except docker.errors.ImageNotFound:
-            logger.info(f"Image not found locally, attempting to pull {image_name}")
-            try:
-                # Pull with timeout and better error handling
-                import time
-                pull_start = time.time()
-                pull_timeout = 300  # 5 minutes timeout
-                
-                # Use low-level API for better control
-                pull_result = client.api.pull(
-                    image_name,
-                    stream=True,
-                    decode=True
-                )
-                
-                # Process pull stream
-                last_error = None
-                for line in pull_result:
-                    if time.time() - pull_start > pull_timeout:
-                        raise TimeoutError(f"Image pull timeout after {pull_timeout} seconds")
-                    
-                    if 'error' in line:
-                        last_error = line.get('error', 'Unknown error')
-                        logger.warning(f"Pull error: {last_error}")
-                    elif 'status' in line:
-                        status = line.get('status', '')
-                        if 'Downloading' in status or 'Extracting' in status:
-                            progress = line.get('progress', '')
-                            logger.debug(f"Pull progress: {status} {progress}")
-                
-                if last_error:
-                    raise Exception(f"Image pull failed: {last_error}")
-                
-                pull_duration = time.time() - pull_start
-                logger.info(f"Successfully pulled {image_name} in {pull_duration:.2f} seconds")
-                
-            except TimeoutError as e:
-                error_msg = f"Timeout pulling Docker image {image_name}. This may be due to network issues. Please try: docker pull {image_name} on the host machine first."
-                logger.error(error_msg)
-                raise Exception(error_msg) from e
-            except Exception as e:
-                error_msg = f"Failed to pull Docker image {image_name}: {e}. Please ensure the image is available or pull it manually: docker pull {image_name}"
-                logger.error(error_msg)
-                raise Exception(error_msg) from e
+        await run_docker_op('image.ensure', _ensure_image, client, image_name)
         
         # Find available ports
-        port_6080 = _find_available_port(6080)
-        port_8080 = _find_available_port(8888)  # Changed from 8080 to 8888 to avoid conflicts
-        port_9222 = _find_available_port(9222)
-        port_8004 = _find_available_port(9004)  # Changed from 8004 to 9004 to avoid conflicts with peec_search_model
+        # 8888 instead of 8080 and 9004 instead of 8004 to avoid conflicts (e.g. with peec_search_model)
+        port_6080, port_8080, port_9222, port_8004 = await run_docker_op(
+            'ports.allocate', _find_available_ports, (6080, 8888, 9222, 9004)
+        )
         
         # Create container with port mappings
         # For Ubuntu base image, use a simple keep-alive command and create workspace
-        container = client.containers.run(
+        container = await run_docker_op(
+            'container.create',
+            client.containers.run,
             image_name,
             name=container_name,
             detach=True,
@@ -552,6 +825,7 @@ async def create_sandbox(password: str, project_id: Optional[str] = None) -> Tup
             labels={
                 'project_id': project_id or 'none',
                 'type': 'aurora-sandbox',
+                **(labels or {}),
             },
             restart_policy={'Name': 'unless-stopped'},
             healthcheck={
@@ -574,10 +848,7 @@ async def create_sandbox(password: str, project_id: Optional[str] = None) -> Tup
         logger.error(f"Error creating Docker sandbox: {e}")
         # Clean up on failure
         try:
-            containers = client.containers.list(filters={'name': container_name})
-            for c in containers:
-                c.stop()
-                c.remove()
+            await run_docker_op('container.cleanup', _remove_containers, client, container_name)
         except:
             pass
         raise e
@@ -595,15 +866,15 @@ async def get_or_start_sandbox(container_id: str) -> DockerSandbox:
     """
     logger.info(f"Getting or starting sandbox container {container_id}")
     
-    client = get_docker_client()
+    client = await get_docker_client_async()
     
     try:
-        container = client.containers.get(container_id)
+        container = await run_docker_op('container.get', client.containers.get, container_id)
         
         # Start if stopped
         if container.status != 'running':
             logger.info(f"Starting container {container_id}")
-            container.start()
+            await run_docker_op('container.start', container.start, container_id=container.id)
             await _wait_for_container_ready(container, max_retries=30)
         
         logger.info(f"Sandbox container {container_id} is ready")
@@ -629,19 +900,20 @@ async def delete_sandbox(container_id: str) -> bool:
     """
     logger.info(f"Deleting sandbox container {container_id}")
     
-    client = get_docker_client()
+    client = await get_docker_client_async()
     
     try:
-        container = client.containers.get(container_id)
+        container = await run_docker_op('container.get', client.containers.get, container_id)
         
         # Stop if running
         if container.status == 'running':
             logger.debug(f"Stopping container {container_id}")
-            container.stop(timeout=10)
+            await run_docker_op('container.stop', container.stop, timeout=10)
         
         # Remove container
         logger.debug(f"Removing container {container_id}")
-        container.remove(force=True)
+        await run_docker_op('container.remove', container.remove, force=True)
+        _container_limits.pop(container.id, None)
         
         logger.info(f"Successfully deleted sandbox container {container_id}")
         return True
@@ -654,15 +926,8 @@ async def delete_sandbox(container_id: str) -> bool:
         raise e
 
 
-def _find_available_port(start_port: int, max_attempts: int = 100) -> int:
-    """Find an available port starting from start_port.
-    
-    Checks both 127.0.0.1 and 0.0.0.0 to ensure the port is truly available
-    for Docker port mapping. Also checks Docker containers for port conflicts.
-    """
-    import socket
-    
-    # First, get list of all ports currently in use by Docker
+def _docker_host_ports() -> set:
+    """Host ports currently bound by Docker containers (blocking)."""
     docker_ports = set()
     try:
         client = get_docker_client()
@@ -682,6 +947,40 @@ def _find_available_port(start_port: int, max_attempts: int = 100) -> int:
                 continue
     except Exception as e:
         logger.warning(f"Failed to check Docker containers for port conflicts: {e}")
+    return docker_ports
+
+
+def _find_available_ports(start_ports: Iterable[int], max_attempts: int = 100) -> List[int]:
+    """Find one available port per start port, listing Docker's bound ports only once.
+    
+    Ports handed out are reserved for a short while, so sandboxes created
+    concurrently do not get the same port before their containers bind it.
+    """
+    docker_ports = _docker_host_ports()
+    with _port_reservation_lock:
+        now = time.monotonic()
+        for port, reserved_at in list(_reserved_ports.items()):
+            if now - reserved_at > PORT_RESERVATION_SECONDS:
+                del _reserved_ports[port]
+        ports = []
+        for start_port in start_ports:
+            port = _find_available_port(start_port, max_attempts, docker_ports | set(_reserved_ports))
+            _reserved_ports[port] = now
+            ports.append(port)
+        return ports
+
+
+def _find_available_port(start_port: int, max_attempts: int = 100, docker_ports: Optional[set] = None) -> int:
+    """Find an available port starting from start_port.
+    
+    Checks both 127.0.0.1 and 0.0.0.0 to ensure the port is truly available
+    for Docker port mapping. Also checks Docker containers for port conflicts.
+    """
+    import socket
+    
+    # First, get list of all ports currently in use by Docker
+    if docker_ports is None:
+        docker_ports = _docker_host_ports()
     
     # Now find an available port
     for port in range(start_port, start_port + max_attempts):
@@ -719,10 +1018,12 @@ async def _wait_for_container_ready(container, max_retries: int = 30) -> bool:
     for attempt in range(max_retries):
         try:
             # Check if we can connect to the container
-            container.reload()
+            await run_docker_op('container.reload', container.reload, container_id=container.id)
             
             # Try to ping the container
-            result = container.exec_run("nc -z localhost 5901", demux=True)
+            result = await run_docker_op(
+                'container.ready_check', container.exec_run, "nc -z localhost 5901", demux=True, container_id=container.id
+            )
             if result.exit_code == 0:
                 logger.debug(f"Container {container.id[:12]} is ready (attempt {attempt + 1})")
                 return True
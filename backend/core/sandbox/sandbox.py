@@ -12,6 +12,7 @@ from core.sandbox.docker_sandbox import (
     DockerSandbox,
     get_docker_client
 )
+from core.sandbox.sandbox_pool import sandbox_pool
 from core.utils.logger import logger
 import asyncio
 
@@ -21,6 +22,8 @@ async def create_sandbox(password: str, project_id: str = None):
     """
     Create a new Docker sandbox container on-demand.
     
+    A ready container from the pre-warmed pool is used when one is available.
+    
     Args:
         password: VNC password for the sandbox
         project_id: Optional project ID to label the container
@@ -28,6 +31,9 @@ async def create_sandbox(password: str, project_id: str = None):
     Returns:
         DockerSandbox wrapper object
     """
+    sandbox = await sandbox_pool.claim(project_id)
+    if sandbox is not None:
+        return sandbox
     sandbox, container_id = await _create_sandbox(password, project_id)
     logger.info(f"Sandbox created with ID: {sandbox.id}")
     logger.info(f"Sandbox environment successfully initialized")
@@ -0,0 +1,244 @@
+"""
+Pre-warmed sandbox container pool.
+
+Keeps SANDBOX_POOL_SIZE ready, unassigned containers (image checked, host
+ports allocated and bound, readiness probe passed) so that create_sandbox()
+can hand one out instead of building a container on the first message.
+
+Coordination across API processes and workers goes through Redis. Every key
+is namespaced by the Docker daemon ID, since a pooled container only exists
+on the host that created it:
+- sandbox_pool:{host}:ready         ZSET container_id -> ready-at timestamp;
+                                    ZPOPMIN is the atomic claim
+- sandbox_pool:{host}:project:{id}  which container a project claimed (SET NX), so
+                                    concurrent claims for one project get the same one
+- sandbox_pool:{host}:refill_lock   one refiller per host at a time (SET NX EX with a
+                                    token; released only by its holder)
+
+Containers idle in the pool longer than SANDBOX_POOL_MAX_IDLE_SECONDS are
+recycled (deleted and replaced by the next refill).
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from core.services import redis
+from core.utils.config import config
+from core.utils.logger import logger
+from core.sandbox.docker_sandbox import (
+    DockerSandbox,
+    LatencyHistogram,
+    create_sandbox as create_docker_sandbox,
+    delete_sandbox as delete_docker_sandbox,
+    get_docker_host_id,
+    get_or_start_sandbox as get_docker_sandbox,
+)
+
+POOL_PROJECT_CLAIM_TTL = 600
+POOL_REFILL_INTERVAL_SECONDS = 15
+POOL_REFILL_CONCURRENCY = 2
+POOL_CLAIM_ATTEMPTS = 3
+POOL_LABEL = "aurora-sandbox-pool"
+
+
+# Releases the refill lock only if it still holds our token
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _ready_key(host_id: str) -> str:
+    return f"sandbox_pool:{host_id}:ready"
+
+
+def _refill_lock_key(host_id: str) -> str:
+    return f"sandbox_pool:{host_id}:refill_lock"
+
+
+def _project_claim_key(host_id: str, project_id: str) -> str:
+    return f"sandbox_pool:{host_id}:project:{project_id}"
+
+
+class SandboxPool:
+    """Claims pre-warmed containers and keeps the shared pool topped up."""
+
+    def __init__(self, size: int, max_idle_seconds: int):
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.claim_latency = LatencyHistogram()
+        self._metrics = {
+            "claims": 0,
+            "hits": 0,
+            "misses": 0,
+            "stale_claims": 0,
+            "created": 0,
+            "create_failures": 0,
+            "recycled": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self):
+        """Start the background refill loop in this process (no-op when disabled)."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._refill_loop())
+            logger.info(f"Sandbox pool started (size={self.size}, max idle={self.max_idle_seconds}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def claim(self, project_id: Optional[str]) -> Optional[DockerSandbox]:
+        """
+        Take a ready container from the pool, or None on a miss.
+
+        With a project_id, a second concurrent claim for the same project gets
+        the container the first one took.
+        """
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        self._metrics["claims"] += 1
+        try:
+            sandbox = await self._claim(project_id)
+        except Exception as e:
+            logger.warning(f"Sandbox pool claim failed, falling back to on-demand creation: {e}")
+            sandbox = None
+        self.claim_latency.observe((time.perf_counter() - start) * 1000, error=sandbox is None)
+        self._metrics["hits" if sandbox else "misses"] += 1
+        return sandbox
+
+    async def _claim(self, project_id: Optional[str]) -> Optional[DockerSandbox]:
+        client = await redis.get_client()
+        host_id = await get_docker_host_id()
+        ready_key = _ready_key(host_id)
+        claim_key = _project_claim_key(host_id, project_id) if project_id else None
+        for _ in range(POOL_CLAIM_ATTEMPTS):
+            popped = await client.zpopmin(ready_key, 1)
+            if not popped:
+                return None
+            container_id, ready_at = popped[0]
+
+            if claim_key:
+                claimed = await client.set(claim_key, container_id, nx=True, ex=POOL_PROJECT_CLAIM_TTL)
+                if not claimed:
+                    # Another request for this project won the race: give ours back, use theirs
+                    await client.zadd(ready_key, {container_id: ready_at})
+                    container_id = await client.get(claim_key)
+                    if not container_id:
+                        continue
+
+            try:
+                sandbox = await get_docker_sandbox(container_id)
+            except Exception as e:
+                # Removed or broken while waiting in the pool
+                self._metrics["stale_claims"] += 1
+                logger.warning(f"Discarding stale pooled sandbox {container_id}: {e}")
+                if claim_key:
+                    await client.delete(claim_key)
+                continue
+
+            sandbox.from_pool = True
+            logger.info(f"Claimed pooled sandbox {sandbox.id} for project {project_id}")
+            return sandbox
+        return None
+
+    async def _refill_loop(self):
+        while True:
+            try:
+                await self.refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Sandbox pool refill failed: {e}")
+            await asyncio.sleep(POOL_REFILL_INTERVAL_SECONDS)
+
+    async def refill(self):
+        """Recycle idle containers and create missing ones (one refiller across all processes)."""
+        client = await redis.get_client()
+        host_id = await get_docker_host_id()
+        ready_key = _ready_key(host_id)
+        lock_key = _refill_lock_key(host_id)
+        lock_ttl = POOL_REFILL_INTERVAL_SECONDS * 20
+        token = uuid.uuid4().hex
+        if not await client.set(lock_key, token, nx=True, ex=lock_ttl):
+            return
+        try:
+            await self._recycle_idle(client, ready_key)
+            missing = self.size - await client.zcard(ready_key)
+            if missing <= 0:
+                return
+            logger.debug(f"Sandbox pool refilling {missing} container(s)")
+            semaphore = asyncio.Semaphore(POOL_REFILL_CONCURRENCY)
+
+            async def add_one():
+                async with semaphore:
+                    await self._add_container(client, ready_key)
+
+            await asyncio.gather(*(add_one() for _ in range(missing)))
+        finally:
+            # A refill that outlived the lock TTL must not drop the next refiller's lock
+            await client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+
+    async def _add_container(self, client, ready_key: str):
+        try:
+            sandbox, container_id = await create_docker_sandbox(
+                password="", project_id=None, labels={POOL_LABEL: "true"}
+            )
+        except Exception as e:
+            self._metrics["create_failures"] += 1
+            logger.warning(f"Failed to create pooled sandbox: {e}")
+            return
+        await client.zadd(ready_key, {container_id: time.time()})
+        self._metrics["created"] += 1
+        logger.debug(f"Added sandbox {sandbox.id} to the pool")
+
+    async def _recycle_idle(self, client, ready_key: str):
+        if not self.max_idle_seconds:
+            return
+        stale = await client.zrangebyscore(ready_key, "-inf", time.time() - self.max_idle_seconds)
+        for container_id in stale:
+            # ZREM decides ownership: a container claimed in the meantime is left alone
+            if not await client.zrem(ready_key, container_id):
+                continue
+            try:
+                await delete_docker_sandbox(container_id)
+                self._metrics["recycled"] += 1
+            except Exception as e:
+                logger.warning(f"Failed to recycle idle pooled sandbox {container_id}: {e}")
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        ready = None
+        if self.enabled:
+            try:
+                ready = await (await redis.get_client()).zcard(_ready_key(await get_docker_host_id()))
+            except Exception as e:
+                logger.debug(f"Could not read sandbox pool size: {e}")
+        claims = self._metrics["claims"]
+        return {
+            "enabled": self.enabled,
+            "target_size": self.size,
+            "ready": ready,
+            "hit_rate": round(self._metrics["hits"] / claims, 3) if claims else None,
+            **self._metrics,
+            "claim_latency": self.claim_latency.snapshot(),
+        }
+
+
+sandbox_pool = SandboxPool(
+    size=config.SANDBOX_POOL_SIZE or 0,
+    max_idle_seconds=config.SANDBOX_POOL_MAX_IDLE_SECONDS or 0,
+)
@@ -60,8 +60,10 @@ class SandboxToolsBase(Tool):
                     sandbox_obj = await create_sandbox(sandbox_pass, self.project_id)
                     sandbox_id = sandbox_obj.id
                     
-                    logger.info(f"Waiting 2 seconds for sandbox {sandbox_id} services to initialize...")
-                    await asyncio.sleep(2)
+                    # Pooled sandboxes have been up and ready for a while
+                    if not sandbox_obj.from_pool:
+                        logger.info(f"Waiting 2 seconds for sandbox {sandbox_id} services to initialize...")
+                        await asyncio.sleep(2)
                     
                     # Gather preview links and token (best-effort parsing)
                     try:
@@ -351,6 +351,16 @@ async def xrange(stream_key: str, start: str = '-', end: str = '+', count: int =
     return await redis_client.xrange(stream_key, start, end, count=count)
 
 
+async def xrevrange(stream_key: str, end: str = '+', start: str = '-', count: int = None) -> list:
+    """Read a range of entries from a stream in reverse order (newest first).
+    
+    Returns:
+        List of (message_id, fields) tuples
+    """
+    redis_client = await get_client()
+    return await redis_client.xrevrange(stream_key, end, start, count=count)
+
+
 async def xlen(stream_key: str) -> int:
     """Get the number of entries in a stream."""
     redis_client = await get_client()
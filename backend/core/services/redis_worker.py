@@ -282,6 +282,28 @@ async def batch_publish(channel: str, messages: List[str]):
     return await _with_concurrency_limit(_op())
 
 
+async def stream_publish_batch(
+    stream_key: str,
+    messages: List[str],
+    channel: Optional[str] = None,
+    maxlen: Optional[int] = None,
+    approximate: bool = True,
+    ttl: Optional[int] = None,
+):
+    """XADD (and optionally PUBLISH) a batch of frames in one pipelined round trip."""
+    async def _op():
+        redis_client = await get_client()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for msg in messages:
+                pipe.xadd(stream_key, {'data': msg}, maxlen=maxlen, approximate=approximate)
+                if channel:
+                    pipe.publish(channel, msg)
+            if ttl:
+                pipe.expire(stream_key, ttl)
+            return await pipe.execute()
+    return await _with_concurrency_limit(_op())
+
+
 async def batch_rpush(key: str, values: List[str]):
     async def _op():
         redis_client = await get_client()
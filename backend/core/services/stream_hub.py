@@ -0,0 +1,343 @@
+"""
+In-process fan-out hub for agent run streams.
+
+Holds one reader per (agent run, API process) - a blocking XREAD cursor on
+the run's Redis stream plus a pubsub subscription to its control channel -
+and fans entries out to any number of SSE consumers through bounded
+per-client queues, so Redis connections per process scale with active runs
+rather than with viewers.
+
+- Readers are reference counted: the first consumer of a run starts one, the
+  last one to leave tears it down.
+- A reader's cursor is fixed before subscribe() returns, so a consumer that
+  attaches first and then catches up with read_stream_entries() sees every
+  entry (de-duplicating by stream id).
+- A consumer whose queue fills up is a slow consumer. With the default
+  "disconnect" policy it is detached and told to reconnect (it resumes from
+  its last stream id); with "drop" the frame is dropped for that consumer only.
+- Stored frames may use the compact chunk format (core.utils.stream_protocol);
+  StreamFrameTranslator adapts them to each consumer's negotiated protocol.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from core.utils.logger import logger
+from core.services import redis
+from core.utils.stream_protocol import frame_kind, loads, expand_delta
+
+STREAM_HUB_CLIENT_QUEUE_SIZE = 1024
+STREAM_READ_BLOCK_MS = 5000  # Must stay below the Redis socket timeout
+STREAM_READ_BATCH = 500
+STREAM_CATCHUP_PAGE = 500
+SLOW_CONSUMER_DISCONNECT = "disconnect"
+SLOW_CONSUMER_DROP = "drop"
+
+# Synthetic message telling a consumer to end its stream so the client reconnects and resumes
+RECONNECT_MESSAGE = {"type": "reconnect"}
+
+_MAX_STREAM_SEQ = 2 ** 64 - 1
+
+
+def agent_run_stream_keys(agent_run_id: str) -> Tuple[str, str]:
+    """Redis stream key and control channel for an agent run."""
+    return f"agent_run:{agent_run_id}:stream", f"agent_run:{agent_run_id}:control"
+
+
+def parse_stream_id(entry_id: str) -> Tuple[int, int]:
+    ms, _, seq = entry_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+def is_valid_stream_id(entry_id: Optional[str]) -> bool:
+    if not entry_id:
+        return False
+    ms, sep, seq = entry_id.partition('-')
+    return ms.isdigit() and (not sep or seq.isdigit())
+
+
+def next_stream_id(entry_id: str) -> str:
+    """Smallest stream id strictly after entry_id (exclusive XRANGE start)."""
+    ms, seq = parse_stream_id(entry_id)
+    return f"{ms}-{seq + 1}"
+
+
+def previous_stream_id(entry_id: str) -> Optional[str]:
+    """Largest stream id strictly before entry_id (exclusive XREVRANGE end), None before 0-0."""
+    ms, seq = parse_stream_id(entry_id)
+    if seq:
+        return f"{ms}-{seq - 1}"
+    if ms:
+        return f"{ms - 1}-{_MAX_STREAM_SEQ}"
+    return None
+
+
+async def read_stream_entries(stream_key: str, after_id: Optional[str] = None) -> AsyncIterator[Tuple[str, str]]:
+    """Yield (entry_id, data) for entries after after_id (or all), paging through XRANGE."""
+    start = next_stream_id(after_id) if after_id else '-'
+    while True:
+        entries = await redis.xrange(stream_key, start, '+', count=STREAM_CATCHUP_PAGE)
+        for entry_id, fields in entries:
+            yield entry_id, fields.get('data', '{}')
+        if len(entries) < STREAM_CATCHUP_PAGE:
+            return
+        start = next_stream_id(entries[-1][0])
+
+
+async def find_header_before(stream_key: str, entry_id: str) -> Optional[str]:
+    """Most recent compact header frame at or before entry_id (used when a consumer resumes mid-message)."""
+    end = entry_id
+    while True:
+        entries = await redis.xrevrange(stream_key, end, '-', count=STREAM_CATCHUP_PAGE)
+        for _, fields in entries:
+            data = fields.get('data', '{}')
+            if frame_kind(data) == 'h':
+                return data
+        if len(entries) < STREAM_CATCHUP_PAGE:
+            return None
+        end = previous_stream_id(entries[-1][0])
+        if end is None:
+            return None
+
+
+class StreamFrameTranslator:
+    """
+    Adapts stored frames to one consumer's protocol.
+
+    Compact consumers get stored frames as-is (plus the active header when they
+    join in the middle of a message); legacy consumers get header + delta merged
+    back into full frames. Full frames pass through either way.
+    """
+
+    def __init__(self, stream_key: str, compact: bool = False):
+        self.stream_key = stream_key
+        self.compact = compact
+        self._header_data: Optional[str] = None
+        self._header: Optional[Dict[str, Any]] = None
+
+    def _set_header(self, data: str):
+        self._header_data = data
+        self._header = None if self.compact else loads(data)
+
+    async def translate(self, entry_id: str, data: str) -> List[str]:
+        """Frames to send for a stored entry (may be none, e.g. a header for a legacy consumer)."""
+        kind = frame_kind(data)
+        if kind is None:
+            return [data]
+        if kind == 'h':
+            self._set_header(data)
+            return [data] if self.compact else []
+
+        frames = []
+        if self._header_data is None:
+            header = await find_header_before(self.stream_key, entry_id)
+            if header is None:
+                logger.warning(f"No header frame found for delta {entry_id} in {self.stream_key}, skipping")
+                return []
+            self._set_header(header)
+            if self.compact:
+                frames.append(header)
+        if self.compact:
+            frames.append(data)
+            return frames
+        return [expand_delta(self._header, data)]
+
+
+class StreamSubscriber:
+    """One SSE consumer of a run stream."""
+
+    def __init__(self, agent_run_id: str, maxsize: int):
+        self.agent_run_id = agent_run_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.detached = False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next pubsub message, or None on timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class _RunStream:
+    """The shared stream cursor, control subscription and reader tasks for one agent run."""
+
+    def __init__(self, hub: "AgentRunStreamHub", agent_run_id: str):
+        self.hub = hub
+        self.agent_run_id = agent_run_id
+        self.stream_key, self.control_channel = agent_run_stream_keys(agent_run_id)
+        self.subscribers: Set[StreamSubscriber] = set()
+        self.closed = False
+        self.cursor: Optional[str] = None
+        self._pubsub = None
+        self._tasks: List[asyncio.Task] = []
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def failed(self) -> bool:
+        return any(task.done() for task in self._tasks)
+
+    async def start(self):
+        async with self._start_lock:
+            if self._tasks or self.closed:
+                return
+            # Fix the cursor before returning, so consumers can catch up to it with XRANGE
+            last_entries = await redis.xrevrange(self.stream_key, count=1)
+            self.cursor = last_entries[0][0] if last_entries else '0-0'
+            pubsub = await redis.create_pubsub()
+            await pubsub.subscribe(self.control_channel)
+            self._pubsub = pubsub
+            self._tasks = [
+                asyncio.create_task(self._read_stream()),
+                asyncio.create_task(self._listen_control()),
+            ]
+            self.hub._metrics["readers_started"] += 1
+            logger.debug(f"Stream hub reading {self.stream_key} from {self.cursor} for {self.agent_run_id}")
+
+    async def stop(self):
+        async with self._start_lock:
+            for task in self._tasks:
+                if not task.done():
+                    task.cancel()
+            for task in self._tasks:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            if self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(self.control_channel)
+                    await self._pubsub.close()
+                except Exception as e:
+                    logger.warning(f"Error during pubsub cleanup for {self.agent_run_id}: {e}")
+                self._pubsub = None
+            logger.debug(f"Stream hub released reader for {self.agent_run_id}")
+
+    async def _read_stream(self):
+        try:
+            while True:
+                result = await redis.xread({self.stream_key: self.cursor}, count=STREAM_READ_BATCH, block=STREAM_READ_BLOCK_MS)
+                for _, entries in result or []:
+                    for entry_id, fields in entries:
+                        self.cursor = entry_id
+                        self.dispatch({"type": "entry", "id": entry_id, "data": fields.get('data', '{}')})
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    async def _listen_control(self):
+        try:
+            async for message in self._pubsub.listen():
+                if message and message.get("type") == "message":
+                    data = message.get("data")
+                    if isinstance(data, bytes):
+                        data = data.decode('utf-8')
+                    self.dispatch({"type": "control", "data": data})
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception):
+        logger.warning(f"Stream hub reader error for {self.agent_run_id}: {error}")
+        # Consumers reconnect and resume from their last stream id
+        self.dispatch(RECONNECT_MESSAGE, force=True)
+        asyncio.create_task(self.hub._discard(self))
+
+    def dispatch(self, message: Dict[str, Any], force: bool = False):
+        metrics = self.hub._metrics
+        metrics["frames_received"] += 1
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+                metrics["frames_delivered"] += 1
+                continue
+            except asyncio.QueueFull:
+                pass
+
+            subscriber.dropped += 1
+            metrics["dropped_frames"] += 1
+            if self.hub.slow_consumer_policy == SLOW_CONSUMER_DROP and not force:
+                continue
+
+            # Disconnect: detach the consumer and make the reconnect marker its next message
+            self.subscribers.discard(subscriber)
+            subscriber.detached = True
+            metrics["slow_consumer_disconnects"] += 1
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(RECONNECT_MESSAGE)
+            logger.warning(f"Disconnecting slow stream consumer for {self.agent_run_id} (queue full)")
+
+        if not self.subscribers and not self.closed and not force:
+            asyncio.create_task(self.hub._discard(self))
+
+
+class AgentRunStreamHub:
+    """Per-process registry of shared agent run subscriptions."""
+
+    def __init__(self, client_queue_size: int = STREAM_HUB_CLIENT_QUEUE_SIZE, slow_consumer_policy: str = SLOW_CONSUMER_DISCONNECT):
+        self.client_queue_size = client_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self._streams: Dict[str, _RunStream] = {}
+        self._lock = asyncio.Lock()
+        self._metrics = {
+            "readers_started": 0,
+            "frames_received": 0,
+            "frames_delivered": 0,
+            "dropped_frames": 0,
+            "slow_consumer_disconnects": 0,
+        }
+
+    async def subscribe(self, agent_run_id: str) -> StreamSubscriber:
+        """Attach a consumer to the run, starting the shared reader if needed."""
+        async with self._lock:
+            stream = self._streams.get(agent_run_id)
+            if stream is None or stream.closed:
+                stream = _RunStream(self, agent_run_id)
+                self._streams[agent_run_id] = stream
+            subscriber = StreamSubscriber(agent_run_id, self.client_queue_size)
+            stream.subscribers.add(subscriber)
+
+        try:
+            await stream.start()
+        except Exception:
+            await self.unsubscribe(subscriber)
+            raise
+        return subscriber
+
+    async def unsubscribe(self, subscriber: StreamSubscriber):
+        """Detach a consumer; the last consumer of a run stops its reader."""
+        async with self._lock:
+            stream = self._streams.get(subscriber.agent_run_id)
+            if stream is None:
+                return
+            stream.subscribers.discard(subscriber)
+            if stream.subscribers:
+                return
+            stream.closed = True
+            del self._streams[subscriber.agent_run_id]
+        await stream.stop()
+
+    async def _discard(self, stream: _RunStream):
+        """Tear down a run stream that has failed or lost all consumers."""
+        async with self._lock:
+            if self._streams.get(stream.agent_run_id) is not stream:
+                return
+            if stream.subscribers and not stream.failed:
+                return
+            stream.closed = True
+            del self._streams[stream.agent_run_id]
+        await stream.stop()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "active_runs": len(self._streams),
+            "subscribers": sum(len(s.subscribers) for s in self._streams.values()),
+            **self._metrics,
+        }
+
+
+stream_hub = AgentRunStreamHub()
@@ -0,0 +1,126 @@
+"""
+Coalescing publisher for agent run response streams (worker side).
+
+Frames are queued and flushed in batches: everything that arrives within a
+short window (or until max_batch frames) goes to Redis as one pipeline of
+XADD (+ PUBLISH) commands, instead of one pooled connection and round trip
+per command per chunk.
+
+Flow control: the queue is bounded, so a producer that outruns Redis waits
+in publish() rather than piling up tasks. Frames are only dropped while the
+worker Redis circuit breaker is open or after a flush fails.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from core.utils.logger import logger
+from core.services import redis_worker as redis
+
+PUBLISH_WINDOW_SECONDS = 0.005
+PUBLISH_MAX_BATCH = 64
+PUBLISH_MAX_QUEUE = 2048
+STREAM_TTL_REFRESH_SECONDS = 30.0
+
+_CLOSE = object()
+
+
+class RedisStreamPublisher:
+    """Batches frames for one run's Redis stream (and optional pubsub channel)."""
+
+    def __init__(
+        self,
+        stream_key: str,
+        channel: Optional[str] = None,
+        maxlen: Optional[int] = 10000,
+        stream_ttl: Optional[int] = 3600,
+        window_seconds: float = PUBLISH_WINDOW_SECONDS,
+        max_batch: int = PUBLISH_MAX_BATCH,
+        max_queue: int = PUBLISH_MAX_QUEUE,
+    ):
+        self.stream_key = stream_key
+        self.channel = channel
+        self.maxlen = maxlen
+        self.stream_ttl = stream_ttl
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._last_ttl_refresh = 0.0
+        self.stats = {"frames": 0, "flushes": 0, "commands": 0, "dropped": 0, "producer_waits": 0}
+
+    def start(self) -> "RedisStreamPublisher":
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def publish(self, frame: str):
+        """Queue a frame; waits when the queue is full (backpressure on the producer)."""
+        if not redis.is_redis_healthy():
+            self.stats["dropped"] += 1
+            return
+        if self._queue.full():
+            self.stats["producer_waits"] += 1
+        await self._queue.put(frame)
+
+    async def close(self, timeout: float = 10.0):
+        """Flush everything queued so far and stop the flusher."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.put(_CLOSE), timeout=timeout)
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout flushing stream publisher for {self.stream_key} ({self._queue.qsize()} frames queued)")
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is _CLOSE:
+                break
+            batch: List[str] = [item]
+            deadline = loop.time() + self.window_seconds
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[str]):
+        ttl = None
+        now = time.monotonic()
+        if self.stream_ttl and now - self._last_ttl_refresh >= STREAM_TTL_REFRESH_SECONDS:
+            ttl = self.stream_ttl
+            self._last_ttl_refresh = now
+        try:
+            await redis.stream_publish_batch(
+                self.stream_key, batch, channel=self.channel, maxlen=self.maxlen, ttl=ttl
+            )
+        except Exception as e:
+            self.stats["dropped"] += len(batch)
+            logger.warning(f"Failed to publish {len(batch)} frames to {self.stream_key}: {e}")
+            return
+        self.stats["frames"] += len(batch)
+        self.stats["flushes"] += 1
+        self.stats["commands"] += len(batch) * (2 if self.channel else 1) + (1 if ttl else 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["avg_batch"] = round(stats["frames"] / stats["flushes"], 1) if stats["flushes"] else 0.0
+        return stats
@@ -5,6 +5,7 @@
 """
 
 from typing import Optional, Any, List, Dict
+from collections import OrderedDict
 from datetime import datetime, timezone
 from uuid import UUID
 from core.utils.logger import logger
@@ -30,6 +31,85 @@ class UUIDEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+# PostgreSQL 单条语句最多 32767 个绑定参数
+_MAX_BIND_PARAMS = 32767
+# 无 RETURNING 的纯 INSERT 超过该行数时使用 COPY
+_COPY_THRESHOLD_ROWS = 1000
+
+
+def _prepare_write_value(v: Any) -> Any:
+    """将写入值转换为 asyncpg 可接受的格式（JSON 字段编码、datetime 统一为 UTC）"""
+    if isinstance(v, (dict, list)):
+        # Use custom encoder to handle UUID objects in dicts/lists
+        return json.dumps(v, cls=UUIDEncoder)
+    if isinstance(v, datetime):
+        # asyncpg 需要 offset-aware datetime；统一确保使用 timezone.utc
+        if v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+        if v.tzinfo == timezone.utc:
+            return v
+        return v.astimezone(timezone.utc)
+    return v
+
+
+def _batch_columns(rows: List[Dict[str, Any]]) -> tuple:
+    """每批只检测一次列形状：返回 (按首次出现顺序的列并集, 是否所有行列集合一致)"""
+    columns = list(rows[0].keys())
+    seen = set(columns)
+    uniform = True
+    for row in rows[1:]:
+        if len(row) != len(seen) or any(c not in seen for c in row):
+            uniform = False
+            for c in row:
+                if c not in seen:
+                    seen.add(c)
+                    columns.append(c)
+    return columns, uniform
+
+
+# SQL 文本缓存：按查询结构指纹（操作、表、列、谓词形状、排序）复用已构建的 SQL。
+# SQL 文本保持稳定后，asyncpg 的每连接 prepared statement 缓存即可命中，省去重复的 parse/plan。
+_SQL_CACHE_MAX_SIZE = 2048
+_sql_cache: 'OrderedDict[tuple, str]' = OrderedDict()
+_sql_cache_stats = {'hits': 0, 'misses': 0}
+
+# count='estimated' 时，估算行数低于该值则改用精确计数
+_ESTIMATED_COUNT_EXACT_THRESHOLD = 1000
+# count='exact' 时随行数据一起返回的窗口计数列
+_TOTAL_COUNT_COLUMN = '__total_count'
+
+# 只需要一个绑定参数的过滤操作
+_SINGLE_PARAM_FILTER_OPS = frozenset(('eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike'))
+
+
+def _sql_cache_get(key: tuple) -> Optional[str]:
+    cached = _sql_cache.get(key)
+    if cached is None:
+        _sql_cache_stats['misses'] += 1
+        return None
+    _sql_cache.move_to_end(key)
+    _sql_cache_stats['hits'] += 1
+    return cached
+
+
+def _sql_cache_put(key: tuple, sql: str) -> None:
+    _sql_cache[key] = sql
+    if len(_sql_cache) > _SQL_CACHE_MAX_SIZE:
+        _sql_cache.popitem(last=False)
+
+
+def get_query_cache_stats() -> Dict[str, int]:
+    """返回 SQL 文本缓存的命中/未命中计数"""
+    return {**_sql_cache_stats, 'size': len(_sql_cache)}
+
+
+def clear_query_cache() -> None:
+    """清空 SQL 文本缓存及计数"""
+    _sql_cache.clear()
+    _sql_cache_stats['hits'] = 0
+    _sql_cache_stats['misses'] = 0
+
+
 class PostgresNotBuilder:
     """否定条件构建器 - 用于 not_.is_(), not_.in_() 等"""
     def __init__(self, builder: 'PostgresQueryBuilder'):
@@ -58,6 +138,7 @@ class PostgresQueryBuilder:
         self._schema_name = schema_name
         self._select_fields = '*'
         self._count_mode = None
+        self._head = False
         self._filters: List[tuple] = []
         self._order_by: List[tuple] = []
         self._limit_val: Optional[int] = None
@@ -69,10 +150,21 @@ class PostgresQueryBuilder:
         self._operation = 'select'  # select, insert, update, delete, upsert
         self._data: Any = None
         self._returning = True
+        self._on_conflict: Optional[str] = None
     
-    def select(self, fields: str = '*', count: str = None, **kwargs) -> 'PostgresQueryBuilder':
+    def select(self, fields: str = '*', count: str = None, head: bool = False, **kwargs) -> 'PostgresQueryBuilder':
+        """SELECT 查询
+
+        Args:
+            fields: 查询字段
+            count: 计数方式 - 'exact'（精确，与数据同一条查询返回）、
+                'planned'（基于 pg_class.reltuples / EXPLAIN 的估算）、
+                'estimated'（估算值较小时改用精确计数）
+            head: 只返回计数，不返回行数据
+        """
         self._select_fields = fields
         self._operation = 'select'
+        self._head = head
         if count:
             self._count_mode = count
         return self
@@ -93,6 +185,7 @@ class PostgresQueryBuilder:
         self._operation = 'upsert'
         self._data = data if isinstance(data, list) else [data]
         self._returning = returning != 'minimal'
+        self._on_conflict = on_conflict
         return self
     
     def delete(self, returning: str = 'representation') -> 'PostgresQueryBuilder':
@@ -194,8 +287,55 @@ class PostgresQueryBuilder:
         """返回否定条件构建器"""
         return PostgresNotBuilder(self)
 
+    def _filter_shape(self) -> tuple:
+        """过滤条件的结构指纹（不含具体值），决定 WHERE 子句的 SQL 文本"""
+        shape = []
+        for filter_item in self._filters:
+            op = filter_item[0]
+            if op in ('is', 'is_not'):
+                shape.append((op, filter_item[1], filter_item[2] is None))
+            elif op in ('in', 'not_in'):
+                shape.append((op, filter_item[1], len(filter_item[2]) if filter_item[2] else 0))
+            elif op == 'jsonb_eq':
+                shape.append((op, filter_item[1], filter_item[2]))
+            else:
+                shape.append((op, filter_item[1]))
+        return tuple(shape)
+
+    def _collect_where_params(self) -> List[Any]:
+        """按 WHERE 子句占位符顺序收集绑定参数"""
+        params = []
+        for filter_item in self._filters:
+            op = filter_item[0]
+            if op in _SINGLE_PARAM_FILTER_OPS:
+                params.append(filter_item[2])
+            elif op in ('is', 'is_not'):
+                if filter_item[2] is not None:
+                    params.append(filter_item[2])
+            elif op in ('in', 'not_in'):
+                if filter_item[2]:
+                    params.extend(filter_item[2])
+            elif op in ('contains', 'contained_by'):
+                value = filter_item[2]
+                params.append(json.dumps(value) if not isinstance(value, str) else value)
+            elif op == 'jsonb_eq':
+                params.append(filter_item[3])
+        return params
+
     def _build_where_clause(self) -> tuple:
-        """构建 WHERE 子句和参数"""
+        """构建 WHERE 子句和参数（SQL 文本按过滤条件形状缓存）"""
+        if not self._filters:
+            return '', []
+        
+        key = ('where', self._filter_shape())
+        where_clause = _sql_cache_get(key)
+        if where_clause is None:
+            where_clause, _ = self._render_where_clause()
+            _sql_cache_put(key, where_clause)
+        return where_clause, self._collect_where_params()
+
+    def _render_where_clause(self) -> tuple:
+        """生成 WHERE 子句文本和参数"""
         if not self._filters:
             return '', []
         
@@ -341,38 +481,66 @@ class PostgresQueryBuilder:
 
     async def _execute_select(self, conn) -> PostgresQueryResult:
         """执行 SELECT 查询"""
-        fields = self._format_select_fields()
         where_clause, params = self._build_where_clause()
         
-        # 构建基础查询 - 使用 schema.table 格式
-        full_table_name = f'"{self._schema_name}"."{self._table_name}"'
-        query = f'SELECT {fields} FROM {full_table_name}{where_clause}'
-        
-        # 添加排序
-        if self._order_by:
-            order_parts = [f'"{col}" {"DESC" if desc else "ASC"}' for col, desc in self._order_by]
-            query += ' ORDER BY ' + ', '.join(order_parts)
-        
-        # 添加分页
+        # 分页值作为绑定参数传入，使不同页的查询共享同一条 SQL 文本 / prepared statement
         if self._range_start is not None and self._range_end is not None:
-            query += f' LIMIT {self._range_end - self._range_start + 1} OFFSET {self._range_start}'
+            paging = [('LIMIT', int(self._range_end - self._range_start + 1)), ('OFFSET', int(self._range_start))]
         else:
-            if self._limit_val is not None:
-                query += f' LIMIT {self._limit_val}'
-            if self._offset_val is not None:
-                query += f' OFFSET {self._offset_val}'
+            paging = [
+                (keyword, int(value))
+                for keyword, value in (('LIMIT', self._limit_val), ('OFFSET', self._offset_val))
+                if value is not None
+            ]
+        
+        if self._head:
+            # 只需要计数：跳过行数据的读取和物化
+            count = await self._fetch_count(conn, where_clause, params, self._count_mode or 'exact')
+            return PostgresQueryResult(data=[], count=count)
+        
+        # 精确计数通过 count(*) OVER() 与数据在同一条查询中返回
+        window_count = self._count_mode == 'exact'
+        key = (
+            'select', self._schema_name, self._table_name, self._select_fields, window_count,
+            where_clause, tuple(self._order_by), tuple(keyword for keyword, _ in paging),
+        )
+        query = _sql_cache_get(key)
+        if query is None:
+            fields = self._format_select_fields()
+            if window_count:
+                fields += f', count(*) OVER() AS "{_TOTAL_COUNT_COLUMN}"'
+            # 构建基础查询 - 使用 schema.table 格式
+            full_table_name = f'"{self._schema_name}"."{self._table_name}"'
+            query = f'SELECT {fields} FROM {full_table_name}{where_clause}'
+            
+            # 添加排序
+            if self._order_by:
+                order_parts = [f'"{col}" {"DESC" if desc else "ASC"}' for col, desc in self._order_by]
+                query += ' ORDER BY ' + ', '.join(order_parts)
+            
+            # 添加分页
+            for i, (keyword, _) in enumerate(paging):
+                query += f' {keyword} ${len(params) + i + 1}'
+            _sql_cache_put(key, query)
         
         # 执行查询
-        rows = await conn.fetch(query, *params)
+        rows = await conn.fetch(query, *params, *(value for _, value in paging))
         data = [dict(row) for row in rows]
         
         # 如果需要计数
         count = len(data)
-        if self._count_mode == 'exact':
-            full_table_name = f'"{self._schema_name}"."{self._table_name}"'
-            count_query = f'SELECT COUNT(*) FROM {full_table_name}{where_clause}'
-            count_result = await conn.fetchval(count_query, *params)
-            count = count_result or 0
+        if window_count:
+            if data:
+                count = data[0][_TOTAL_COUNT_COLUMN] or 0
+                for row in data:
+                    row.pop(_TOTAL_COUNT_COLUMN, None)
+            elif self._range_start or self._offset_val:
+                # 偏移超出结果范围时窗口计数不可用，单独计数
+                count = await self._fetch_count(conn, where_clause, params, 'exact')
+            else:
+                count = 0
+        elif self._count_mode in ('planned', 'estimated'):
+            count = await self._fetch_count(conn, where_clause, params, self._count_mode)
         
         # 处理 single/maybe_single
         if self._single:
@@ -384,68 +552,126 @@ class PostgresQueryBuilder:
         
         return PostgresQueryResult(data=data, count=count)
 
+    async def _fetch_count(self, conn, where_clause: str, params: List[Any], count_mode: str) -> int:
+        """按计数方式获取行数：exact 为 COUNT(*)，planned/estimated 使用统计信息估算"""
+        full_table_name = f'"{self._schema_name}"."{self._table_name}"'
+        
+        if count_mode in ('planned', 'estimated'):
+            estimate = await self._fetch_planned_count(conn, full_table_name, where_clause, params)
+            if estimate is not None and (count_mode == 'planned' or estimate >= _ESTIMATED_COUNT_EXACT_THRESHOLD):
+                return estimate
+        
+        key = ('count', full_table_name, where_clause)
+        count_query = _sql_cache_get(key)
+        if count_query is None:
+            count_query = f'SELECT COUNT(*) FROM {full_table_name}{where_clause}'
+            _sql_cache_put(key, count_query)
+        count_result = await conn.fetchval(count_query, *params)
+        return count_result or 0
+
+    async def _fetch_planned_count(self, conn, full_table_name: str, where_clause: str, params: List[Any]) -> Optional[int]:
+        """估算行数：无过滤条件时读 pg_class.reltuples，否则取 EXPLAIN 的计划行数"""
+        try:
+            if not where_clause:
+                reltuples = await conn.fetchval(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass($1)', full_table_name
+                )
+                # reltuples 为 -1 表示表尚未 ANALYZE
+                if reltuples is not None and reltuples >= 0:
+                    return int(reltuples)
+            
+            plan = await conn.fetchval(f'EXPLAIN (FORMAT JSON) SELECT 1 FROM {full_table_name}{where_clause}', *params)
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        except Exception as e:
+            logger.debug(f"Planned count unavailable for {self._table_name}, falling back to exact: {e}")
+            return None
+
     async def _execute_insert(self, conn) -> PostgresQueryResult:
-        """执行 INSERT 查询"""
+        """执行 INSERT 查询（多行数据合并为一条语句批量写入）"""
         if not self._data:
             return PostgresQueryResult(data=[], count=0)
+        return await self._execute_bulk_write(conn, self._data)
+
+    def _build_bulk_write_query(self, columns: List[str], rows: List[Dict[str, Any]], conflict_columns: Optional[List[str]]) -> tuple:
+        """构建多行 INSERT（可选 ON CONFLICT）语句，缺失的列使用 DEFAULT"""
+        full_table_name = f'"{self._schema_name}"."{self._table_name}"'
+        col_names = ', '.join(f'"{c}"' for c in columns)
         
-        results = []
-        for row in self._data:
-            columns = list(row.keys())
-            values = list(row.values())
-            
-            # 处理 JSON 字段和 datetime 对象
-            processed_values = []
-            for v in values:
-                if isinstance(v, (dict, list)):
-                    # Use custom encoder to handle UUID objects in dicts/lists
-                    processed_values.append(json.dumps(v, cls=UUIDEncoder))
-                elif isinstance(v, datetime):
-                    # asyncpg 需要 offset-aware datetime；统一确保使用 timezone.utc
-                    if v.tzinfo is None:
-                        # Naive datetime - 添加 UTC timezone
-                        processed_values.append(v.replace(tzinfo=timezone.utc))
-                    elif v.tzinfo == timezone.utc:
-                        # 已经是 UTC timezone.utc,直接使用
-                        processed_values.append(v)
-                    else:
-                        # 其他 timezone - 转换为 UTC 并替换 tzinfo 为 timezone.utc
-                        utc_time = v.astimezone(timezone.utc)
-                        # 重新创建 datetime 对象,使用标准的 timezone.utc
-                        processed_values.append(datetime(
-                            utc_time.year, utc_time.month, utc_time.day,
-                            utc_time.hour, utc_time.minute, utc_time.second,
-                            utc_time.microsecond, tzinfo=timezone.utc
-                        ))
+        params = []
+        value_groups = []
+        for row in rows:
+            slots = []
+            for c in columns:
+                if c in row:
+                    params.append(_prepare_write_value(row[c]))
+                    slots.append(f'${len(params)}')
                 else:
-                    processed_values.append(v)
-            
-            col_names = ', '.join(f'"{c}"' for c in columns)
-            placeholders = ', '.join(f'${i+1}' for i in range(len(columns)))
-            
-            full_table_name = f'"{self._schema_name}"."{self._table_name}"'
-            query = f'INSERT INTO {full_table_name} ({col_names}) VALUES ({placeholders})'
-            if self._returning:
-                query += ' RETURNING *'
-            
-            # 调试日志: 输出所有参数的类型和值
-            for i, (col, val) in enumerate(zip(columns, processed_values)):
-                if isinstance(val, datetime):
-                    logger.debug(
-                        f"Param ${i+1} ({col}): type={type(val).__name__}, "
-                        f"value={val}, tzinfo={val.tzinfo}, "
-                        f"tzinfo_type={type(val.tzinfo).__name__ if val.tzinfo else 'None'}"
-                    )
-            
-            if self._returning:
-                result = await conn.fetchrow(query, *processed_values)
-                if result:
-                    results.append(dict(result))
+                    slots.append('DEFAULT')
+            value_groups.append(f'({", ".join(slots)})')
+        
+        query = f'INSERT INTO {full_table_name} ({col_names}) VALUES {", ".join(value_groups)}'
+        if conflict_columns is not None:
+            query += self._build_on_conflict_clause(columns, conflict_columns)
+        if self._returning:
+            query += ' RETURNING *'
+        return query, params
+
+    def _build_on_conflict_clause(self, columns: List[str], conflict_columns: List[str]) -> str:
+        """构建 ON CONFLICT ... DO UPDATE 子句"""
+        conflict_target = ', '.join(f'"{c}"' for c in conflict_columns)
+        update_columns = [c for c in columns if c not in conflict_columns]
+        if not update_columns:
+            return f' ON CONFLICT ({conflict_target}) DO NOTHING'
+        update_parts = ', '.join(f'"{c}" = EXCLUDED."{c}"' for c in update_columns)
+        return f' ON CONFLICT ({conflict_target}) DO UPDATE SET {update_parts}'
+
+    async def _execute_bulk_write(self, conn, rows: List[Dict[str, Any]], conflict_columns: Optional[List[str]] = None) -> PostgresQueryResult:
+        """批量写入：需要 RETURNING 时用多行 VALUES，否则用 executemany / COPY"""
+        columns, uniform = _batch_columns(rows)
+        logger.debug(
+            f"Bulk {'upsert' if conflict_columns is not None else 'insert'} into {self._table_name}: "
+            f"{len(rows)} rows, {len(columns)} columns, uniform={uniform}"
+        )
+        
+        if not self._returning and uniform:
+            records = [tuple(_prepare_write_value(row[c]) for c in columns) for row in rows]
+            if conflict_columns is None and len(records) >= _COPY_THRESHOLD_ROWS:
+                await conn.copy_records_to_table(
+                    self._table_name, records=records, columns=columns, schema_name=self._schema_name
+                )
             else:
-                await conn.execute(query, *processed_values)
+                full_table_name = f'"{self._schema_name}"."{self._table_name}"'
+                col_names = ', '.join(f'"{c}"' for c in columns)
+                placeholders = ', '.join(f'${i+1}' for i in range(len(columns)))
+                query = f'INSERT INTO {full_table_name} ({col_names}) VALUES ({placeholders})'
+                if conflict_columns is not None:
+                    query += self._build_on_conflict_clause(columns, conflict_columns)
+                await conn.executemany(query, records)
+            return PostgresQueryResult(data=[], count=0)
+        
+        # 按绑定参数上限切分批次
+        rows_per_statement = max(1, _MAX_BIND_PARAMS // max(1, len(columns)))
+        if len(rows) <= rows_per_statement:
+            results = await self._run_bulk_write(conn, columns, rows, conflict_columns)
+        else:
+            # 多条语句时放在一个事务中保证原子性
+            results = []
+            async with conn.transaction():
+                for i in range(0, len(rows), rows_per_statement):
+                    results.extend(await self._run_bulk_write(conn, columns, rows[i:i + rows_per_statement], conflict_columns))
         
         return PostgresQueryResult(data=results, count=len(results))
 
+    async def _run_bulk_write(self, conn, columns: List[str], rows: List[Dict[str, Any]], conflict_columns: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """执行一条多行写入语句"""
+        query, params = self._build_bulk_write_query(columns, rows, conflict_columns)
+        if self._returning:
+            return [dict(r) for r in await conn.fetch(query, *params)]
+        await conn.execute(query, *params)
+        return []
+
     async def _execute_update(self, conn) -> PostgresQueryResult:
         """执行 UPDATE 查询"""
         if not self._data:
@@ -509,55 +735,56 @@ class PostgresQueryBuilder:
             return PostgresQueryResult(data=[], count=count)
 
     async def _execute_upsert(self, conn) -> PostgresQueryResult:
-        """执行 UPSERT (INSERT ON CONFLICT UPDATE) 查询"""
+        """执行 UPSERT (INSERT ON CONFLICT UPDATE) 查询（多行数据合并为一条语句批量写入）"""
         if not self._data:
             return PostgresQueryResult(data=[], count=0)
         
-        results = []
-        for row in self._data:
-            columns = list(row.keys())
-            values = list(row.values())
-            
-            # 处理 JSON 字段和 datetime 对象
-            processed_values = []
-            for v in values:
-                if isinstance(v, (dict, list)):
-                    # Use custom encoder to handle UUID objects in dicts/lists
-                    processed_values.append(json.dumps(v, cls=UUIDEncoder))
-                elif isinstance(v, datetime):
-                    # asyncpg 要求 datetime 必须是 offset-aware 的
-                    if v.tzinfo is None:
-                        # 如果是 offset-naive，直接替换为 UTC 时区
-                        processed_values.append(v.replace(tzinfo=timezone.utc))
-                    else:
-                        # 如果已经有时区，保持原样
-                        processed_values.append(v)
-                else:
-                    processed_values.append(v)
-            
-            col_names = ', '.join(f'"{c}"' for c in columns)
-            placeholders = ', '.join(f'${i+1}' for i in range(len(columns)))
-            
+        if self._on_conflict:
+            conflict_columns = [c.strip() for c in self._on_conflict.split(',') if c.strip()]
+        else:
             # 假设第一个字段是主键
-            pk = columns[0]
-            update_parts = ', '.join(f'"{c}" = EXCLUDED."{c}"' for c in columns[1:])
-            
-            full_table_name = f'"{self._schema_name}"."{self._table_name}"'
-            query = f'''
-                INSERT INTO {full_table_name} ({col_names}) 
-                VALUES ({placeholders})
-                ON CONFLICT ("{pk}") DO UPDATE SET {update_parts}
-            '''
-            if self._returning:
-                query += ' RETURNING *'
-            
-            if self._returning:
-                result = await conn.fetchrow(query, *processed_values)
-                if result:
-                    results.append(dict(result))
-            else:
-                await conn.execute(query, *processed_values)
+            conflict_columns = [next(iter(self._data[0].keys()))]
+        
+        # 同一条语句中不能两次更新同一行：按冲突键合并，后出现的列覆盖先出现的列
+        # （与逐行执行的结果一致：每次 upsert 只更新该行提供的列）
+        # 缺少冲突键（或为 NULL）的行不会发生冲突，不参与合并
+        merged: Dict[tuple, Dict[str, Any]] = {}
+        for index, row in enumerate(self._data):
+            if any(row.get(c) is None for c in conflict_columns):
+                merged[('__no_conflict_key', index)] = row
+                continue
+            key = tuple(str(row.get(c)) for c in conflict_columns)
+            merged[key] = {**merged.pop(key, {}), **row}
+        rows = list(merged.values())
+        
+        # 按列集合分组：缺失列在 VALUES 中为 DEFAULT，而 DO UPDATE SET 覆盖全部列，
+        # 混在一条语句里冲突时会把已有值改成默认值（逐行 upsert 只更新该行提供的列）
+        groups: Dict[frozenset, List[int]] = {}
+        for position, row in enumerate(rows):
+            groups.setdefault(frozenset(row.keys()), []).append(position)
+        
+        if len(groups) == 1:
+            return await self._execute_bulk_write(conn, rows, conflict_columns)
         
+        # 分组执行后按输入顺序还原。全部列都是冲突键的分组使用 DO NOTHING，
+        # RETURNING 只返回实际插入的行，因此按冲突键值匹配，而不是按位置对齐；
+        # 缺少冲突键的行（总会插入）按出现顺序匹配
+        returned: Dict[int, Dict[str, Any]] = {}
+        async with conn.transaction():
+            for positions in groups.values():
+                group_result = await self._execute_bulk_write(conn, [rows[i] for i in positions], conflict_columns)
+                keyed = {
+                    tuple(str(rows[i].get(c)) for c in conflict_columns): i
+                    for i in positions if all(rows[i].get(c) is not None for c in conflict_columns)
+                }
+                unkeyed = iter([i for i in positions if any(rows[i].get(c) is None for c in conflict_columns)])
+                for record in group_result.data:
+                    position = keyed.pop(tuple(str(record.get(c)) for c in conflict_columns), None)
+                    if position is None:
+                        position = next(unkeyed, None)
+                    if position is not None:
+                        returned[position] = record
+        results = [returned[i] for i in sorted(returned)]
         return PostgresQueryResult(data=results, count=len(results))
 
 
@@ -5,6 +5,7 @@ Provides:
 - Active worker count from Redis (Dramatiq worker registry)
 - Worker thread utilization (busy vs idle threads)
 - Worker health/heartbeat tracking
+- Tool result cache hit rates (shared counters in Redis)
 - CloudWatch publishing for monitoring
 """
 import asyncio
@@ -46,9 +47,11 @@ async def get_worker_metrics() -> dict:
     - In-progress tasks: dramatiq:__acks__.{worker_id}.{queue_name} (sets of message IDs)
     
     Returns:
-        dict with active_workers, busy_threads, idle_threads, utilization, etc.
+        dict with active_workers, busy_threads, idle_threads, utilization,
+        tool_result_cache hit rates, etc.
     """
     from core.services import redis
+    from core.agentpress.tool_result_cache import get_tool_result_cache_stats
     import time
     
     try:
@@ -143,6 +146,7 @@ async def get_worker_metrics() -> dict:
             "threads_per_worker_task": THREADS_PER_WORKER_TASK,
             "worker_details": worker_details,
             "heartbeat_timeout_seconds": heartbeat_timeout_ms / 1000,
+            "tool_result_cache": await get_tool_result_cache_stats(),
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
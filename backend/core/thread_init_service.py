@@ -184,6 +184,9 @@ async def create_thread_optimistically(
                     await client.table('messages').update({
                         "content": {"role": "user", "content": message_content}
                     }).eq('thread_id', thread_id).eq('role', 'user').order('created_at', desc=False).limit(1).execute()
+                    
+                    from core.runtime_cache import invalidate_thread_messages_cache
+                    await invalidate_thread_messages_cache(thread_id)
                     logger.info(f"✅ Successfully uploaded files and updated message for thread {thread_id}")
                 else:
                     logger.warning(f"No sandbox created for thread {thread_id}, files will not be uploaded")
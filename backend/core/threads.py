@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends, Form, Query, Body, Request
 from core.utils.auth_utils import verify_and_get_user_id_from_jwt, verify_and_authorize_thread_access, require_thread_access, AuthorizedThreadAccess, get_optional_user_id
+from core.utils.access_cache import invalidate_project_access, invalidate_thread_access
 from core.utils.logger import logger
 from core.sandbox.sandbox import create_sandbox, delete_sandbox
 from core.utils.config import config, EnvMode
@@ -69,7 +70,7 @@ async def get_user_threads(
         offset = (page - 1) * limit
         
         # Optimized count query - only count, don't select columns
-        count_result = await client.table('threads').select('thread_id', count='exact').eq('account_id', user_id).execute()
+        count_result = await client.table('threads').select('thread_id', count='exact', head=True).eq('account_id', user_id).execute()
         total_count = count_result.count or 0
         
         if total_count == 0:
@@ -302,7 +303,7 @@ async def get_thread(
                     
                     asyncio.create_task(start_sandbox_background())
         
-        message_count_result = await client.table('messages').select('message_id', count='exact').eq('thread_id', thread_id).execute()
+        message_count_result = await client.table('messages').select('message_id', count='exact', head=True).eq('thread_id', thread_id).execute()
         message_count = message_count_result.count if message_count_result.count is not None else 0
         
         agent_runs_result = await client.table('agent_runs').select('*').eq('thread_id', thread_id).order('created_at', desc=True).execute()
@@ -677,6 +678,9 @@ async def delete_message(
     await verify_and_authorize_thread_access(client, thread_id, user_id)
     try:
         await client.table('messages').delete().eq('message_id', message_id).eq('is_llm_message', True).eq('thread_id', thread_id).execute()
+        
+        from core.runtime_cache import invalidate_thread_messages_cache
+        await invalidate_thread_messages_cache(thread_id)
         return {"message": "Message deleted successfully"}
     except Exception as e:
         logger.error(f"Error deleting message {message_id} from thread {thread_id}: {str(e)}")
@@ -729,6 +733,7 @@ async def update_thread(
                 await client.table('projects').update({
                     'is_public': is_public
                 }).eq('project_id', project_id).execute()
+                await invalidate_project_access(project_id)
         
         if thread_update_data:
             thread_update = await client.table('threads').update(thread_update_data).eq('thread_id', thread_id).execute()
@@ -858,6 +863,8 @@ async def delete_thread(
         if not thread_delete_result.data:
             raise HTTPException(status_code=500, detail="Failed to delete thread")
         
+        await invalidate_thread_access(thread_id)
+        
         # Invalidate thread count cache for this user
         try:
             from core.runtime_cache import invalidate_thread_count_cache
@@ -875,6 +882,7 @@ async def delete_thread(
                 await invalidate_project_cache(project_id)
             except Exception:
                 pass
+            await invalidate_project_access(project_id)
         
         logger.debug(f"Successfully deleted thread {thread_id} and all associated data")
         return {"message": "Thread deleted successfully", "thread_id": thread_id}
@@ -1,4 +1,4 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, execution_hints
 from core.agentpress.thread_manager import ThreadManager
 from core.sandbox.tool_base import SandboxToolsBase
 from core.utils.logger import logger
@@ -377,6 +377,7 @@ class BrowserTool(SandboxToolsBase):
 
     # Core Functions Only
     
+    @execution_hints(writes=["browser"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -399,6 +400,7 @@ class BrowserTool(SandboxToolsBase):
         logger.debug(f"Browser navigating to: {url}")
         return await self._execute_stagehand_api("navigate", {"url": url})
     
+    @execution_hints(writes=["browser"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -439,6 +441,7 @@ class BrowserTool(SandboxToolsBase):
             params["filePath"] = filePath
         return await self._execute_stagehand_api("act", params)
     
+    @execution_hints(writes=["browser"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -467,6 +470,7 @@ class BrowserTool(SandboxToolsBase):
         params = {"instruction": instruction, "iframes": iframes}
         return await self._execute_stagehand_api("extract", params)
     
+    @execution_hints(writes=["browser"])
     @openapi_schema({
         "type": "function",
         "function": {
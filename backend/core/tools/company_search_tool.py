@@ -5,7 +5,7 @@ import json
 from decimal import Decimal
 from exa_py import Exa
 from exa_py.websets.types import CreateWebsetParameters, CreateEnrichmentParameters
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, result_cache
 from core.utils.config import config, EnvMode
 from core.utils.logger import logger
 from core.agentpress.thread_manager import ThreadManager
@@ -92,6 +92,7 @@ class CompanySearchTool(Tool):
         logger.info(f"Credit deduction skipped for company search ({num_results} results) - billing disabled")
         return True
 
+    @result_cache(ttl_seconds=86400, scope="account")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -1,7 +1,7 @@
 import json
 from typing import Union, Dict, Any
 
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, result_cache
 from core.tools.data_providers.LinkedinProvider import LinkedinProvider
 from core.tools.data_providers.YahooFinanceProvider import YahooFinanceProvider
 from core.tools.data_providers.AmazonProvider import AmazonProvider
@@ -99,6 +99,7 @@ class DataProvidersTool(Tool):
                 simplified_message += "..."
             return self.fail_response(simplified_message)
 
+    @result_cache(ttl_seconds=900, scope="account")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -1,8 +1,15 @@
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, execution_hints
 from core.agentpress.thread_manager import ThreadManager
-from typing import List
+from typing import List, Optional
 import json
 
+def _mcp_server_key(arguments: dict) -> Optional[str]:
+    # MCP tool names are prefixed with their toolkit (GMAIL_SEND_MESSAGE -> gmail)
+    tool_name = arguments.get("tool_name")
+    if not isinstance(tool_name, str) or not tool_name:
+        return None
+    return f"mcp:{tool_name.split('_', 1)[0].lower()}"
+
 @tool_metadata(
     display_name="Internal Utilities",
     description="Internal tool loading, MCP integration, and message expansion",
@@ -112,6 +119,7 @@ class ExpandMessageTool(Tool):
     async def discover_mcp_tools(self, filter: str) -> ToolResult:
         return await self._discover_tools(filter)
 
+    @execution_hints(writes=[_mcp_server_key])
     @openapi_schema({
         "type": "function", 
         "function": {
@@ -1,5 +1,5 @@
 from typing import List, Optional, Union
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, execution_hints
 from core.utils.logger import logger
 
 @tool_metadata(
@@ -50,6 +50,7 @@ class MessageTool(Tool):
     def __init__(self):
         super().__init__()
 
+    @execution_hints(exclusive=True)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -88,6 +89,7 @@ class MessageTool(Tool):
         except Exception as e:
             return self.fail_response(f"Error asking user: {str(e)}")
 
+    @execution_hints(exclusive=True)
     @openapi_schema({
         "type": "function",
         "function": {
@@ -3,7 +3,7 @@ import asyncio
 import json
 import aiohttp
 import time
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, result_cache
 from core.utils.config import config
 from core.utils.logger import logger
 from core.agentpress.thread_manager import ThreadManager
@@ -110,6 +110,7 @@ class PaperSearchTool(Tool):
             
             raise Exception(f"Failed after {max_retries} attempts")
     
+    @result_cache(ttl_seconds=86400, scope="global")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -254,6 +255,7 @@ class PaperSearchTool(Tool):
             logger.error(f"Paper search failed: {repr(e)}", exc_info=True)
             return self.fail_response(f"An error occurred during the paper search: {str(e)}")
     
+    @result_cache(ttl_seconds=86400, scope="global")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -410,6 +412,7 @@ class PaperSearchTool(Tool):
             logger.error(f"Get paper details failed: {repr(e)}", exc_info=True)
             return self.fail_response(f"An error occurred while fetching paper details: {str(e)}")
     
+    @result_cache(ttl_seconds=86400, scope="global")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -507,6 +510,7 @@ class PaperSearchTool(Tool):
             logger.error(f"Author search failed: {repr(e)}", exc_info=True)
             return self.fail_response(f"An error occurred during the author search: {str(e)}")
     
+    @result_cache(ttl_seconds=86400, scope="global")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -610,6 +614,7 @@ class PaperSearchTool(Tool):
             logger.error(f"Get author details failed: {repr(e)}", exc_info=True)
             return self.fail_response(f"An error occurred while fetching author details: {str(e)}")
     
+    @result_cache(ttl_seconds=86400, scope="global")
     @openapi_schema({
         "type": "function",
         "function": {
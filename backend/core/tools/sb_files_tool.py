@@ -1,4 +1,4 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, execution_hints, WORKSPACE_RESOURCE
 from core.sandbox.tool_base import SandboxToolsBase
 from core.utils.files_utils import should_exclude_file, clean_path
 from core.agentpress.thread_manager import ThreadManager
@@ -88,16 +88,18 @@ class SandboxFilesTool(SandboxToolsBase):
             await self._ensure_sandbox()
             
             files = await self.sandbox.fs.list_files(self.workspace_path)
-            for file_info in files:
+            # Skip excluded files and directories
+            wanted = [f for f in files if not (self._should_exclude_file(f.name) or f.is_dir)]
+            # All contents in one transfer instead of one download per file
+            contents = await self.sandbox.fs.download_files([f"{self.workspace_path}/{f.name}" for f in wanted])
+            for file_info in wanted:
                 rel_path = file_info.name
-                
-                # Skip excluded files and directories
-                if self._should_exclude_file(rel_path) or file_info.is_dir:
-                    continue
 
                 try:
-                    full_path = f"{self.workspace_path}/{rel_path}"
-                    content = (await self.sandbox.fs.download_file(full_path)).decode()
+                    raw = contents.get(f"{self.workspace_path}/{rel_path}")
+                    if raw is None:
+                        raise FileNotFoundError(f"{rel_path} could not be read")
+                    content = raw.decode()
                     files_state[rel_path] = {
                         "content": content,
                         "is_dir": file_info.is_dir,
@@ -121,6 +123,7 @@ class SandboxFilesTool(SandboxToolsBase):
     #         return f"{self._sandbox_url}/{(file_path.replace('/workspace/', ''))}"
     #     return None
 
+    @execution_hints(writes=["file:{file_path}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -188,6 +191,7 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error creating file: {str(e)}")
 
+    @execution_hints(writes=["file:{file_path}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -247,6 +251,7 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error replacing string: {str(e)}")
 
+    @execution_hints(writes=["file:{file_path}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -338,6 +343,7 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error rewriting file: {str(e)}")
 
+    @execution_hints(writes=["file:{file_path}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -449,6 +455,7 @@ class SandboxFilesTool(SandboxToolsBase):
             logger.error(f"Error calling Morph/OpenRouter API: {error_message}", exc_info=True)
             return None, error_message
 
+    @execution_hints(writes=["file:{target_file}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -582,6 +589,7 @@ class SandboxFilesTool(SandboxToolsBase):
                 "updated_content": None
             }))
 
+    @execution_hints(reads=["file:{file_path}", WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -5,7 +5,7 @@ import structlog
 from datetime import datetime
 from typing import Optional
 
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, execution_hints, WORKSPACE_RESOURCE
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.logger import logger
@@ -117,6 +117,7 @@ class SandboxGitTool(SandboxToolsBase):
             logger.error(f"Failed to initialize local git repo in sandbox: {str(e)}")
             raise
 
+    @execution_hints(writes=["git", WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
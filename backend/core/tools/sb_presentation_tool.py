@@ -1,4 +1,4 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, execution_hints, WORKSPACE_RESOURCE
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.logger import logger
@@ -358,6 +358,7 @@ class SandboxPresentationTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Failed to list templates: {str(e)}")
 
+    @execution_hints(writes=["presentation:{presentation_name}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -504,6 +505,7 @@ class SandboxPresentationTool(SandboxToolsBase):
             return self.fail_response(f"Failed to load template design: {str(e)}")
 
 
+    @execution_hints(writes=["presentation:{presentation_name}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -718,6 +720,7 @@ class SandboxPresentationTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Failed to create slide: {str(e)}")
 
+    @execution_hints(writes=["presentation:{presentation_name}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -785,6 +788,7 @@ class SandboxPresentationTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Failed to create slide and export: {str(e)}")
 
+    @execution_hints(reads=["presentation:{presentation_name}", WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -849,6 +853,7 @@ class SandboxPresentationTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Failed to list slides: {str(e)}")
 
+    @execution_hints(writes=["presentation:{presentation_name}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -972,6 +977,7 @@ class SandboxPresentationTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Failed to list presentations: {str(e)}")
 
+    @execution_hints(writes=["presentation:{presentation_name}"], reads=[WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -1013,6 +1019,7 @@ class SandboxPresentationTool(SandboxToolsBase):
             return self.fail_response(f"Failed to delete presentation: {str(e)}")
 
 
+    @execution_hints(reads=["presentation:{presentation_name}", WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -1243,6 +1250,7 @@ print(json.dumps(result))
         except Exception as e:
             return {"success": False, "format": format_type, "error": str(e)}
 
+    @execution_hints(reads=["presentation:{presentation_name}", WORKSPACE_RESOURCE])
     @openapi_schema({
         "type": "function",
         "function": {
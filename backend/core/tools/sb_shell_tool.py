@@ -3,9 +3,91 @@ from typing import Optional, Dict, Any
 import time
 import asyncio
 from uuid import uuid4
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, execution_hints, WORKSPACE_RESOURCE
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
+from core.agentpress.tool_output import emit_tool_output, has_tool_output_sink
+
+# Blocking command output kept for the result: the first and last N characters
+SHELL_OUTPUT_HEAD_CHARS = 20_000
+SHELL_OUTPUT_TAIL_CHARS = 30_000
+# Partial output is forwarded to the agent stream in batches
+SHELL_FORWARD_INTERVAL_SECONDS = 0.25
+SHELL_FORWARD_MAX_CHARS = 4096
+
+
+class _OutputCapture:
+    """Head + tail retention for command output; the middle is dropped once the cap is hit."""
+
+    def __init__(self, head_chars: int, tail_chars: int):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.head = ""
+        self.tail = ""
+        self.truncated_chars = 0
+
+    def append(self, text: str):
+        if len(self.head) < self.head_chars:
+            room = self.head_chars - len(self.head)
+            self.head += text[:room]
+            text = text[room:]
+        if not text:
+            return
+        self.tail += text
+        if len(self.tail) > self.tail_chars:
+            self.truncated_chars += len(self.tail) - self.tail_chars
+            self.tail = self.tail[-self.tail_chars:]
+
+    def render(self) -> str:
+        if not self.truncated_chars:
+            return self.head + self.tail
+        return f"{self.head}\n\n... [{self.truncated_chars} characters truncated] ...\n\n{self.tail}"
+
+
+class _OutputForwarder:
+    """Batches partial output into tool_output frames on the agent stream (no-op without a sink)."""
+
+    def __init__(self, tool_name: str, command: str):
+        self.tool_name = tool_name
+        self.command = command
+        self.enabled = has_tool_output_sink()
+        self._stream = None
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def push(self, stream: str, text: str):
+        if not self.enabled:
+            return
+        if self._stream is not None and stream != self._stream:
+            await self.flush()
+        self._stream = stream
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars >= SHELL_FORWARD_MAX_CHARS or time.monotonic() - self._last_flush >= SHELL_FORWARD_INTERVAL_SECONDS:
+            await self.flush()
+        elif self._timer is None:
+            # Don't hold output back if the command goes quiet
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(max(0.0, self._last_flush + SHELL_FORWARD_INTERVAL_SECONDS - time.monotonic()))
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        await emit_tool_output(self.tool_name, text, stream=self._stream or "stdout", command=self.command)
+
 
 @tool_metadata(
     display_name="Terminal & Commands",
@@ -86,6 +168,7 @@ class SandboxShellTool(SandboxToolsBase):
             except Exception as e:
                 print(f"Warning: Failed to cleanup session {session_name}: {str(e)}")
 
+    @execution_hints(writes=["shell:{session_name}", WORKSPACE_RESOURCE], timeout_arg="timeout")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -139,13 +222,19 @@ class SandboxShellTool(SandboxToolsBase):
                 folder = folder.strip('/')
                 cwd = f"{self.workspace_path}/{folder}"
             
-            # Generate a session name if not provided
-            if not session_name:
+            session_exists = False
+            if session_name:
+                # Check if tmux session already exists
+                check_session = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'")
+                session_exists = "not_exists" not in check_session.get("output", "")
+            else:
+                # Generate a session name if not provided
                 session_name = f"session_{str(uuid4())[:8]}"
             
-            # Check if tmux session already exists
-            check_session = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'not_exists'")
-            session_exists = "not_exists" not in check_session.get("output", "")
+            if blocking and not session_exists and hasattr(self.sandbox.process, 'exec_stream'):
+                # Attached exec stream: incremental output, completion by exit status.
+                # An existing session keeps the tmux path so the command inherits its state.
+                return await self._execute_blocking_stream(command, cwd, timeout)
             
             if not session_exists:
                 # Create a new tmux session with the specified working directory
@@ -155,50 +244,7 @@ class SandboxShellTool(SandboxToolsBase):
             wrapped_command = command.replace('"', '\\"')
             
             if blocking:
-                # For blocking execution, use a more reliable approach
-                # Add a unique marker to detect command completion
-                marker = f"COMMAND_DONE_{str(uuid4())[:8]}"
-                completion_command = self._format_completion_command(command, marker)
-                wrapped_completion_command = completion_command.replace('"', '\\"')
-                
-                # Send the command with completion marker
-                await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_completion_command}" Enter')
-                
-                start_time = time.time()
-                final_output = ""
-                
-                while (time.time() - start_time) < timeout:
-                    # Wait a shorter interval for more responsive checking
-                    await asyncio.sleep(0.5)
-                    
-                    # Check if session still exists (command might have exited)
-                    check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'")
-                    if "ended" in check_result.get("output", ""):
-                        break
-                        
-                    # Get current output and check for our completion marker
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    current_output = output_result.get("output", "")
-
-                    if self._is_command_completed(current_output, marker):
-                        final_output = current_output
-                        break
-                
-                # If we didn't get the marker, capture whatever output we have
-                if not final_output:
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    final_output = output_result.get("output", "")
-                
-                # Kill the session after capture
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
-                
-                # For blocking commands, do NOT return session_name since it's already cleaned up
-                # This prevents the LLM from incorrectly trying to call check_command_output
-                return self.success_response({
-                    "output": final_output,
-                    "cwd": cwd,
-                    "completed": True
-                })
+                return await self._execute_blocking_tmux(command, cwd, session_name, timeout)
             else:
                 # Send command to tmux session for non-blocking execution
                 await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_command}" Enter')
@@ -220,6 +266,80 @@ class SandboxShellTool(SandboxToolsBase):
                     pass
             return self.fail_response(f"Error executing command: {str(e)}")
 
+    async def _execute_blocking_stream(self, command: str, cwd: str, timeout: int) -> ToolResult:
+        """Run a blocking command on an attached exec stream, forwarding partial output to the agent stream."""
+        capture = _OutputCapture(SHELL_OUTPUT_HEAD_CHARS, SHELL_OUTPUT_TAIL_CHARS)
+        forward = _OutputForwarder("execute_command", command)
+        
+        async def on_output(stream: str, text: str):
+            capture.append(text)
+            await forward.push(stream, text)
+        
+        exit_code = await self.sandbox.process.exec_stream(command, cwd=cwd, timeout=timeout, on_output=on_output)
+        await forward.flush()
+        
+        timed_out = exit_code in (124, 137) and bool(timeout)
+        result = {
+            "output": capture.render(),
+            "exit_code": exit_code,
+            "cwd": cwd,
+            "completed": True
+        }
+        if timed_out:
+            result["timed_out"] = True
+            result["message"] = f"Command did not finish within {timeout} seconds and was terminated. Use blocking=false for long-running commands."
+        if capture.truncated_chars:
+            result["truncated_chars"] = capture.truncated_chars
+        # For blocking commands there is no session to check, so none is returned
+        return self.success_response(result)
+
+    async def _execute_blocking_tmux(self, command: str, cwd: str, session_name: str, timeout: int) -> ToolResult:
+        """Run a blocking command in a tmux session, polling the pane for a completion marker."""
+        # For blocking execution, use a more reliable approach
+        # Add a unique marker to detect command completion
+        marker = f"COMMAND_DONE_{str(uuid4())[:8]}"
+        completion_command = self._format_completion_command(command, marker)
+        wrapped_completion_command = completion_command.replace('"', '\\"')
+        
+        # Send the command with completion marker
+        await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_completion_command}" Enter')
+        
+        start_time = time.time()
+        final_output = ""
+        
+        while (time.time() - start_time) < timeout:
+            # Wait a shorter interval for more responsive checking
+            await asyncio.sleep(0.5)
+            
+            # Check if session still exists (command might have exited)
+            check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'")
+            if "ended" in check_result.get("output", ""):
+                break
+                
+            # Get current output and check for our completion marker
+            output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
+            current_output = output_result.get("output", "")
+
+            if self._is_command_completed(current_output, marker):
+                final_output = current_output
+                break
+        
+        # If we didn't get the marker, capture whatever output we have
+        if not final_output:
+            output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
+            final_output = output_result.get("output", "")
+        
+        # Kill the session after capture
+        await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+        
+        # For blocking commands, do NOT return session_name since it's already cleaned up
+        # This prevents the LLM from incorrectly trying to call check_command_output
+        return self.success_response({
+            "output": final_output,
+            "cwd": cwd,
+            "completed": True
+        })
+
     async def _execute_raw_command(self, command: str) -> Dict[str, Any]:
         """Execute a raw command directly in the sandbox."""
         # Ensure session exists for raw commands
@@ -271,6 +391,7 @@ class SandboxShellTool(SandboxToolsBase):
             "exit_code": response.exit_code
         }
 
+    @execution_hints(reads=["shell:{session_name}"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -327,6 +448,7 @@ class SandboxShellTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error checking command output: {str(e)}")
 
+    @execution_hints(writes=["shell:{session_name}"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -512,6 +512,9 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
         try:
             client = await self.db.client
             result = await client.table('messages').delete().eq('thread_id', self.thread_id).eq('type', 'image_context').execute()
+            if result.data:
+                from core.runtime_cache import invalidate_thread_messages_cache
+                await invalidate_thread_messages_cache(self.thread_id)
             return len(result.data) if result.data else 0
         except Exception as e:
             print(f"[LoadImage] Error clearing images: {e}")
@@ -1,4 +1,4 @@
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, execution_hints
 from core.sandbox.tool_base import SandboxToolsBase
 from core.utils.logger import logger
 from typing import List, Dict, Any, Optional
@@ -191,6 +191,7 @@ class TaskListTool(SandboxToolsBase):
         
         return response
 
+    @execution_hints(reads=["task_list"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -216,6 +217,7 @@ class TaskListTool(SandboxToolsBase):
             logger.error(f"Error viewing tasks: {e}")
             return ToolResult(success=False, output=f"❌ Error viewing tasks: {str(e)}")
 
+    @execution_hints(writes=["task_list"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -390,6 +392,7 @@ class TaskListTool(SandboxToolsBase):
             logger.error(f"Error creating tasks: {e}")
             return ToolResult(success=False, output=f"❌ Error creating tasks: {str(e)}")
 
+    @execution_hints(writes=["task_list"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -486,6 +489,7 @@ class TaskListTool(SandboxToolsBase):
             logger.error(f"Error updating tasks: {e}")
             return ToolResult(success=False, output=f"❌ Error updating tasks: {str(e)}")
 
+    @execution_hints(writes=["task_list"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -604,6 +608,7 @@ class TaskListTool(SandboxToolsBase):
             logger.error(f"Error deleting tasks/sections: {e}")
             return ToolResult(success=False, output=f"❌ Error deleting tasks/sections: {str(e)}")
 
+    @execution_hints(writes=["task_list"])
     @openapi_schema({
         "type": "function",
         "function": {
@@ -5,11 +5,8 @@ import socket
 from typing import Dict, Any
 from urllib.parse import urlparse
 from core.agentpress.tool import ToolResult
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.sse import sse_client
-from mcp.client.stdio import stdio_client
-from mcp.client.streamable_http import streamablehttp_client
 from core.mcp_module import mcp_service
+from core.mcp_module.session_pool import mcp_session_pool
 from core.utils.logger import logger
 
 
@@ -174,22 +171,11 @@ class MCPToolExecutor:
             return self._create_error_result(f"URL validation failed: {error_msg}")
         
         async with asyncio.timeout(30):
-            try:
-                async with sse_client(url, headers=headers) as (read, write):
-                    async with ClientSession(read, write) as session:
-                        await session.initialize()
-                        result = await session.call_tool(original_tool_name, arguments)
-                        return self._create_success_result(self._extract_content(result))
-                        
-            except TypeError as e:
-                if "unexpected keyword argument" in str(e):
-                    async with sse_client(url) as (read, write):
-                        async with ClientSession(read, write) as session:
-                            await session.initialize()
-                            result = await session.call_tool(original_tool_name, arguments)
-                            return self._create_success_result(self._extract_content(result))
-                else:
-                    raise
+            result = await mcp_session_pool.call_tool(
+                "sse", {"url": url, "headers": headers}, original_tool_name, arguments,
+                profile_id=custom_config.get('profile_id')
+            )
+            return self._create_success_result(self._extract_content(result))
     
     async def _execute_http_tool(self, tool_name: str, arguments: Dict[str, Any], tool_info: Dict[str, Any]) -> ToolResult:
         custom_config = tool_info['custom_config']
@@ -204,11 +190,11 @@ class MCPToolExecutor:
         
         try:
             async with asyncio.timeout(30):
-                async with streamablehttp_client(url) as (read, write, _):
-                    async with ClientSession(read, write) as session:
-                        await session.initialize()
-                        result = await session.call_tool(original_tool_name, arguments)
-                        return self._create_success_result(self._extract_content(result))
+                result = await mcp_session_pool.call_tool(
+                    "http", {"url": url}, original_tool_name, arguments,
+                    profile_id=custom_config.get('profile_id')
+                )
+                return self._create_success_result(self._extract_content(result))
                         
         except Exception as e:
             logger.error(f"Error executing HTTP MCP tool: {str(e)}")
@@ -218,18 +204,15 @@ class MCPToolExecutor:
         custom_config = tool_info['custom_config']
         original_tool_name = tool_info['original_name']
         
-        server_params = StdioServerParameters(
-            command=custom_config["command"],
-            args=custom_config.get("args", []),
-            env=custom_config.get("env", {})
-        )
+        server_params = {
+            "command": custom_config["command"],
+            "args": custom_config.get("args", []),
+            "env": custom_config.get("env", {})
+        }
         
         async with asyncio.timeout(30):
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    result = await session.call_tool(original_tool_name, arguments)
-                    return self._create_success_result(self._extract_content(result))
+            result = await mcp_session_pool.call_tool("stdio", server_params, original_tool_name, arguments)
+            return self._create_success_result(self._extract_content(result))
     
     async def _resolve_external_user_id(self, custom_config: Dict[str, Any]) -> str:
         profile_id = custom_config.get('profile_id')
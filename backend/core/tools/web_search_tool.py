@@ -1,6 +1,7 @@
 import httpx
 from dotenv import load_dotenv
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, ResultCachePolicy, openapi_schema, tool_metadata, result_cache
+from core.agentpress import tool_result_cache
 from core.utils.config import config
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
@@ -15,6 +16,10 @@ import re
 
 # TODO: add subpages, etc... in filters as sometimes its necessary 
 
+# Firecrawl responses are shared across calls; scrape_webpage itself is not cached because it
+# writes the result file into the sandbox on every call
+FIRECRAWL_SCRAPE_CACHE_POLICY = ResultCachePolicy(ttl_seconds=1800, scope="global", max_bytes=1_048_576)
+
 class QuarkSearch:
     """Local Quark search engine implementation"""
     
@@ -259,6 +264,7 @@ class SandboxWebSearchTool(SandboxToolsBase):
 
         logging.info(f"Web Search Tool initialized with QuarkSearch at {quark_base_url}")
 
+    @result_cache(ttl_seconds=3600, scope="global")
     @openapi_schema({
         "type": "function",
         "function": {
@@ -586,6 +592,62 @@ class SandboxWebSearchTool(SandboxToolsBase):
             logging.error(f"Error in scrape_webpage: {error_message}")
             return self.fail_response(f"Error processing scrape request: {error_message[:200]}")
     
+    async def _fetch_firecrawl_scrape(self, url: str, formats: list) -> dict:
+        """Firecrawl scrape response for a URL, served from the tool result cache when fresh."""
+        async def fetch() -> ToolResult:
+            return ToolResult(success=True, output=await self._request_firecrawl_scrape(url, formats))
+
+        result = await tool_result_cache.get_or_execute(
+            "firecrawl_scrape", {"url": url, "formats": formats}, FIRECRAWL_SCRAPE_CACHE_POLICY, None, fetch
+        )
+        return result.output
+
+    async def _request_firecrawl_scrape(self, url: str, formats: list) -> dict:
+        """POST to the Firecrawl scrape endpoint, retrying timeouts with exponential backoff."""
+        logging.info(f"Sending request to Firecrawl for URL: {url}")
+        async with httpx.AsyncClient() as client:
+            headers = {
+                "Authorization": f"Bearer {self.firecrawl_api_key}",
+                "Content-Type": "application/json",
+            }
+            payload = {
+                "url": url,
+                "formats": formats
+            }
+
+            # Use longer timeout and retry logic for more reliability
+            max_retries = 3
+            timeout_seconds = 30
+            retry_count = 0
+
+            while retry_count < max_retries:
+                try:
+                    logging.info(f"Sending request to Firecrawl (attempt {retry_count + 1}/{max_retries})")
+                    response = await client.post(
+                        f"{self.firecrawl_url}/v1/scrape",
+                        json=payload,
+                        headers=headers,
+                        timeout=timeout_seconds,
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+                    logging.info(f"Successfully received response from Firecrawl for {url}")
+                    break
+                except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ReadError) as timeout_err:
+                    retry_count += 1
+                    logging.warning(f"Request timed out (attempt {retry_count}/{max_retries}): {str(timeout_err)}")
+                    if retry_count >= max_retries:
+                        raise Exception(f"Request timed out after {max_retries} attempts with {timeout_seconds}s timeout")
+                    # Exponential backoff
+                    logging.info(f"Waiting {2 ** retry_count}s before retry")
+                    await asyncio.sleep(2 ** retry_count)
+                except Exception as e:
+                    # Don't retry on non-timeout errors
+                    logging.error(f"Error during scraping: {str(e)}")
+                    raise e
+
+        return data
+
     async def _scrape_single_url(self, url: str, include_html: bool = False) -> dict:
         """
         Helper function to scrape a single URL and return the result information.
@@ -603,53 +665,11 @@ class SandboxWebSearchTool(SandboxToolsBase):
         logging.info(f"Scraping single URL: {url}")
         
         try:
-            # ---------- Firecrawl scrape endpoint ----------
-            logging.info(f"Sending request to Firecrawl for URL: {url}")
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.firecrawl_api_key}",
-                    "Content-Type": "application/json",
-                }
-                # Determine formats to request based on include_html flag
-                formats = ["markdown"]
-                if include_html:
-                    formats.append("html")
-                
-                payload = {
-                    "url": url,
-                    "formats": formats
-                }
-                
-                # Use longer timeout and retry logic for more reliability
-                max_retries = 3
-                timeout_seconds = 30
-                retry_count = 0
-                
-                while retry_count < max_retries:
-                    try:
-                        logging.info(f"Sending request to Firecrawl (attempt {retry_count + 1}/{max_retries})")
-                        response = await client.post(
-                            f"{self.firecrawl_url}/v1/scrape",
-                            json=payload,
-                            headers=headers,
-                            timeout=timeout_seconds,
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        logging.info(f"Successfully received response from Firecrawl for {url}")
-                        break
-                    except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ReadError) as timeout_err:
-                        retry_count += 1
-                        logging.warning(f"Request timed out (attempt {retry_count}/{max_retries}): {str(timeout_err)}")
-                        if retry_count >= max_retries:
-                            raise Exception(f"Request timed out after {max_retries} attempts with {timeout_seconds}s timeout")
-                        # Exponential backoff
-                        logging.info(f"Waiting {2 ** retry_count}s before retry")
-                        await asyncio.sleep(2 ** retry_count)
-                    except Exception as e:
-                        # Don't retry on non-timeout errors
-                        logging.error(f"Error during scraping: {str(e)}")
-                        raise e
+            # Determine formats to request based on include_html flag
+            formats = ["markdown"]
+            if include_html:
+                formats.append("html")
+            data = await self._fetch_firecrawl_scrape(url, formats)
 
             # Format the response
             title = data.get("data", {}).get("metadata", {}).get("title", "")
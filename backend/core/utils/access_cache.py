@@ -0,0 +1,248 @@
+"""
+Authorization decision cache.
+
+verify_and_authorize_thread_access() and verify_sandbox_access() run on nearly
+every thread, message and file request. Their decisions are cached in Redis,
+keyed by (resource, user):
+
+- auth_access:{kind}:{resource_id}:{user_id|anon}   JSON decision, short TTL
+
+Every decision is also registered in tag sets naming what it depends on, so a
+change can drop exactly the decisions it affects:
+
+- auth_access:tag:user:{user_id}         role changes (user_roles)
+- auth_access:tag:account:{account_id}   membership changes (account_user)
+- auth_access:tag:project:{project_id}   visibility changes (projects.is_public)
+- auth_access:tag:{kind}:{resource_id}   the resource itself (deleted, moved)
+
+A lookup that races a visibility change could otherwise store the answer it
+read before the change, after the tags were cleared. invalidate_project_access
+therefore also bumps a per-project generation:
+
+- auth_access:gen:project:{project_id}   INCR on every project invalidation
+
+Callers read it with get_project_generation() before their DB lookup and pass
+it to set_access_decision(), which stores the decision only if the generation
+is unchanged (checked atomically with the write). The project a resource
+belongs to is only known after the lookup, so it comes from a process-local
+hint recorded by earlier lookups; without a matching hint nothing is stored.
+
+Grants live AUTH_CACHE_TTL_SECONDS, denials AUTH_CACHE_DENY_TTL_SECONDS; the
+TTL is the safety net for changes made outside the invalidation hooks (e.g.
+SQL run by hand). "Not found" is never cached. Redis errors count as misses.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.services import redis
+from core.utils.config import config
+from core.utils.logger import logger
+
+ACCESS_KIND_THREAD = "thread"
+ACCESS_KIND_SANDBOX = "sandbox"
+
+_KEY_PREFIX = "auth_access"
+GENERATION_TTL_SECONDS = 86400  # Outlives any in-flight lookup
+MAX_PROJECT_HINTS = 10000
+
+# Stores a decision only if the project generation still matches; KEYS[3:] are its tags
+_STORE_IF_CURRENT_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+for i = 3, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[2])
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+return 1
+"""
+
+# "{kind}:{resource_id}" -> project_id from the last lookup in this process (LRU-bounded)
+_project_hints: "OrderedDict[str, str]" = OrderedDict()
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "stale_skips": 0, "invalidations": 0, "errors": 0}
+
+
+def _grant_ttl() -> int:
+    return config.AUTH_CACHE_TTL_SECONDS or 0
+
+
+def _deny_ttl() -> int:
+    return config.AUTH_CACHE_DENY_TTL_SECONDS or 0
+
+
+def _decision_key(kind: str, resource_id: str, user_id: Optional[str]) -> str:
+    return f"{_KEY_PREFIX}:{kind}:{resource_id}:{user_id or 'anon'}"
+
+
+def _tag_key(tag: str, value: Any) -> str:
+    return f"{_KEY_PREFIX}:tag:{tag}:{value}"
+
+
+def _generation_key(project_id: str) -> str:
+    return f"{_KEY_PREFIX}:gen:project:{project_id}"
+
+
+def _remember_project(kind: str, resource_id: str, project_id: str) -> None:
+    hint = f"{kind}:{resource_id}"
+    _project_hints[hint] = project_id
+    _project_hints.move_to_end(hint)
+    while len(_project_hints) > MAX_PROJECT_HINTS:
+        _project_hints.popitem(last=False)
+
+
+async def get_project_generation(kind: str, resource_id: str) -> Optional[Tuple[str, int]]:
+    """
+    (project_id, generation) for the project the resource last belonged to; read
+    it before the DB lookup and pass it to set_access_decision(). None when the
+    project is not known yet or Redis is unavailable.
+    """
+    project_id = _project_hints.get(f"{kind}:{resource_id}")
+    if not project_id or not _grant_ttl():
+        return None
+    try:
+        generation = await redis.get(_generation_key(project_id))
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.debug(f"Access cache generation lookup failed: {e}")
+        return None
+    return project_id, int(generation or 0)
+
+
+async def get_access_decision(kind: str, resource_id: str, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Cached decision ({"allowed": bool, ...}) or None on a miss."""
+    if not _grant_ttl():
+        return None
+    try:
+        cached = await redis.get(_decision_key(kind, resource_id, user_id))
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.debug(f"Access cache lookup failed: {e}")
+        return None
+    if not cached:
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    return json.loads(cached)
+
+
+async def set_access_decision(
+    kind: str,
+    resource_id: str,
+    user_id: Optional[str],
+    allowed: bool,
+    project_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+    generation: Optional[Tuple[str, int]] = None,
+    **details: Any,
+) -> None:
+    """
+    Cache a decision and register it under the tags it depends on.
+
+    Decisions that depend on a project are stored only with the generation
+    read before the lookup (see get_project_generation), and only if it is
+    still current.
+    """
+    ttl = _grant_ttl() if allowed else _deny_ttl()
+    if not ttl or not _grant_ttl():
+        return
+    if project_id:
+        project_id = str(project_id)
+        _remember_project(kind, resource_id, project_id)
+        if generation is None or generation[0] != project_id:
+            _stats["stale_skips"] += 1
+            return
+    key = _decision_key(kind, resource_id, user_id)
+    decision = {
+        "allowed": allowed,
+        "project_id": str(project_id) if project_id else None,
+        "account_id": str(account_id) if account_id else None,
+        **details,
+    }
+    tags = [_tag_key(kind, resource_id)]
+    if user_id:
+        tags.append(_tag_key("user", user_id))
+    if project_id:
+        tags.append(_tag_key("project", project_id))
+    if account_id:
+        tags.append(_tag_key("account", account_id))
+
+    try:
+        client = await redis.get_client()
+        if project_id:
+            stored = await client.eval(
+                _STORE_IF_CURRENT_SCRIPT, 2 + len(tags), _generation_key(project_id), key, *tags,
+                generation[1], json.dumps(decision, default=str), ttl, _grant_ttl()
+            )
+            if not stored:
+                _stats["stale_skips"] += 1
+                return
+        else:
+            pipe = client.pipeline(transaction=False)
+            pipe.set(key, json.dumps(decision, default=str), ex=ttl)
+            for tag in tags:
+                pipe.sadd(tag, key)
+                # Tag sets outlive the longest decision they index
+                pipe.expire(tag, _grant_ttl())
+            await pipe.execute()
+        _stats["stores"] += 1
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.debug(f"Access cache store failed: {e}")
+
+
+async def _invalidate_tags(tags: Iterable[str]) -> None:
+    try:
+        client = await redis.get_client()
+        for tag in tags:
+            keys = await client.smembers(tag)
+            await client.delete(tag, *keys)
+            _stats["invalidations"] += len(keys)
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Access cache invalidation failed: {e}")
+
+
+async def invalidate_user_access(user_id: str) -> None:
+    """Call after a user's role (user_roles) changes."""
+    await _invalidate_tags([_tag_key("user", user_id)])
+
+
+async def invalidate_account_access(account_id: str) -> None:
+    """Call after members are added to or removed from an account (account_user)."""
+    await _invalidate_tags([_tag_key("account", account_id)])
+
+
+async def invalidate_project_access(project_id: str) -> None:
+    """Call after a project's visibility or ownership changes, or it is deleted."""
+    # Bump first: lookups already in flight must not store what they read before the change
+    try:
+        generation_key = _generation_key(project_id)
+        await redis.incr(generation_key)
+        await redis.expire(generation_key, GENERATION_TTL_SECONDS)
+    except Exception as e:
+        _stats["errors"] += 1
+        logger.warning(f"Access cache generation bump failed: {e}")
+    await _invalidate_tags([_tag_key("project", project_id)])
+
+
+async def invalidate_thread_access(thread_id: str) -> None:
+    """Call after a thread is deleted or moved to another project/account."""
+    await _invalidate_tags([_tag_key(ACCESS_KIND_THREAD, thread_id)])
+
+
+async def invalidate_sandbox_access(sandbox_id: str) -> None:
+    """Call after a sandbox is detached from its project."""
+    await _invalidate_tags([_tag_key(ACCESS_KIND_SANDBOX, sandbox_id)])
+
+
+def get_access_cache_stats() -> Dict[str, Any]:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        "enabled": bool(_grant_ttl()),
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None,
+        **_stats,
+    }
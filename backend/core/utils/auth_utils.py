@@ -8,6 +8,13 @@ from core.utils.logger import structlog
 from core.utils.config import config
 from core.services.supabase import DBConnection
 from core.services import redis
+from core.utils.access_cache import (
+    ACCESS_KIND_SANDBOX,
+    ACCESS_KIND_THREAD,
+    get_access_decision,
+    get_project_generation,
+    set_access_decision,
+)
 from core.utils.logger import logger, structlog
 
 
@@ -362,60 +369,110 @@ async def verify_and_get_agent_authorization(client, agent_id: str, user_id: str
         structlog.error(f"Error verifying agent access for agent {agent_id}, user {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to verify agent access")
 
+async def _get_admin_role_and_membership(user_id: str, account_id: Optional[str]) -> tuple:
+    """
+    Admin role of a user and whether they are a member of account_id, in one query.
+
+    Returns:
+        (admin_role or None, is_member)
+    """
+    from core.services.postgres import PostgresConnection
+
+    row = await PostgresConnection().fetchrow(
+        """
+        SELECT
+            (SELECT role FROM user_roles
+             WHERE user_id = $1 AND role IN ('admin', 'super_admin')
+             LIMIT 1) AS admin_role,
+            EXISTS (
+                SELECT 1 FROM account_user
+                WHERE user_id = $1 AND account_id = $2
+            ) AS is_member
+        """,
+        user_id,
+        account_id,
+    )
+    if not row:
+        return None, False
+    return row['admin_role'], bool(row['is_member'])
+
+
 async def verify_and_authorize_thread_access(client, thread_id: str, user_id: Optional[str]):
     """
     Verify that a user has access to a thread.
     Supports both authenticated and anonymous access (for public threads).
+
+    Decisions are cached per (thread, user), see core.utils.access_cache.
     
     Args:
         client: Supabase client
         thread_id: Thread ID to check
         user_id: User ID (can be None for anonymous users accessing public threads)
     """
-    try:
-        # Get thread data first
-        thread_result = await client.table('threads').select('*').eq('thread_id', thread_id).execute()
+    def denied() -> HTTPException:
+        if not user_id:
+            return HTTPException(status_code=403, detail="Authentication required for private threads")
+        return HTTPException(status_code=403, detail="Not authorized to access this thread")
 
-        if not thread_result.data or len(thread_result.data) == 0:
+    try:
+        cached = await get_access_decision(ACCESS_KIND_THREAD, thread_id, user_id)
+        if cached is not None:
+            if cached['allowed']:
+                return True
+            raise denied()
+
+        # Read before the lookup, so a visibility change during it keeps the decision out of the cache
+        generation = await get_project_generation(ACCESS_KIND_THREAD, thread_id)
+
+        # Thread and project visibility in one query
+        from core.services.postgres import PostgresConnection
+        thread = await PostgresConnection().fetchrow(
+            """
+            SELECT t.account_id, t.project_id, COALESCE(p.is_public, FALSE) AS is_public
+            FROM threads t
+            LEFT JOIN projects p ON p.project_id = t.project_id
+            WHERE t.thread_id = $1
+            """,
+            thread_id,
+        )
+        if not thread:
             raise HTTPException(status_code=404, detail="Thread not found")
-        
-        thread_data = thread_result.data[0]
-        
+
+        project_id = thread['project_id']
+        account_id = thread['account_id']
+
+        async def decide(allowed: bool, **details) -> bool:
+            await set_access_decision(
+                ACCESS_KIND_THREAD, thread_id, user_id, allowed,
+                project_id=project_id, account_id=account_id, generation=generation, **details
+            )
+            if not allowed:
+                raise denied()
+            return True
+
         # Check if thread's project is public - allow anonymous access
-        project_id = thread_data.get('project_id')
-        if project_id:
-            project_result = await client.table('projects').select('is_public').eq('project_id', project_id).execute()
-            if project_result.data and len(project_result.data) > 0:
-                if project_result.data[0].get('is_public'):
-                    structlog.get_logger().debug(f"Public thread access granted: {thread_id}")
-                    return True
-        
+        if thread['is_public']:
+            structlog.get_logger().debug(f"Public thread access granted: {thread_id}")
+            return await decide(True, reason="public")
+
         # If not public, user must be authenticated
         if not user_id:
-            raise HTTPException(status_code=403, detail="Authentication required for private threads")
-        
-        # Check if user is an admin (admins have access to all threads)
-        admin_result = await client.table('user_roles').select('role').eq('user_id', user_id).execute()
-        if admin_result.data and len(admin_result.data) > 0:
-            role = admin_result.data[0].get('role')
-            if role in ('admin', 'super_admin'):
-                structlog.get_logger().debug(f"Admin access granted for thread {thread_id}", user_role=role)
-                return True
-        
+            return await decide(False)
+
         # Check if user owns the thread
         # 在本地部署中，account_id 和 user_id 应该是相同的
-        account_id = thread_data.get('account_id')
         if account_id and str(account_id) == str(user_id):
-            return True
-        
-        # Check if user is a team member of the account
-        if account_id:
-            # Use public schema instead of basejump schema
-            account_user_result = await client.table('account_user').select('account_role').eq('user_id', user_id).eq('account_id', account_id).execute()
-            if account_user_result.data and len(account_user_result.data) > 0:
-                return True
-        
-        raise HTTPException(status_code=403, detail="Not authorized to access this thread")
+            return await decide(True, reason="owner")
+
+        # Admins have access to all threads; team members to their account's threads
+        admin_role, is_member = await _get_admin_role_and_membership(user_id, account_id)
+        if admin_role:
+            structlog.get_logger().debug(f"Admin access granted for thread {thread_id}", user_role=admin_role)
+            return await decide(True, reason="admin")
+        if is_member:
+            return await decide(True, reason="member")
+
+        return await decide(False)
     except HTTPException:
         raise
     except Exception as e:
@@ -566,25 +623,44 @@ async def require_agent_access(
 # Sandbox Authorization Functions
 # ============================================================================
 
-async def verify_sandbox_access(client, sandbox_id: str, user_id: str):
+async def _authorize_sandbox_access(client, sandbox_id: str, user_id: Optional[str], require_auth: bool) -> dict:
     """
-    Verify that a user has access to a specific sandbox by checking project ownership and permissions.
-    
-    This function implements project-based access control:
-    - Public projects: Allow access to anyone
-    - Private projects: Only allow access to account members
-    
-    Args:
-        client: The Supabase client
-        sandbox_id: The sandbox ID to check access for
-        user_id: The user ID to check permissions for (required for all operations)
-        
-    Returns:
-        dict: Project data containing sandbox information
-        
-    Raises:
-        HTTPException: If the user doesn't have access to the project/sandbox or sandbox doesn't exist
+    Shared implementation of verify_sandbox_access / verify_sandbox_access_optional.
+
+    The project is looked up by sandbox id through the expression index on
+    projects (sandbox->>'id'). Decisions are cached per (sandbox, user); on a
+    cached grant the returned project data is limited to project_id,
+    account_id and is_public.
     """
+    def denied(project_id=None) -> HTTPException:
+        if not user_id and not require_auth:
+            structlog.get_logger().warning(
+                "Authentication required for private project sandbox access",
+                project_id=project_id,
+                sandbox_id=sandbox_id
+            )
+            return HTTPException(status_code=401, detail="Authentication required for this private project")
+        structlog.get_logger().warning(
+            "User denied access to private project sandbox",
+            sandbox_id=sandbox_id,
+            project_id=project_id,
+            user_id=user_id
+        )
+        return HTTPException(status_code=403, detail="Not authorized to access this project's sandbox")
+
+    cached = await get_access_decision(ACCESS_KIND_SANDBOX, sandbox_id, user_id)
+    if cached is not None:
+        if not cached['allowed']:
+            raise denied(cached.get('project_id'))
+        return {
+            'project_id': cached.get('project_id'),
+            'account_id': cached.get('account_id'),
+            'is_public': cached.get('is_public', False),
+        }
+
+    # Read before the lookup, so a visibility change during it keeps the decision out of the cache
+    generation = await get_project_generation(ACCESS_KIND_SANDBOX, sandbox_id)
+
     # Find the project that owns this sandbox
     project_result = await client.table('projects').select('*').jsonb_eq('sandbox', 'id', sandbox_id).execute()
     
@@ -593,6 +669,7 @@ async def verify_sandbox_access(client, sandbox_id: str, user_id: str):
     
     project_data = project_result.data[0]
     project_id = project_data.get('project_id')
+    account_id = project_data.get('account_id')
     is_public = project_data.get('is_public', False)
     
     structlog.get_logger().debug(
@@ -603,44 +680,59 @@ async def verify_sandbox_access(client, sandbox_id: str, user_id: str):
         user_id=user_id
     )
 
+    async def decide(allowed: bool) -> dict:
+        await set_access_decision(
+            ACCESS_KIND_SANDBOX, sandbox_id, user_id, allowed,
+            project_id=project_id, account_id=account_id, generation=generation, is_public=bool(is_public)
+        )
+        if not allowed:
+            raise denied(project_id)
+        return project_data
+
     # Public projects: Allow access regardless of authentication
     if is_public:
         structlog.get_logger().debug("Allowing access to public project sandbox", project_id=project_id)
-        return project_data
+        return await decide(True)
     
-    # Check if user is an admin (admins have access to all sandboxes)
-    admin_result = await client.table('user_roles').select('role').eq('user_id', user_id).execute()
-    if admin_result.data and len(admin_result.data) > 0:
-        role = admin_result.data[0].get('role')
-        if role in ('admin', 'super_admin'):
-            structlog.get_logger().debug("Admin access granted for sandbox", sandbox_id=sandbox_id, user_role=role)
-            return project_data
+    # Private projects: Require authentication
+    if not user_id:
+        return await decide(False)
     
-    # Private projects: Verify the user is a member of the project's account
-    account_id = project_data.get('account_id')
+    # Private projects: Verify the user is an admin or a member of the project's account
     if not account_id:
         raise HTTPException(status_code=500, detail="Project has no associated account")
     
-    # Check if user is a member of the project's account
-    account_user_result = await client.schema('basejump').from_('account_user').select('account_role').eq('user_id', user_id).eq('account_id', account_id).execute()
+    admin_role, is_member = await _get_admin_role_and_membership(user_id, account_id)
+    if admin_role:
+        structlog.get_logger().debug("Admin access granted for sandbox", sandbox_id=sandbox_id, user_role=admin_role)
+        return await decide(True)
+    if is_member:
+        structlog.get_logger().debug("User has access to private project sandbox", project_id=project_id)
+        return await decide(True)
     
-    if account_user_result.data and len(account_user_result.data) > 0:
-        user_role = account_user_result.data[0].get('account_role')
-        structlog.get_logger().debug(
-            "User has access to private project sandbox", 
-            project_id=project_id,
-            user_role=user_role
-        )
-        return project_data
+    return await decide(False)
+
+async def verify_sandbox_access(client, sandbox_id: str, user_id: str):
+    """
+    Verify that a user has access to a specific sandbox by checking project ownership and permissions.
     
-    structlog.get_logger().warning(
-        "User denied access to private project sandbox",
-        sandbox_id=sandbox_id,
-        project_id=project_id,
-        user_id=user_id,
-        account_id=account_id
-    )
-    raise HTTPException(status_code=403, detail="Not authorized to access this project's sandbox")
+    This function implements project-based access control:
+    - Public projects: Allow access to anyone
+    - Private projects: Only allow access to admins and account members
+    
+    Args:
+        client: The Supabase client
+        sandbox_id: The sandbox ID to check access for
+        user_id: The user ID to check permissions for (required for all operations)
+        
+    Returns:
+        dict: Project data containing sandbox information (project_id, account_id
+            and is_public only when the decision was cached)
+        
+    Raises:
+        HTTPException: If the user doesn't have access to the project/sandbox or sandbox doesn't exist
+    """
+    return await _authorize_sandbox_access(client, sandbox_id, user_id, require_auth=True)
 
 async def verify_sandbox_access_optional(client, sandbox_id: str, user_id: Optional[str] = None):
     """
@@ -649,7 +741,7 @@ async def verify_sandbox_access_optional(client, sandbox_id: str, user_id: Optio
     
     This function implements project-based access control:
     - Public projects: Allow access to anyone (no authentication required)
-    - Private projects: Require authentication and account membership
+    - Private projects: Require authentication and admin role or account membership
     
     Args:
         client: The Supabase client
@@ -657,73 +749,10 @@ async def verify_sandbox_access_optional(client, sandbox_id: str, user_id: Optio
         user_id: The user ID to check permissions for. Can be None for public project access.
         
     Returns:
-        dict: Project data containing sandbox information
+        dict: Project data containing sandbox information (project_id, account_id
+            and is_public only when the decision was cached)
         
     Raises:
         HTTPException: If the user doesn't have access to the project/sandbox or sandbox doesn't exist
     """
-    # Find the project that owns this sandbox
-    project_result = await client.table('projects').select('*').jsonb_eq('sandbox', 'id', sandbox_id).execute()
-    
-    if not project_result.data or len(project_result.data) == 0:
-        raise HTTPException(status_code=404, detail="Sandbox not found - no project owns this sandbox")
-    
-    project_data = project_result.data[0]
-    project_id = project_data.get('project_id')
-    is_public = project_data.get('is_public', False)
-    
-    structlog.get_logger().debug(
-        "Checking optional sandbox access via project ownership",
-        sandbox_id=sandbox_id,
-        project_id=project_id,
-        is_public=is_public,
-        user_id=user_id
-    )
-
-    # Public projects: Allow access regardless of authentication
-    if is_public:
-        structlog.get_logger().debug("Allowing access to public project sandbox", project_id=project_id)
-        return project_data
-    
-    # Private projects: Require authentication
-    if not user_id:
-        structlog.get_logger().warning(
-            "Authentication required for private project sandbox access",
-            project_id=project_id,
-            sandbox_id=sandbox_id
-        )
-        raise HTTPException(status_code=401, detail="Authentication required for this private project")
-    
-    # Check if user is an admin (admins have access to all sandboxes)
-    admin_result = await client.table('user_roles').select('role').eq('user_id', user_id).execute()
-    if admin_result.data and len(admin_result.data) > 0:
-        role = admin_result.data[0].get('role')
-        if role in ('admin', 'super_admin'):
-            structlog.get_logger().debug("Admin access granted for sandbox", sandbox_id=sandbox_id, user_role=role)
-            return project_data
-    
-    # Verify the user is a member of the project's account
-    account_id = project_data.get('account_id')
-    if not account_id:
-        raise HTTPException(status_code=500, detail="Project has no associated account")
-    
-    # Check if user is a member of the project's account
-    account_user_result = await client.schema('basejump').from_('account_user').select('account_role').eq('user_id', user_id).eq('account_id', account_id).execute()
-    
-    if account_user_result.data and len(account_user_result.data) > 0:
-        user_role = account_user_result.data[0].get('account_role')
-        structlog.get_logger().debug(
-            "User has access to private project sandbox", 
-            project_id=project_id,
-            user_role=user_role
-        )
-        return project_data
-    
-    structlog.get_logger().warning(
-        "User denied access to private project sandbox",
-        sandbox_id=sandbox_id,
-        project_id=project_id,
-        user_id=user_id,
-        account_id=account_id
-    )
-    raise HTTPException(status_code=403, detail="Not authorized to access this project's sandbox")
\ No newline at end of file
+    return await _authorize_sandbox_access(client, sandbox_id, user_id, require_auth=False)
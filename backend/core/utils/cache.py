@@ -22,5 +22,11 @@ class _cache:
         key = f"cache:{key}"
         await redis.delete(key)
 
+    async def delete_pattern(self, pattern: str):
+        redis = await get_client()
+        keys = [key async for key in redis.scan_iter(match=f"cache:{pattern}", count=500)]
+        if keys:
+            await redis.delete(*keys)
+
 
 Cache = _cache()
@@ -50,6 +50,14 @@ class Configuration:
     AGENT_NATIVE_TOOL_CALLING: bool = True  # Enable OpenAI-style native function calling
     AGENT_EXECUTE_ON_STREAM: bool = True     # Execute tools as they stream (vs. at end)
     AGENT_TOOL_EXECUTION_STRATEGY: str = "parallel"  # "parallel" or "sequential"
+    AGENT_TOOL_CLASS_CONCURRENCY: int = 4     # Calls of one tool class running at once per turn (Tool.max_concurrency overrides)
+    AGENT_TOOL_CALL_TIMEOUT_SECONDS: int = 900  # Per-call tool timeout (0 = none; ExecutionHints.timeout overrides)
+    AGENT_TOOL_RESULT_CACHE: bool = True     # Reuse results of @result_cache tool methods (see core.agentpress.tool_result_cache)
+    AGENT_TOOL_RESULT_CACHE_MAX_ENTRY_BYTES: int = 262144  # Larger results are not cached
+    MCP_SESSION_POOL: bool = True            # Reuse MCP client sessions across tool calls (see core.mcp_module.session_pool)
+    MCP_SESSION_IDLE_SECONDS: int = 300       # Pooled MCP sessions idle this long are closed
+    MCP_SESSION_MAX_CONCURRENCY: int = 4      # Tool calls in flight per pooled MCP session
+    AGENT_STREAM_COMPACT_FRAMES: bool = True  # Store streamed chunks as header + delta frames (see core.utils.stream_protocol)
     # ============================================
     
 
@@ -312,6 +320,9 @@ class Configuration:
     MEMORY_EMBEDDING_PROVIDER: Optional[str] = "openai"
     MEMORY_EMBEDDING_MODEL: Optional[str] = "text-embedding-3-small"
     MEMORY_EXTRACTION_MODEL: Optional[str] = "Aurora/basic"
+    MEMORY_EMBEDDING_BATCH_SIZE: int = 64  # Texts per provider call
+    MEMORY_EMBEDDING_CONCURRENCY: int = 4  # Concurrent remote embedding requests
+    MEMORY_EMBEDDING_LOCAL_WORKERS: int = 1  # Dedicated threads for the local model
     VOYAGE_API_KEY: Optional[str] = None
     GROQ_API_KEY: Optional[str] = None
     OPENROUTER_API_KEY: Optional[str] = None
@@ -344,6 +355,10 @@ class Configuration:
     # 本地 PostgreSQL 数据库配置（私有化部署）
     DATABASE_URL: Optional[str] = None
     JWT_SECRET_KEY: Optional[str] = None
+    AUTH_CACHE_TTL_SECONDS: int = 60  # Cached thread/sandbox access grants (0 = disabled)
+    AUTH_CACHE_DENY_TTL_SECONDS: int = 10  # Cached 403 decisions
+    RATE_LIMIT_DISTRIBUTED: bool = True  # Share rate limits across API processes via Redis (see core.utils.rate_limiter)
+    RATE_LIMIT_ACCOUNT_REQUESTS_PER_MINUTE: int = 0  # Per-account limit across all /v1 routes (0 = disabled)
     
     # Redis configuration
     REDIS_HOST: Optional[str] = "localhost"
@@ -368,6 +383,11 @@ class Configuration:
     SANDBOX_CPU_LIMIT: Optional[float] = None  # CPU cores limit
     SANDBOX_MEMORY_LIMIT: Optional[str] = None  # Memory limit (e.g., "2g")
     SANDBOX_DISK_LIMIT: Optional[str] = None  # Disk limit (e.g., "10g")
+    SANDBOX_DOCKER_WORKERS: int = 32  # Threads for blocking docker-py calls
+    SANDBOX_CONTAINER_CONCURRENCY: int = 8  # Concurrent Docker calls per container
+    SANDBOX_STREAM_WORKERS: int = 64  # Threads pumping attached exec streams (long-running commands)
+    SANDBOX_POOL_SIZE: int = 0  # Pre-warmed, unassigned sandbox containers to keep ready (0 = disabled)
+    SANDBOX_POOL_MAX_IDLE_SECONDS: int = 3600  # Recycle pooled containers idle longer than this
     
     # Search and other API keys (all optional tools)
     TAVILY_API_KEY: Optional[str] = None
@@ -540,6 +540,10 @@ async def migrate_thread_messages(client, thread_id: str, save: bool = False) ->
                 logger.error(f"Error migrating tool message {msg.get('message_id')}: {e}")
                 stats['errors'] += 1
         
+        if save and stats['migrated']:
+            from core.runtime_cache import invalidate_thread_messages_cache
+            await invalidate_thread_messages_cache(thread_id)
+        
         logger.info(f"Migration complete for thread {thread_id}: {stats}")
         return stats
         
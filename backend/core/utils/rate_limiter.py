@@ -1,108 +1,232 @@
 """
 Rate limiting utilities for API endpoints.
 
-This module provides in-memory rate limiting for sensitive endpoints
-to prevent brute force attacks and DoS.
+Limits are enforced with GCRA (generic cell rate algorithm): per key only the
+"theoretical arrival time" (TAT) of the next request is stored, so checks are
+O(1) in time and memory. A policy of N requests per window allows a burst of N
+and then one request every window / N.
+
+- DistributedRateLimiter keeps the TAT in Redis and updates it with one
+  atomic Lua call, so the limit holds across all API processes. Clients that
+  are clearly under their limit get a small local budget, and requests within
+  it skip Redis; they are charged to the Redis TAT on the next call. When
+  Redis is unreachable it fails open to the per-process RateLimiter.
+- RateLimiter is the in-process GCRA limiter (fallback and local use).
+
+Policies are matched per route (ROUTE_POLICIES) and keyed either by client IP
+or by authenticated account.
 """
 
+import asyncio
 import hashlib
+import math
 import time
 from collections import OrderedDict
-from typing import Optional
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 from fastapi import Request
 
+from core.utils.config import config
+from core.utils.logger import logger
+
 
 class RateLimiter:
     """
-    In-memory rate limiter using sliding window approach.
-    
+    In-memory GCRA rate limiter.
+
     Features:
     - Per-client rate limiting based on real IP
-    - Automatic cleanup of expired entries
+    - One float per client, no per-request bookkeeping
     - LRU eviction to prevent unbounded memory growth
-    
+
     Usage:
         limiter = RateLimiter(max_requests=100, window_seconds=60)
         is_limited, retry_after = limiter.is_rate_limited(client_id)
     """
-    
+
     def __init__(self, max_requests: int = 60, window_seconds: int = 60):
         """
         Initialize rate limiter.
-        
+
         Args:
             max_requests: Maximum requests allowed per window
             window_seconds: Time window in seconds
         """
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests: OrderedDict[str, list] = OrderedDict()
-        self._last_cleanup = time.time()
-        self._cleanup_interval = 60  # Cleanup every minute
+        self._interval = window_seconds / max_requests
+        self._burst = self._interval * (max_requests - 1)
+        self.tats: OrderedDict[str, float] = OrderedDict()
         self._max_entries = 10000  # Prevent unbounded memory growth
-    
-    def _cleanup(self):
-        """Remove expired entries and enforce max size."""
-        current_time = time.time()
-        
-        # Only cleanup periodically
-        if current_time - self._last_cleanup < self._cleanup_interval:
-            return
-            
-        self._last_cleanup = current_time
-        cutoff = current_time - self.window_seconds
-        
-        # Remove expired timestamps from all keys
-        keys_to_remove = []
-        for key, timestamps in self.requests.items():
-            self.requests[key] = [t for t in timestamps if t > cutoff]
-            if not self.requests[key]:
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.requests[key]
-        
-        # Enforce max entries (LRU eviction)
-        while len(self.requests) > self._max_entries:
-            self.requests.popitem(last=False)
-    
+
     def is_rate_limited(self, identifier: str) -> tuple[bool, int]:
         """
-        Check if the identifier is rate limited.
-        
+        Check if the identifier is rate limited (and count the request if not).
+
         Args:
             identifier: Unique client identifier (e.g., hashed IP)
-            
+
         Returns:
             tuple: (is_limited: bool, retry_after_seconds: int)
         """
-        self._cleanup()
-        
-        current_time = time.time()
-        cutoff = current_time - self.window_seconds
-        
-        # Get or create request list
-        if identifier not in self.requests:
-            self.requests[identifier] = []
-        
-        # Filter to only recent requests
-        recent = [t for t in self.requests[identifier] if t > cutoff]
-        self.requests[identifier] = recent
-        
-        # Check limit
-        if len(recent) >= self.max_requests:
-            # Calculate retry-after
-            oldest = min(recent)
-            retry_after = int(oldest + self.window_seconds - current_time) + 1
-            return True, max(1, retry_after)
-        
-        # Record this request
-        self.requests[identifier].append(current_time)
-        self.requests.move_to_end(identifier)  # LRU update
-        
+        now = time.monotonic()
+        tat = max(self.tats.get(identifier, now), now)
+
+        if now < tat - self._burst:
+            return True, max(1, math.ceil(tat - self._burst - now))
+
+        self.tats[identifier] = tat + self._interval
+        self.tats.move_to_end(identifier)  # LRU update
+        if len(self.tats) > self._max_entries:
+            self.tats.popitem(last=False)
+
         return False, 0
 
 
+# =============================================================================
+# Distributed (Redis) rate limiting
+# =============================================================================
+
+# KEYS[1] = TAT key; ARGV = emission interval (ms), burst tolerance (ms),
+# requests already admitted locally that still have to be charged.
+# Returns {allowed, retry_after_ms, remaining}.
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local debt = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+tat = tat + debt * interval
+local allowed = 0
+local retry_after = 0
+if now < tat - burst then
+    retry_after = tat - burst - now
+else
+    allowed = 1
+    tat = tat + interval
+end
+if tat > now then
+    redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now))
+end
+local remaining = math.floor((now + burst - tat) / interval) + 1
+if remaining < 0 then remaining = 0 end
+return {allowed, retry_after, remaining}
+"""
+
+REDIS_TIMEOUT_SECONDS = 0.1  # Slower than this counts as unhealthy
+REDIS_RETRY_SECONDS = 5  # After a Redis failure, use the local limiter this long
+LOCAL_BUDGET_MIN_HEADROOM = 0.5  # Local fast path only with at least this share of the limit left
+LOCAL_BUDGET_FRACTION = 0.1  # Share of the remaining requests that may be admitted locally
+LOCAL_BUDGET_SECONDS = 1.0  # Local budgets expire after this long
+LOCAL_BUDGET_MAX_ENTRIES = 10000
+
+_gcra_script = None
+_gcra_script_client = None
+_redis_retry_at = 0.0
+
+
+async def _run_gcra(key: str, interval_ms: float, burst_ms: float, debt: int) -> Tuple[int, int, int]:
+    global _gcra_script, _gcra_script_client
+    from core.services import redis
+
+    client = await redis.get_client()
+    if _gcra_script is None or _gcra_script_client is not client:
+        _gcra_script = client.register_script(_GCRA_SCRIPT)
+        _gcra_script_client = client
+    allowed, retry_after_ms, remaining = await _gcra_script(keys=[key], args=[interval_ms, burst_ms, debt])
+    return int(allowed), int(retry_after_ms), int(remaining)
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """`limit` requests per `window_seconds`, per client IP ("ip") or per account ("account")."""
+    name: str
+    limit: int
+    window_seconds: int
+    scope: str = "ip"
+
+
+class DistributedRateLimiter:
+    """
+    GCRA rate limiter shared across processes through Redis.
+
+    Usage:
+        limiter = DistributedRateLimiter(RateLimitPolicy("auth", 100, 60))
+        is_limited, retry_after = await limiter.is_rate_limited(client_id)
+    """
+
+    def __init__(self, policy: RateLimitPolicy):
+        self.policy = policy
+        self.local = RateLimiter(policy.limit, policy.window_seconds)
+        self._interval_ms = policy.window_seconds * 1000 / policy.limit
+        self._burst_ms = self._interval_ms * (policy.limit - 1)
+        # identifier -> [requests left in local budget, admitted but not yet charged, expires at]
+        self._budgets: OrderedDict[str, list] = OrderedDict()
+        self.metrics = {"checks": 0, "local_hits": 0, "redis_calls": 0, "limited": 0, "fallbacks": 0}
+
+    async def is_rate_limited(self, identifier: str) -> tuple[bool, int]:
+        """
+        Check if the identifier is rate limited (and count the request if not).
+
+        Returns:
+            tuple: (is_limited: bool, retry_after_seconds: int)
+        """
+        global _redis_retry_at
+        self.metrics["checks"] += 1
+        now = time.monotonic()
+
+        budget = self._budgets.get(identifier)
+        if budget is not None and budget[0] > 0 and budget[2] > now:
+            budget[0] -= 1
+            budget[1] += 1
+            self.metrics["local_hits"] += 1
+            return False, 0
+
+        if not config.RATE_LIMIT_DISTRIBUTED or now < _redis_retry_at:
+            return self._local_check(identifier)
+
+        debt = 0
+        if budget is not None:
+            # Take the debt before awaiting so concurrent checks don't charge it twice
+            debt, budget[1] = budget[1], 0
+
+        try:
+            self.metrics["redis_calls"] += 1
+            allowed, retry_after_ms, remaining = await asyncio.wait_for(
+                _run_gcra(f"ratelimit:{self.policy.name}:{identifier}", self._interval_ms, self._burst_ms, debt),
+                timeout=REDIS_TIMEOUT_SECONDS,
+            )
+        except Exception as e:
+            _redis_retry_at = now + REDIS_RETRY_SECONDS
+            logger.warning(f"Rate limiter Redis unavailable, using per-process limits for {REDIS_RETRY_SECONDS}s: {e!r}")
+            return self._local_check(identifier)
+
+        local_budget = 0
+        if allowed and remaining >= self.policy.limit * LOCAL_BUDGET_MIN_HEADROOM:
+            local_budget = int(remaining * LOCAL_BUDGET_FRACTION)
+        if local_budget > 0:
+            self._budgets[identifier] = [local_budget, 0, now + LOCAL_BUDGET_SECONDS]
+            self._budgets.move_to_end(identifier)
+            if len(self._budgets) > LOCAL_BUDGET_MAX_ENTRIES:
+                self._budgets.popitem(last=False)
+        else:
+            self._budgets.pop(identifier, None)
+
+        if not allowed:
+            self.metrics["limited"] += 1
+            return True, max(1, math.ceil(retry_after_ms / 1000))
+        return False, 0
+
+    def _local_check(self, identifier: str) -> tuple[bool, int]:
+        self.metrics["fallbacks"] += 1
+        is_limited, retry_after = self.local.is_rate_limited(identifier)
+        if is_limited:
+            self.metrics["limited"] += 1
+        return is_limited, retry_after
+
+
 def get_real_client_ip(request: Request) -> str:
     """
     Get the real client IP, handling proxies/load balancers/CDNs.
@@ -152,24 +276,80 @@ def get_client_identifier(request: Request) -> str:
     return identifier
 
 
+def get_account_identifier(request: Request) -> Optional[str]:
+    """
+    Get the authenticated user ID from the request's bearer token, if it verifies.
+
+    Args:
+        request: FastAPI request object
+
+    Returns:
+        Optional[str]: User ID, or None for anonymous/invalid tokens
+    """
+    auth_header = request.headers.get("authorization")
+    if not auth_header or not auth_header.lower().startswith("bearer "):
+        return None
+    from core.utils.auth_utils import _decode_jwt_with_verification
+    try:
+        return _decode_jwt_with_verification(auth_header[7:].strip()).get("sub")
+    except Exception:
+        return None
+
+
 # =============================================================================
 # Pre-configured rate limiters for different endpoint categories
 # =============================================================================
 
 # Auth/webhook endpoints: 100 requests per minute per client
 # Protects against credential brute force attacks
-auth_rate_limiter = RateLimiter(max_requests=100, window_seconds=60)
+auth_rate_limiter = DistributedRateLimiter(RateLimitPolicy("auth", limit=100, window_seconds=60))
 
 # API key management: 60 requests per minute per client
 # Protects against key enumeration/brute force
-api_key_rate_limiter = RateLimiter(max_requests=60, window_seconds=60)
+api_key_rate_limiter = DistributedRateLimiter(RateLimitPolicy("api_keys", limit=60, window_seconds=60))
 
 # Admin endpoints: 300 requests per minute per client
 # Higher limit for legitimate admin operations
-admin_rate_limiter = RateLimiter(max_requests=300, window_seconds=60)
+admin_rate_limiter = DistributedRateLimiter(RateLimitPolicy("admin", limit=300, window_seconds=60))
 
+# All /v1 endpoints: RATE_LIMIT_ACCOUNT_REQUESTS_PER_MINUTE per account (disabled when 0)
+account_rate_limiter = (
+    DistributedRateLimiter(RateLimitPolicy(
+        "account", limit=config.RATE_LIMIT_ACCOUNT_REQUESTS_PER_MINUTE, window_seconds=60, scope="account"
+    ))
+    if config.RATE_LIMIT_ACCOUNT_REQUESTS_PER_MINUTE else None
+)
 
+# (path substring, limiter); the first match applies
+ROUTE_POLICIES: List[Tuple[str, DistributedRateLimiter]] = [
+    ("/v1/api-keys", api_key_rate_limiter),
+    ("/v1/admin", admin_rate_limiter),
+    ("/v1/setup/initialize", auth_rate_limiter),
+]
 
 
+def get_rate_limiters(path: str) -> List[DistributedRateLimiter]:
+    """Limiters that apply to a request path (route policy first, then per-account)."""
+    limiters = [limiter for fragment, limiter in ROUTE_POLICIES if fragment in path][:1]
+    if account_rate_limiter is not None and path.startswith("/v1/"):
+        limiters.append(account_rate_limiter)
+    return limiters
 
 
+def get_rate_limiter_metrics() -> dict:
+    limiters = [limiter for _, limiter in ROUTE_POLICIES]
+    if account_rate_limiter is not None:
+        limiters.append(account_rate_limiter)
+    return {
+        "distributed": bool(config.RATE_LIMIT_DISTRIBUTED),
+        "redis_healthy": time.monotonic() >= _redis_retry_at,
+        "policies": {
+            limiter.policy.name: {
+                "limit": limiter.policy.limit,
+                "window_seconds": limiter.policy.window_seconds,
+                "scope": limiter.policy.scope,
+                **limiter.metrics,
+            }
+            for limiter in limiters
+        },
+    }
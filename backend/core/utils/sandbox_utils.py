@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List
 from core.utils.logger import logger
 
 
@@ -51,6 +51,37 @@ async def generate_unique_filename(sandbox, base_path: str, original_filename: s
         return original_filename
 
 
+async def generate_unique_filenames(sandbox, base_path: str, original_filenames: List[str]) -> List[str]:
+    """
+    Generate unique filenames for a batch of uploads with a single directory listing.
+    
+    Same naming scheme as generate_unique_filename, and names are also kept
+    unique within the batch.
+    """
+    try:
+        files = await sandbox.fs.list_files(base_path)
+        taken = {f.name for f in files}
+    except Exception as e:
+        # If the directory doesn't exist yet or there's an error, only de-duplicate within the batch
+        logger.debug(f"Could not check for existing files in {base_path}: {str(e)}")
+        taken = set()
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    unique_filenames = []
+    for original_filename in original_filenames:
+        unique_filename = original_filename
+        if unique_filename in taken:
+            file_path = Path(original_filename)
+            counter = 1
+            while unique_filename in taken:
+                unique_filename = f"{file_path.stem}_{timestamp}_{counter}{file_path.suffix}"
+                counter += 1
+            logger.info(f"Generated unique filename: {unique_filename} (original: {original_filename})")
+        taken.add(unique_filename)
+        unique_filenames.append(unique_filename)
+    return unique_filenames
+
+
 def get_uploads_directory() -> str:
     """
     Get the standard uploads directory path for sandbox file uploads.
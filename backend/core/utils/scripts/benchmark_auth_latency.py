@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark thread and sandbox authorization latency.
+
+Runs N access checks (with C in flight at a time) for a given user against a
+thread and/or a sandbox, and prints p50/p99 per variant:
+
+- legacy:   the previous check - thread row, project is_public, user_roles and
+            account_user as four sequential queries (JSONB scan for sandboxes)
+- uncached: the current check with the decision cache disabled (joined
+            thread/project query + merged role/membership query)
+- cached:   the current check with the decision cache enabled (first call
+            fills it, the rest are a single Redis GET)
+
+Usage:
+    python -m core.utils.scripts.benchmark_auth_latency --user-id <uuid> \\
+        [--thread-id <uuid>] [--sandbox-id <id>] [--requests 500] [--concurrency 20]
+
+Requires the database and Redis from the environment. Use a private thread the
+user is a member (not owner) of to exercise every query.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+
+from core.services import redis
+from core.services.supabase import DBConnection
+from core.utils import access_cache
+from core.utils.auth_utils import verify_and_authorize_thread_access, verify_sandbox_access
+from core.utils.config import config
+
+
+async def legacy_thread_check(client, thread_id: str, user_id: str):
+    thread_result = await client.table('threads').select('*').eq('thread_id', thread_id).execute()
+    if not thread_result.data:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    thread_data = thread_result.data[0]
+    project_id = thread_data.get('project_id')
+    if project_id:
+        project_result = await client.table('projects').select('is_public').eq('project_id', project_id).execute()
+        if project_result.data and project_result.data[0].get('is_public'):
+            return True
+    admin_result = await client.table('user_roles').select('role').eq('user_id', user_id).execute()
+    if admin_result.data and admin_result.data[0].get('role') in ('admin', 'super_admin'):
+        return True
+    account_id = thread_data.get('account_id')
+    if account_id and str(account_id) == str(user_id):
+        return True
+    if account_id:
+        account_user_result = await client.table('account_user').select('account_role').eq('user_id', user_id).eq('account_id', account_id).execute()
+        if account_user_result.data:
+            return True
+    raise HTTPException(status_code=403, detail="Not authorized to access this thread")
+
+
+async def legacy_sandbox_check(client, sandbox_id: str, user_id: str):
+    # The JSONB lookup itself now uses idx_projects_sandbox_id; drop it to measure the old scan
+    project_result = await client.table('projects').select('*').jsonb_eq('sandbox', 'id', sandbox_id).execute()
+    if not project_result.data:
+        raise HTTPException(status_code=404, detail="Sandbox not found - no project owns this sandbox")
+    project_data = project_result.data[0]
+    if project_data.get('is_public'):
+        return project_data
+    admin_result = await client.table('user_roles').select('role').eq('user_id', user_id).execute()
+    if admin_result.data and admin_result.data[0].get('role') in ('admin', 'super_admin'):
+        return project_data
+    account_user_result = await client.schema('basejump').from_('account_user').select('account_role').eq('user_id', user_id).eq('account_id', project_data.get('account_id')).execute()
+    if account_user_result.data:
+        return project_data
+    raise HTTPException(status_code=403, detail="Not authorized to access this project's sandbox")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run(label: str, check: Callable[[], Awaitable], requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await check()
+            except HTTPException:
+                errors += 1
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:>18} | p50 {percentile(samples, 0.5):>7.2f} ms | p99 {percentile(samples, 0.99):>7.2f} ms"
+        f" | {requests / elapsed:>8.0f} req/s | denied {errors}"
+    )
+
+
+async def main_async(user_id: str, thread_id: Optional[str], sandbox_id: Optional[str], requests: int, concurrency: int):
+    await redis.initialize_async()
+    client = await DBConnection().client
+    cache_ttl = config.AUTH_CACHE_TTL_SECONDS or 60
+
+    variants = []
+    if thread_id:
+        variants += [
+            ("thread legacy", None, lambda: legacy_thread_check(client, thread_id, user_id)),
+            ("thread uncached", 0, lambda: verify_and_authorize_thread_access(client, thread_id, user_id)),
+            ("thread cached", cache_ttl, lambda: verify_and_authorize_thread_access(client, thread_id, user_id)),
+        ]
+    if sandbox_id:
+        variants += [
+            ("sandbox legacy", None, lambda: legacy_sandbox_check(client, sandbox_id, user_id)),
+            ("sandbox uncached", 0, lambda: verify_sandbox_access(client, sandbox_id, user_id)),
+            ("sandbox cached", cache_ttl, lambda: verify_sandbox_access(client, sandbox_id, user_id)),
+        ]
+
+    try:
+        for label, ttl, check in variants:
+            if ttl is not None:
+                config.AUTH_CACHE_TTL_SECONDS = ttl
+            await run(label, check, requests, concurrency)
+        print(f"\naccess cache: {access_cache.get_access_cache_stats()}")
+    finally:
+        config.AUTH_CACHE_TTL_SECONDS = cache_ttl
+        if thread_id:
+            await access_cache.invalidate_thread_access(thread_id)
+        if sandbox_id:
+            await access_cache.invalidate_sandbox_access(sandbox_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thread/sandbox authorization latency")
+    parser.add_argument("--user-id", required=True, help="User to authorize")
+    parser.add_argument("--thread-id", help="Thread to check access to")
+    parser.add_argument("--sandbox-id", help="Sandbox to check access to")
+    parser.add_argument("--requests", type=int, default=500, help="Checks per variant")
+    parser.add_argument("--concurrency", type=int, default=20, help="Checks in flight at a time")
+    args = parser.parse_args()
+    if not args.thread_id and not args.sandbox_id:
+        parser.error("pass --thread-id and/or --sandbox-id")
+    asyncio.run(main_async(args.user_id, args.thread_id, args.sandbox_id, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk INSERT/UPSERT in the PostgresQueryBuilder shim.
+
+Compares one-row-per-statement writes (the previous behaviour) with the
+batched path for 1, 100 and 10,000 rows, with and without RETURNING.
+Uses a scratch table that is created and dropped by the script.
+
+Usage:
+    python -m core.utils.scripts.benchmark_bulk_insert [--sizes 1,100,10000]
+
+Requires DATABASE_URL to point at a PostgreSQL instance.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+import asyncpg
+
+from core.utils.config import config
+from core.services.supabase import PostgresClient
+
+BENCH_TABLE = "bench_bulk_insert"
+
+
+def make_rows(n: int):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "account_id": str(uuid.uuid4()),
+            "content": f"memory number {i}",
+            "metadata": {"index": i, "source": "benchmark"},
+            "created_at": now,
+        }
+        for i in range(n)
+    ]
+
+
+async def reset_table(pool):
+    async with pool.acquire() as conn:
+        await conn.execute(f'DROP TABLE IF EXISTS "public"."{BENCH_TABLE}"')
+        await conn.execute(
+            f'''
+            CREATE TABLE "public"."{BENCH_TABLE}" (
+                id UUID PRIMARY KEY,
+                account_id UUID NOT NULL,
+                content TEXT NOT NULL,
+                metadata JSONB DEFAULT '{{}}'::jsonb,
+                created_at TIMESTAMPTZ DEFAULT NOW()
+            )
+            '''
+        )
+
+
+async def run_case(pool, client, label: str, rows, write):
+    await reset_table(pool)
+    start = time.perf_counter()
+    await write(client, rows)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>32} | {len(rows):>6,} rows | {elapsed * 1000:>10.2f} ms | {elapsed / len(rows) * 1e6:>8.1f} µs/row")
+
+
+async def row_by_row(client, rows, returning="representation"):
+    for row in rows:
+        await client.table(BENCH_TABLE).insert(row, returning=returning).execute()
+
+
+async def bulk(client, rows, returning="representation"):
+    await client.table(BENCH_TABLE).insert(rows, returning=returning).execute()
+
+
+async def bulk_upsert(client, rows, returning="representation"):
+    await client.table(BENCH_TABLE).upsert(rows, on_conflict="id", returning=returning).execute()
+
+
+async def main_async(sizes):
+    pool = await asyncpg.create_pool(config.DATABASE_URL, min_size=1, max_size=2)
+    client = PostgresClient(pool)
+    try:
+        for n in sizes:
+            rows = make_rows(n)
+            if n <= 1000:
+                await run_case(pool, client, "row-by-row (RETURNING)", rows, row_by_row)
+            await run_case(pool, client, "bulk insert (RETURNING)", rows, bulk)
+            await run_case(pool, client, "bulk insert (minimal)", rows, lambda c, r: bulk(c, r, "minimal"))
+            await run_case(pool, client, "bulk upsert (RETURNING)", rows, bulk_upsert)
+            await run_case(pool, client, "bulk upsert (minimal)", rows, lambda c, r: bulk_upsert(c, r, "minimal"))
+            print("-" * 80)
+    finally:
+        async with pool.acquire() as conn:
+            await conn.execute(f'DROP TABLE IF EXISTS "public"."{BENCH_TABLE}"')
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk inserts in the PostgreSQL shim")
+    parser.add_argument("--sizes", default="1,100,10000", help="Comma-separated batch sizes")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    asyncio.run(main_async(sizes))
+
+
+if __name__ == "__main__":
+    main()
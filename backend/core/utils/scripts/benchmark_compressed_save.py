@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for persisting compressed messages.
+
+Compares the previous per-message SELECT + UPDATE loop with the single
+set-based UPDATE used by ContextManager.save_compressed_messages, for
+10, 100 and 1000 messages. Runs in a scratch schema that is created and
+dropped by the script.
+
+Usage:
+    python -m core.utils.scripts.benchmark_compressed_save [--sizes 10,100,1000]
+
+Requires DATABASE_URL to point at a PostgreSQL instance.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import asyncpg
+
+from core.utils.config import config
+from core.agentpress.context_manager import SAVE_COMPRESSED_MESSAGES_SQL
+
+BENCH_SCHEMA = "bench_compressed_save"
+
+
+def make_batch(n: int):
+    return [
+        {
+            'message_id': str(uuid.uuid4()),
+            'compressed_content': json.dumps({'role': 'tool', 'content': f'[compressed output {i}]'}),
+        }
+        for i in range(n)
+    ]
+
+
+async def reset_table(pool, batch):
+    async with pool.acquire() as conn:
+        await conn.execute('TRUNCATE messages')
+        await conn.executemany(
+            "INSERT INTO messages (message_id, metadata) VALUES ($1, $2::jsonb)",
+            [(m['message_id'], json.dumps({'agent_id': 'bench'})) for m in batch],
+        )
+
+
+async def save_row_by_row(pool, batch) -> int:
+    saved = 0
+    async with pool.acquire() as conn:
+        for msg in batch:
+            metadata = await conn.fetchval("SELECT metadata FROM messages WHERE message_id = $1", msg['message_id'])
+            metadata = json.loads(metadata) if metadata else {}
+            if metadata.get('compressed'):
+                continue
+            metadata['compressed'] = True
+            metadata['compressed_content'] = msg['compressed_content']
+            await conn.execute(
+                "UPDATE messages SET metadata = $1::jsonb WHERE message_id = $2",
+                json.dumps(metadata), msg['message_id'],
+            )
+            saved += 1
+    return saved
+
+
+async def save_set_based(pool, batch) -> int:
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            SAVE_COMPRESSED_MESSAGES_SQL,
+            [m['message_id'] for m in batch],
+            [m['compressed_content'] for m in batch],
+        )
+    return len(rows)
+
+
+async def main_async(sizes):
+    admin = await asyncpg.connect(config.DATABASE_URL)
+    await admin.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+    await admin.execute(f'CREATE SCHEMA {BENCH_SCHEMA}')
+    await admin.execute(
+        f"CREATE TABLE {BENCH_SCHEMA}.messages (message_id UUID PRIMARY KEY, metadata JSONB DEFAULT '{{}}'::jsonb)"
+    )
+    pool = await asyncpg.create_pool(
+        config.DATABASE_URL, min_size=1, max_size=1, server_settings={'search_path': BENCH_SCHEMA}
+    )
+    try:
+        for n in sizes:
+            batch = make_batch(n)
+            for label, save in (("row-by-row", save_row_by_row), ("set-based", save_set_based)):
+                await reset_table(pool, batch)
+                start = time.perf_counter()
+                saved = await save(pool, batch)
+                elapsed = time.perf_counter() - start
+                # A second pass must be a no-op: rows are already compressed
+                again = await save(pool, batch)
+                print(f"{label:>12} | {n:>5} messages | {elapsed * 1000:>9.2f} ms | saved {saved}, re-save {again}")
+            print("-" * 64)
+    finally:
+        await pool.close()
+        await admin.execute(f'DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE')
+        await admin.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed message persistence")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated batch sizes")
+    args = parser.parse_args()
+    asyncio.run(main_async([int(s) for s in args.sizes.split(",") if s.strip()]))
+
+
+if __name__ == "__main__":
+    main()
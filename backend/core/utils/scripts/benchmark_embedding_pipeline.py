@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory embedding pipeline with the local provider.
+
+Measures:
+- sequential embed_text calls vs the same calls issued concurrently
+  (merged into batched model invocations by the request coalescer)
+- embed_batch throughput at several batch sizes
+
+The Redis embedding cache is disabled so every text reaches the model.
+
+Usage:
+    python -m core.utils.scripts.benchmark_embedding_pipeline [--texts 256] [--model all-MiniLM-L6-v2]
+
+Requires sentence-transformers to be installed.
+"""
+
+import argparse
+import asyncio
+import time
+
+from core.memory.embedding_service import EmbeddingService
+
+
+def make_texts(n: int, offset: int = 0):
+    return [
+        f"User prefers concise answers about topic {offset + i} and works mostly in Python and SQL."
+        for i in range(n)
+    ]
+
+
+async def time_it(coro):
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def run_sequential(service: EmbeddingService, texts):
+    for text in texts:
+        await service.embed_text(text)
+
+
+async def run_concurrent(service: EmbeddingService, texts):
+    await asyncio.gather(*(service.embed_text(text) for text in texts))
+
+
+async def main_async(args):
+    service = EmbeddingService(provider="local", model=args.model, use_cache=False)
+
+    # Load the model before timing anything
+    await service.embed_texts(["warm up"])
+
+    n = args.texts
+    elapsed = await time_it(run_sequential(service, make_texts(n, 0)))
+    print(f"{'sequential embed_text':>28} | {n:>6} texts | {elapsed * 1000:>9.1f} ms | {n / elapsed:>8.1f} texts/s")
+
+    flushes_before = service._coalescer.flushes
+    elapsed = await time_it(run_concurrent(service, make_texts(n, n)))
+    flushes = service._coalescer.flushes - flushes_before
+    print(f"{'concurrent embed_text':>28} | {n:>6} texts | {elapsed * 1000:>9.1f} ms | {n / elapsed:>8.1f} texts/s | {flushes} model calls")
+
+    for batch_size in (8, 32, 128):
+        texts = make_texts(n, (2 + batch_size) * n)
+        elapsed = await time_it(service.embed_batch(texts, batch_size=batch_size))
+        print(f"{f'embed_batch (batch={batch_size})':>28} | {n:>6} texts | {elapsed * 1000:>9.1f} ms | {n / elapsed:>8.1f} texts/s")
+
+    print(f"\nProvider metrics: {service.get_metrics()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local embedding pipeline")
+    parser.add_argument("--texts", type=int, default=256, help="Number of texts per measurement")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="sentence-transformers model name")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent Docker sandbox operations.
+
+Creates one sandbox, then runs N `sleep` commands through
+sandbox.process.exec() one after another and concurrently, while a
+heartbeat task measures how long the event loop stalls. With Docker calls
+on the sandbox thread pool the concurrent batch takes about
+ceil(N / SANDBOX_CONTAINER_CONCURRENCY) x sleep time, and the heartbeat keeps
+ticking throughout.
+
+Usage:
+    python -m core.utils.scripts.benchmark_sandbox_concurrency [--ops 16] [--sleep 0.5]
+
+Requires a reachable Docker daemon and the sandbox image. The sandbox is
+deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import time
+
+from core.sandbox.docker_sandbox import create_sandbox, delete_sandbox, get_sandbox_metrics
+
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.01):
+    """Largest gap between event loop ticks, in ms."""
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, (now - last - interval) * 1000)
+        last = now
+    return worst
+
+
+async def measure(label: str, coro_factory):
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall_ms = await beat
+    print(f"{label:>12} | {elapsed:>7.2f} s | worst event loop stall {stall_ms:>8.1f} ms")
+
+
+async def main_async(ops: int, sleep: float):
+    sandbox, container_id = await create_sandbox(password="benchmark", project_id="benchmark")
+    command = f"sleep {sleep}"
+    try:
+        async def sequential():
+            for _ in range(ops):
+                await sandbox.process.exec(command)
+
+        async def concurrent():
+            await asyncio.gather(*(sandbox.process.exec(command) for _ in range(ops)))
+
+        await measure("sequential", sequential)
+        await measure("concurrent", concurrent)
+        print(f"\nprocess.exec latency: {get_sandbox_metrics()['operations'].get('process.exec')}")
+    finally:
+        await delete_sandbox(container_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent Docker sandbox operations")
+    parser.add_argument("--ops", type=int, default=16, help="Commands per measurement")
+    parser.add_argument("--sleep", type=float, default=0.5, help="Seconds each command sleeps")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.ops, args.sleep))
+
+
+if __name__ == "__main__":
+    main()
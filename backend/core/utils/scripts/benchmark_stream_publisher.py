@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark agent run stream publishing in the worker.
+
+Compares the previous behaviour (one PUBLISH task and one XADD task per
+streamed chunk) with the coalescing RedisStreamPublisher (pipelined XADD
+batches; the worker no longer publishes to a per-run channel), at several
+chunk rates. Reports frames/s and the
+Redis commands/s and round trips it took, using INFO commandstats deltas.
+
+Usage:
+    python -m core.utils.scripts.benchmark_stream_publisher [--frames 5000] [--rates 0,2000,500]
+
+A rate of 0 streams chunks as fast as possible. Requires a reachable Redis
+(REDIS_HOST / REDIS_PORT).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from core.services import redis_worker as redis
+from core.services.stream_publisher import RedisStreamPublisher
+
+BENCH_STREAM = "bench:agent_run:stream"
+BENCH_CHANNEL = "bench:agent_run:pubsub"
+COUNTED_COMMANDS = ("xadd", "publish", "expire")
+
+
+def make_frame(i: int) -> str:
+    return json.dumps({
+        "type": "assistant",
+        "content": json.dumps({"role": "assistant", "content": f"tok{i} "}),
+        "metadata": json.dumps({"stream_status": "chunk", "thread_run_id": "bench"}),
+        "sequence": i,
+    })
+
+
+async def redis_command_calls() -> int:
+    client = await redis.get_client()
+    stats = await client.info("commandstats")
+    return sum(stats.get(f"cmdstat_{cmd}", {}).get("calls", 0) for cmd in COUNTED_COMMANDS)
+
+
+async def produce(n: int, rate: int, sink):
+    interval = 1.0 / rate if rate else 0.0
+    start = time.perf_counter()
+    for i in range(n):
+        await sink(make_frame(i))
+        if interval:
+            # Pace against the schedule rather than sleeping a fixed amount per frame
+            delay = start + (i + 1) * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+
+async def run_per_chunk_tasks(n: int, rate: int):
+    pending = []
+
+    async def sink(frame: str):
+        pending.append(asyncio.create_task(redis.publish(BENCH_CHANNEL, frame)))
+        pending.append(asyncio.create_task(redis.xadd(BENCH_STREAM, {"data": frame}, maxlen=10000, approximate=True)))
+
+    await produce(n, rate, sink)
+    await asyncio.gather(*pending, return_exceptions=True)
+    return {"round_trips": len(pending)}
+
+
+async def run_publisher(n: int, rate: int):
+    publisher = RedisStreamPublisher(BENCH_STREAM, maxlen=10000, stream_ttl=600).start()
+    await produce(n, rate, publisher.publish)
+    await publisher.close()
+    stats = publisher.get_stats()
+    return {"round_trips": stats["flushes"], "avg_batch": stats["avg_batch"], "dropped": stats["dropped"]}
+
+
+async def measure(label: str, runner, n: int, rate: int):
+    client = await redis.get_client()
+    await client.delete(BENCH_STREAM)
+    calls_before = await redis_command_calls()
+    start = time.perf_counter()
+    extra = await runner(n, rate)
+    elapsed = time.perf_counter() - start
+    calls = await redis_command_calls() - calls_before
+    stored = await client.xlen(BENCH_STREAM)
+    rate_label = f"{rate}/s" if rate else "max"
+    details = ", ".join(f"{k}={v}" for k, v in extra.items())
+    print(
+        f"{label:>16} | rate {rate_label:>7} | {n / elapsed:>9.0f} frames/s | "
+        f"{calls / elapsed:>9.0f} redis cmds/s | {calls:>6} cmds | stored {stored:>6} | {details}"
+    )
+
+
+async def main_async(frames: int, rates):
+    await redis.initialize_async()
+    try:
+        for rate in rates:
+            await measure("per-chunk tasks", run_per_chunk_tasks, frames, rate)
+            await measure("coalesced", run_publisher, frames, rate)
+            print("-" * 110)
+    finally:
+        client = await redis.get_client()
+        await client.delete(BENCH_STREAM)
+        await redis.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark worker stream publishing")
+    parser.add_argument("--frames", type=int, default=5000, help="Frames per measurement")
+    parser.add_argument("--rates", default="0,2000,500", help="Comma-separated chunk rates (frames/s, 0 = unthrottled)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.frames, [int(r) for r in args.rates.split(",") if r.strip()]))
+
+
+if __name__ == "__main__":
+    main()
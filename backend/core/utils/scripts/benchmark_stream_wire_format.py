@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the legacy vs compact wire format for streamed assistant chunks.
+
+For a synthetic message streamed as N chunks, reports:
+- bytes stored in Redis / sent over SSE per format
+- worker encode time (json.dumps with UUIDEncoder vs CompactFrameEncoder)
+- client-side parse time of the frames
+- API-side cost of expanding compact frames back to legacy frames
+
+Usage:
+    python -m core.utils.scripts.benchmark_stream_wire_format [--chunks 2000] [--chunk-chars 4]
+
+No Redis required.
+"""
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from core.utils import stream_protocol
+from core.utils.stream_protocol import CompactFrameEncoder, expand_delta, frame_kind
+
+
+class UUIDEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, uuid.UUID):
+            return str(obj)
+        return super().default(obj)
+
+
+def encode_legacy(response):
+    return json.dumps(response, cls=UUIDEncoder)
+
+
+def make_chunks(n: int, chunk_chars: int):
+    thread_id = uuid.uuid4()
+    metadata = json.dumps({"stream_status": "chunk", "thread_run_id": str(uuid.uuid4())}, separators=(',', ':'))
+    started = datetime.now(timezone.utc).isoformat()
+    text = "lorem ipsum dolor sit amet, consectetur adipiscing elit "
+    return [
+        {
+            "sequence": i,
+            "message_id": None, "thread_id": thread_id, "type": "assistant",
+            "is_llm_message": True,
+            "content": json.dumps({"role": "assistant", "content": (text * 4)[i % 50:i % 50 + chunk_chars]}, separators=(',', ':')),
+            "metadata": metadata,
+            "created_at": started,
+            "updated_at": started,
+        }
+        for i in range(n)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streamed chunk wire formats")
+    parser.add_argument("--chunks", type=int, default=2000, help="Chunks per streamed message")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="Characters of text per chunk")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.chunk_chars)
+    print(f"serializer: {'orjson' if stream_protocol.orjson is not None else 'json (orjson not installed)'}")
+
+    legacy, legacy_encode_ms = timed(lambda: [encode_legacy(r) for r in chunks])
+    encoder = CompactFrameEncoder(encode_legacy)
+    compact, compact_encode_ms = timed(lambda: [f for r in chunks for f in encoder.encode(r)])
+
+    _, legacy_parse_ms = timed(lambda: [json.loads(json.loads(f)["content"]) for f in legacy])
+    _, compact_parse_ms = timed(lambda: [stream_protocol.loads(f) for f in compact])
+
+    def expand_all():
+        header = None
+        out = []
+        for frame in compact:
+            if frame_kind(frame) == 'h':
+                header = stream_protocol.loads(frame)
+            else:
+                out.append(expand_delta(header, frame))
+        return out
+
+    expanded, expand_ms = timed(expand_all)
+    assert expanded == legacy, "compact frames must expand to the legacy frames byte for byte"
+
+    legacy_bytes = sum(len(f.encode('utf-8')) for f in legacy)
+    compact_bytes = sum(len(f.encode('utf-8')) for f in compact)
+    print(f"{'format':>8} | {'frames':>7} | {'bytes':>9} | {'encode ms':>9} | {'parse ms':>8}")
+    print(f"{'legacy':>8} | {len(legacy):>7} | {legacy_bytes:>9} | {legacy_encode_ms:>9.1f} | {legacy_parse_ms:>8.1f}")
+    print(f"{'compact':>8} | {len(compact):>7} | {compact_bytes:>9} | {compact_encode_ms:>9.1f} | {compact_parse_ms:>8.1f}")
+    print(f"\ncompact is {compact_bytes / legacy_bytes:.1%} of legacy bytes; expanding to legacy for old clients: {expand_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
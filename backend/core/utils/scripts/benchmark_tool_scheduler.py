@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark tool execution strategies on a simulated mixed turn.
+
+Builds a turn of N tool calls - independent web searches, edits and reads
+of a few shared files, commands in a few shell sessions - backed by tools
+that just sleep, and runs it:
+
+- sequential: one call after another (_execute_tools_sequentially)
+- gather:     every call at once (the previous _execute_tools_in_parallel)
+- scheduler:  ToolScheduler (conflicting calls in order, the rest concurrent)
+
+and prints the wall-clock time of the turn and how many calls overlapped a
+conflicting call (two edits of one file, a command running while a file is
+edited).
+
+Usage:
+    python -m core.utils.scripts.benchmark_tool_scheduler [--calls 24] [--files 3] [--sessions 2] [--latency-ms 200] [--seed 1]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+from core.agentpress.tool import Tool, ToolResult, WORKSPACE_RESOURCE, execution_hints, openapi_schema
+from core.agentpress.tool_scheduler import ToolScheduler
+
+
+class SimulatedTools(Tool):
+    """Sleeps instead of working, and records which resources are busy."""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+        self.busy: Dict[str, int] = {}
+        self.conflicts = 0
+
+    async def _work(self, writes: List[str], reads: List[str]) -> ToolResult:
+        if any(self.busy.get(key, 0) > 0 for key in writes) or any(self.busy.get(key, 0) < 0 for key in reads):
+            self.conflicts += 1
+        for key in writes:
+            self.busy[key] = self.busy.get(key, 0) - 1_000
+        for key in reads:
+            self.busy[key] = self.busy.get(key, 0) + 1
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        for key in writes:
+            self.busy[key] += 1_000
+        for key in reads:
+            self.busy[key] -= 1
+        return self.success_response("ok")
+
+    @openapi_schema({})
+    async def web_search(self, query: str) -> ToolResult:
+        return await self._work([], [])
+
+    @execution_hints(writes=["file:{file_path}"], reads=[WORKSPACE_RESOURCE])
+    @openapi_schema({})
+    async def str_replace(self, file_path: str) -> ToolResult:
+        return await self._work([f"file:{file_path}"], [WORKSPACE_RESOURCE])
+
+    @execution_hints(reads=["file:{file_path}", WORKSPACE_RESOURCE])
+    @openapi_schema({})
+    async def read_file(self, file_path: str) -> ToolResult:
+        return await self._work([], [f"file:{file_path}", WORKSPACE_RESOURCE])
+
+    @execution_hints(writes=["shell:{session_name}", WORKSPACE_RESOURCE])
+    @openapi_schema({})
+    async def execute_command(self, session_name: str) -> ToolResult:
+        return await self._work([f"shell:{session_name}", WORKSPACE_RESOURCE], [])
+
+
+class SimulatedRegistry:
+    def __init__(self, tools: SimulatedTools):
+        self.tools = {name: {"instance": tools} for name in tools.get_schemas()}
+
+
+def build_turn(calls: int, files: int, sessions: int) -> List[Dict[str, Any]]:
+    turn = []
+    for _ in range(calls):
+        kind = random.choice(["web_search", "str_replace", "read_file", "execute_command"])
+        if kind == "web_search":
+            arguments = {"query": "q"}
+        elif kind == "execute_command":
+            arguments = {"session_name": f"s{random.randrange(sessions)}"}
+        else:
+            arguments = {"file_path": f"src/f{random.randrange(files)}.py"}
+        turn.append({"function_name": kind, "arguments": arguments})
+    return turn
+
+
+async def run(label: str, turn: List[Dict[str, Any]], latency: float, strategy: str):
+    tools = SimulatedTools(latency)
+    registry = SimulatedRegistry(tools)
+
+    async def execute(tool_call):
+        return await getattr(tools, tool_call["function_name"])(**tool_call["arguments"])
+
+    start = time.perf_counter()
+    if strategy == "sequential":
+        for tool_call in turn:
+            await execute(tool_call)
+    elif strategy == "gather":
+        await asyncio.gather(*(execute(tool_call) for tool_call in turn))
+    else:
+        scheduler = ToolScheduler(registry, execute)
+        await asyncio.gather(*(scheduler.submit(tool_call) for tool_call in turn))
+    elapsed = time.perf_counter() - start
+    print(f"{label:>10} | {elapsed * 1000:>8.0f} ms | conflicting overlaps {tools.conflicts}")
+
+
+async def main_async(calls: int, files: int, sessions: int, latency_ms: float, seed: int):
+    random.seed(seed)
+    turn = build_turn(calls, files, sessions)
+    counts: Dict[str, int] = {}
+    for tool_call in turn:
+        counts[tool_call["function_name"]] = counts.get(tool_call["function_name"], 0) + 1
+    print(f"turn: {counts}\n")
+    for strategy in ("sequential", "gather", "scheduler"):
+        random.seed(seed)
+        await run(strategy, turn, latency_ms / 1000, strategy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tool execution strategies on a simulated turn")
+    parser.add_argument("--calls", type=int, default=24, help="Tool calls in the turn")
+    parser.add_argument("--files", type=int, default=3, help="Distinct files edited/read")
+    parser.add_argument("--sessions", type=int, default=2, help="Distinct shell sessions")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Mean simulated tool latency")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the turn")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.calls, args.files, args.sessions, args.latency_ms, args.seed))
+
+
+if __name__ == "__main__":
+    main()
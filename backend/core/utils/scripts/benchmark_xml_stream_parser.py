@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming XML tool-call parser against the buffer re-scan approach.
+
+Replays a recorded chunk stream (or a synthetic tool-heavy response) through
+both the old per-chunk `extract_xml_chunks()` loop and the incremental
+`StreamingXMLToolCallParser`, at growing response sizes, to show that the
+incremental parser scales linearly with response length.
+
+Usage:
+    python -m core.utils.scripts.benchmark_xml_stream_parser [--chunks-file stream.json] [--chunk-size 16]
+
+A chunks file is a JSON list of content chunk strings as streamed by the LLM.
+"""
+
+import argparse
+import json
+import time
+from typing import List
+
+from core.agentpress.xml_tool_parser import (
+    StreamingXMLToolCallParser,
+    extract_xml_chunks,
+    parse_xml_tool_calls_to_objects,
+)
+
+
+def build_synthetic_response(num_tool_calls: int, payload_size: int) -> str:
+    """Build a tool-heavy assistant response with large create_file payloads."""
+    payload = "\n".join(f"line {i}: " + "x" * 60 for i in range(payload_size // 70 + 1))
+    parts = ["Let me create the project files.\n"]
+    for i in range(num_tool_calls):
+        parts.append(
+            "<function_calls>\n"
+            f'<invoke name="create_file">\n'
+            f'<parameter name="file_path">src/module_{i}.py</parameter>\n'
+            f'<parameter name="file_contents">{payload}</parameter>\n'
+            "</invoke>\n"
+            "</function_calls>\n"
+            f"Created module {i}.\n"
+        )
+    return "".join(parts)
+
+
+def split_into_chunks(content: str, chunk_size: int) -> List[str]:
+    return [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+
+
+def replay_rescan(chunks: List[str]) -> int:
+    """The previous approach: append to a buffer and re-scan it on every chunk."""
+    current_xml_content = ""
+    count = 0
+    for chunk in chunks:
+        current_xml_content += chunk
+        for xml_chunk in extract_xml_chunks(current_xml_content):
+            current_xml_content = current_xml_content.replace(xml_chunk, "", 1)
+            count += len(parse_xml_tool_calls_to_objects(xml_chunk))
+    return count
+
+
+def replay_incremental(chunks: List[str]) -> int:
+    parser = StreamingXMLToolCallParser()
+    count = 0
+    for chunk in chunks:
+        count += len(parser.feed(chunk))
+    return count
+
+
+def time_replay(func, chunks: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, chunks: List[str], repeat: int) -> None:
+    rescan_calls = replay_rescan(chunks)
+    incremental_calls = replay_incremental(chunks)
+    if rescan_calls != incremental_calls:
+        print(f"✗ {label}: tool call mismatch (rescan={rescan_calls}, incremental={incremental_calls})")
+        return
+
+    rescan = time_replay(replay_rescan, chunks, repeat)
+    incremental = time_replay(replay_incremental, chunks, repeat)
+    total_chars = sum(len(c) for c in chunks)
+    print(
+        f"{label:>28} | {total_chars:>10,} chars | {len(chunks):>8,} chunks | "
+        f"rescan {rescan * 1000:>9.2f} ms | incremental {incremental * 1000:>8.2f} ms | "
+        f"{incremental / total_chars * 1e9:>6.1f} ns/char | {incremental_calls} calls"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming XML tool-call parsing")
+    parser.add_argument("--chunks-file", help="JSON list of recorded content chunks to replay")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Chunk size for synthetic streams")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement (best is reported)")
+    args = parser.parse_args()
+
+    if args.chunks_file:
+        with open(args.chunks_file, "r") as f:
+            chunks = json.load(f)
+        report(args.chunks_file, chunks, args.repeat)
+        return
+
+    for payload_size in (2_000, 20_000, 100_000):
+        content = build_synthetic_response(num_tool_calls=4, payload_size=payload_size)
+        report(f"4 calls x {payload_size:,} B", split_into_chunks(content, args.chunk_size), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
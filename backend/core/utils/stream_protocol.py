@@ -0,0 +1,126 @@
+"""
+Compact wire format for streamed assistant content chunks.
+
+Every streamed content chunk used to be stored (and sent) as a full message
+object whose fields - thread_id, metadata, created_at, ... - are identical for
+every token of a message. In the compact format a chunk stream is written as:
+
+- a header frame carrying the static fields, whenever they change:
+  {"t":"h","thread_id":...,"type":"assistant","is_llm_message":true,
+   "metadata":"...","created_at":"...","updated_at":"..."}
+- one delta frame per chunk, carrying only the sequence and the text:
+  {"t":"d","s":12,"c":"Hello"}
+
+A delta belongs to the most recent header before it in the stream. Merging the
+two gives back the legacy frame (message_id null, content = the JSON string
+{"role":"assistant","content":c}). All other frames (status, tool, full
+messages) are stored in the legacy format unchanged.
+
+Clients opt in per connection (?protocol=compact on the stream endpoint);
+everyone else gets legacy frames expanded from header + delta by the API.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, json is the fallback
+    orjson = None
+
+STREAM_PROTOCOL_LEGACY = "legacy"
+STREAM_PROTOCOL_COMPACT = "compact"
+
+HEADER_FRAME_PREFIX = '{"t":"h"'
+DELTA_FRAME_PREFIX = '{"t":"d"'
+
+_CHUNK_KEYS = frozenset((
+    "sequence", "message_id", "thread_id", "type", "is_llm_message",
+    "content", "metadata", "created_at", "updated_at",
+))
+_CHUNK_CONTENT_PREFIX = '{"role":"assistant","content":'
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str).decode('utf-8')
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def loads(data: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def frame_kind(data: str) -> Optional[str]:
+    """'h' for header frames, 'd' for delta frames, None for full (legacy) frames."""
+    if data.startswith(DELTA_FRAME_PREFIX):
+        return 'd'
+    if data.startswith(HEADER_FRAME_PREFIX):
+        return 'h'
+    return None
+
+
+def _chunk_text(response: Dict[str, Any]) -> Optional[str]:
+    """Text of a plain assistant content chunk, or None if the response is anything else."""
+    if response.get("type") != "assistant" or response.get("message_id") is not None:
+        return None
+    content = response.get("content")
+    if not isinstance(content, str) or not content.startswith(_CHUNK_CONTENT_PREFIX):
+        return None
+    if not isinstance(response.get("metadata"), str) or response.keys() != _CHUNK_KEYS:
+        return None
+    try:
+        parsed = loads(content)
+    except ValueError:
+        return None
+    if len(parsed) != 2 or not isinstance(parsed.get("content"), str):
+        return None
+    return parsed["content"]
+
+
+class CompactFrameEncoder:
+    """Worker side: turns one run's responses into stored frames (header + deltas for content chunks)."""
+
+    def __init__(self, encode_full):
+        self._encode_full = encode_full
+        self._static: Optional[Tuple[Any, ...]] = None
+
+    def encode(self, response: Dict[str, Any]) -> List[str]:
+        text = _chunk_text(response)
+        if text is None:
+            return [self._encode_full(response)]
+
+        frames = []
+        static = (response["thread_id"], response["metadata"], response["created_at"], response["updated_at"], response["is_llm_message"])
+        if static != self._static:
+            self._static = static
+            frames.append(dumps({
+                "t": "h",
+                "thread_id": response["thread_id"],
+                "type": "assistant",
+                "is_llm_message": response["is_llm_message"],
+                "metadata": response["metadata"],
+                "created_at": response["created_at"],
+                "updated_at": response["updated_at"],
+            }))
+        frames.append(dumps({"t": "d", "s": response["sequence"], "c": text}))
+        return frames
+
+
+def expand_delta(header: Dict[str, Any], data: str) -> str:
+    """Rebuild the legacy frame (byte-compatible with json.dumps of the original response)."""
+    delta = loads(data)
+    return json.dumps({
+        "sequence": delta["s"],
+        "message_id": None,
+        "thread_id": header.get("thread_id"),
+        "type": header.get("type", "assistant"),
+        "is_llm_message": header.get("is_llm_message", True),
+        "content": json.dumps({"role": "assistant", "content": delta["c"]}, separators=(',', ':')),
+        "metadata": header.get("metadata"),
+        "created_at": header.get("created_at"),
+        "updated_at": header.get("updated_at"),
+    })
@@ -109,7 +109,7 @@ class SunaDefaultAgentService:
             client = await self._db.client
             
             # Get total count
-            total_result = await client.table('agents').select('agent_id', count='exact').eq('is_default', True).execute()
+            total_result = await client.table('agents').select('agent_id', count='exact', head=True).eq('is_default', True).execute()
             total_count = total_result.count or 0
             
             # Get creation dates for last 30 days
@@ -0,0 +1,15 @@
+-- ============================================================================
+-- 为 projects.sandbox->>'id' 添加表达式索引
+-- ============================================================================
+-- verify_sandbox_access 通过 sandbox id 查找所属项目：
+--   SELECT * FROM projects WHERE "sandbox"->>'id' = $1
+-- 没有索引时这是对 projects 表的 JSONB 全表扫描，而它在每个沙箱文件请求上都会执行。
+-- 表达式必须与 PostgresQueryBuilder.jsonb_eq 生成的条件一致。
+--
+-- 注意：CREATE INDEX CONCURRENTLY 不能在事务中执行，因此本文件没有 BEGIN/COMMIT。
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_projects_sandbox_id
+ON projects ((sandbox->>'id'))
+WHERE sandbox->>'id' IS NOT NULL;
+
+COMMENT ON INDEX idx_projects_sandbox_id IS 'Sandbox id -> owning project lookup (sandbox access checks)';
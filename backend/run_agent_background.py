@@ -9,6 +9,10 @@ from datetime import datetime, timezone
 from typing import Optional, Dict, Any, Tuple
 from uuid import UUID
 from core.services import redis_worker as redis
+from core.services.stream_publisher import RedisStreamPublisher
+from core.utils.stream_protocol import CompactFrameEncoder
+from core.agentpress.tool_output import set_tool_output_sink, reset_tool_output_sink
+from core.utils.config import config
 from core.run import run_agent
 from core.utils.logger import logger, structlog
 from core.utils.tool_discovery import warm_up_tools_cache
@@ -36,6 +40,24 @@ else:
     logger.info(f"🔧 Configuring Dramatiq broker with Redis at {redis_host}:{redis_port}")
     redis_broker = RedisBroker(host=redis_host, port=redis_port, middleware=[dramatiq.middleware.AsyncIO()])
 
+
+class MCPSessionPoolShutdown(dramatiq.Middleware):
+    """Closes pooled MCP sessions (and stdio server processes) before the worker's event loop stops."""
+
+    def before_worker_shutdown(self, broker, worker):
+        from dramatiq.asyncio import get_event_loop_thread
+        from core.mcp_module import mcp_session_pool
+
+        event_loop_thread = get_event_loop_thread()
+        if event_loop_thread is None:
+            return
+        try:
+            event_loop_thread.run_coroutine(mcp_session_pool.close())
+        except Exception as e:
+            logger.warning(f"Failed to close pooled MCP sessions: {e}")
+
+
+redis_broker.add_middleware(MCPSessionPoolShutdown(), before=dramatiq.middleware.AsyncIO)
 dramatiq.set_broker(redis_broker)
 
 from core.memory import background_jobs as memory_jobs
@@ -62,6 +84,9 @@ class UUIDEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def _encode_response(response: Dict[str, Any]) -> str:
+    return json.dumps(response, cls=UUIDEncoder)
+
 def check_terminating_tool_call(response: Dict[str, Any]) -> Optional[str]:
     if response.get('type') != 'status':
         return None
@@ -296,15 +321,12 @@ async def send_failure_notification(client, thread_id: str, error_message: str):
 def create_redis_keys(agent_run_id: str, instance_id: str) -> Dict[str, str]:
     return {
         'response_stream': f"agent_run:{agent_run_id}:stream",
-        'response_pubsub': f"agent_run:{agent_run_id}:pubsub",
         'instance_control_channel': f"agent_run:{agent_run_id}:control:{instance_id}",
         'global_control_channel': f"agent_run:{agent_run_id}:control",
         'instance_active': f"active_run:{instance_id}:{agent_run_id}"
     }
 
 
-MAX_PENDING_REDIS_OPS = 500
-
 async def process_agent_responses(
     agent_gen,
     agent_run_id: str,
@@ -318,80 +340,71 @@ async def process_agent_responses(
     first_response_logged = False
     complete_tool_called = False
     total_responses = 0
-    pending_redis_operations = []
-    redis_streaming_enabled = True
     
-    stream_key = redis_keys['response_stream']
-    pubsub_channel = redis_keys['response_pubsub']
+    # Frames are coalesced into pipelined XADD batches (bounded queue = backpressure).
+    # Readers follow the stream through stream_hub; nothing subscribes to a per-run channel.
+    publisher = RedisStreamPublisher(
+        redis_keys['response_stream'],
+        maxlen=10000,
+        stream_ttl=REDIS_RESPONSE_LIST_TTL,
+    ).start()
+    # Content chunks are stored as one header frame + small deltas; everything else as full frames
+    encoder = CompactFrameEncoder(_encode_response) if config.AGENT_STREAM_COMPACT_FRAMES else None
     
-    async for response in agent_gen:
-        if not first_response_logged:
-            first_token_time = (time.time() - worker_start) * 1000
-            logger.info(f"⏱️ [TIMING] 🎯 FIRST RESPONSE from agent: {first_token_time:.1f}ms from job start")
-            first_response_logged = True
-        
-        if stop_signal_checker_state.get('stop_signal_received'):
-            stop_reason = stop_signal_checker_state.get('stop_reason', 'external_stop_signal')
-            logger.warning(f"🛑 Agent run {agent_run_id} stopped by signal. Reason: {stop_reason}. Total responses processed: {total_responses}")
-            final_status = "stopped"
-            error_message = f"Stopped by {stop_reason}"
-            trace.span(name="agent_run_stopped").end(status_message=f"agent_run_stopped: {stop_reason}", level="WARNING")
-            break
-
-        response_json = json.dumps(response, cls=UUIDEncoder)
-        
-        if redis_streaming_enabled and redis.is_redis_healthy():
-            pending_redis_operations.append(
-                asyncio.create_task(redis.publish(pubsub_channel, response_json))
-            )
-            pending_redis_operations.append(
-                asyncio.create_task(redis.xadd(
-                    stream_key,
-                    {'data': response_json},
-                    maxlen=10000,
-                    approximate=True
-                ))
-            )
+    # Partial tool output (e.g. streamed shell output) goes straight to the stream, not the thread
+    async def publish_tool_output(frame: Dict[str, Any]):
+        await publisher.publish(_encode_response(frame))
+    
+    sink_token = set_tool_output_sink(publish_tool_output)
+    
+    try:
+        async for response in agent_gen:
+            if not first_response_logged:
+                first_token_time = (time.time() - worker_start) * 1000
+                logger.info(f"⏱️ [TIMING] 🎯 FIRST RESPONSE from agent: {first_token_time:.1f}ms from job start")
+                first_response_logged = True
         
-        total_responses += 1
-        stop_signal_checker_state['total_responses'] = total_responses
+            if stop_signal_checker_state.get('stop_signal_received'):
+                stop_reason = stop_signal_checker_state.get('stop_reason', 'external_stop_signal')
+                logger.warning(f"🛑 Agent run {agent_run_id} stopped by signal. Reason: {stop_reason}. Total responses processed: {total_responses}")
+                final_status = "stopped"
+                error_message = f"Stopped by {stop_reason}"
+                trace.span(name="agent_run_stopped").end(status_message=f"agent_run_stopped: {stop_reason}", level="WARNING")
+                break
 
-        if total_responses % 50 == 0:
-            pending_redis_operations = [t for t in pending_redis_operations if not t.done()]
-            
-            if len(pending_redis_operations) > MAX_PENDING_REDIS_OPS:
-                if redis_streaming_enabled:
-                    logger.warning(f"⚠️ Redis backpressure: {len(pending_redis_operations)} pending ops, pausing streaming for {agent_run_id}")
-                redis_streaming_enabled = False
-            elif not redis_streaming_enabled and len(pending_redis_operations) < MAX_PENDING_REDIS_OPS // 2:
-                logger.info(f"✅ Redis backpressure cleared, resuming streaming for {agent_run_id}")
-                redis_streaming_enabled = True
-            
-            if redis_streaming_enabled and redis.is_redis_healthy():
-                try:
-                    await asyncio.wait_for(redis.expire(stream_key, 3600), timeout=2.0)
-                except (asyncio.TimeoutError, Exception):
-                    pass
-
-        terminating_tool = check_terminating_tool_call(response)
-        if terminating_tool == 'complete':
-            complete_tool_called = True
-            logger.info(f"Complete tool was called in agent run {agent_run_id}")
-        elif terminating_tool == 'ask':
-            logger.debug(f"Ask tool was called in agent run {agent_run_id} (terminating but no notification)")
-
-        if response.get('type') == 'status':
-            status_val = response.get('status')
+            if encoder is not None:
+                for frame in encoder.encode(response):
+                    await publisher.publish(frame)
+            else:
+                await publisher.publish(_encode_response(response))
+        
+            total_responses += 1
+            stop_signal_checker_state['total_responses'] = total_responses
+
+            terminating_tool = check_terminating_tool_call(response)
+            if terminating_tool == 'complete':
+                complete_tool_called = True
+                logger.info(f"Complete tool was called in agent run {agent_run_id}")
+            elif terminating_tool == 'ask':
+                logger.debug(f"Ask tool was called in agent run {agent_run_id} (terminating but no notification)")
+
+            if response.get('type') == 'status':
+                status_val = response.get('status')
             
-            if status_val in ['completed', 'failed', 'stopped', 'error']:
-                logger.info(f"Agent run {agent_run_id} finished with status: {status_val}")
-                final_status = status_val if status_val != 'error' else 'failed'
-                if status_val in ['failed', 'stopped', 'error']:
-                    error_message = response.get('message', f"Run ended with status: {status_val}")
-                    logger.error(f"Agent run failed: {error_message}")
-                break
+                if status_val in ['completed', 'failed', 'stopped', 'error']:
+                    logger.info(f"Agent run {agent_run_id} finished with status: {status_val}")
+                    final_status = status_val if status_val != 'error' else 'failed'
+                    if status_val in ['failed', 'stopped', 'error']:
+                        error_message = response.get('message', f"Run ended with status: {status_val}")
+                        logger.error(f"Agent run failed: {error_message}")
+                    break
+    
+    finally:
+        reset_tool_output_sink(sink_token)
+        # Drain before the caller writes the terminal status, so it lands after every chunk
+        await publisher.close()
+        logger.debug(f"Stream publisher stats for {agent_run_id}: {publisher.get_stats()}")
     
-    stop_signal_checker_state['pending_redis_operations'] = pending_redis_operations
     return final_status, error_message, complete_tool_called, total_responses
 
 
@@ -409,15 +422,11 @@ async def handle_normal_completion(
     completion_json = json.dumps(completion_message, cls=UUIDEncoder)
     try:
         await asyncio.wait_for(
-            asyncio.gather(
-                redis.publish(redis_keys['response_pubsub'], completion_json),
-                redis.xadd(
-                    redis_keys['response_stream'],
-                    {'data': completion_json},
-                    maxlen=10000,
-                    approximate=True
-                ),
-                return_exceptions=True
+            redis.xadd(
+                redis_keys['response_stream'],
+                {'data': completion_json},
+                maxlen=10000,
+                approximate=True
             ),
             timeout=5.0
         )
@@ -519,7 +528,6 @@ async def run_agent_background(
         start_time = datetime.now(timezone.utc)
         pubsub = None
         stop_checker = None
-        pending_redis_operations = []
         cancellation_event = asyncio.Event()
 
         redis_keys = create_redis_keys(agent_run_id, instance_id)
@@ -637,8 +645,6 @@ async def run_agent_background(
             agent_gen, agent_run_id, redis_keys, trace, worker_start, stop_signal_checker_state
         )
 
-        pending_redis_operations = stop_signal_checker_state.get('pending_redis_operations', [])
-
         if final_status == "running":
             final_status = "completed"
             await handle_normal_completion(agent_run_id, start_time, total_responses, redis_keys, trace)
@@ -668,15 +674,11 @@ async def run_agent_background(
         try:
             error_json = json.dumps(error_response)
             await asyncio.wait_for(
-                asyncio.gather(
-                    redis.publish(redis_keys['response_pubsub'], error_json),
-                    redis.xadd(
-                        redis_keys['response_stream'],
-                        {'data': error_json},
-                        maxlen=10000,
-                        approximate=True
-                    ),
-                    return_exceptions=True
+                redis.xadd(
+                    redis_keys['response_stream'],
+                    {'data': error_json},
+                    maxlen=10000,
+                    approximate=True
                 ),
                 timeout=5.0
             )
@@ -729,11 +731,6 @@ async def run_agent_background(
             except Exception as mem_error:
                 logger.warning(f"Failed to queue memory extraction: {mem_error}")
 
-        try:
-            await asyncio.wait_for(asyncio.gather(*pending_redis_operations), timeout=30.0)
-        except asyncio.TimeoutError:
-            logger.warning(f"Timeout waiting for pending Redis operations for {agent_run_id}")
-
         logger.debug(f"Agent run background task fully completed for: {agent_run_id} (Instance: {instance_id}) with final status: {final_status}")
 
 async def _cleanup_redis_instance_key(agent_run_id: str, instance_id: str):
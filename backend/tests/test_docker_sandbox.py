@@ -0,0 +1,123 @@
+"""Docker sandbox calls must run off the event loop and overlap."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.sandbox import docker_sandbox
+from core.sandbox.docker_sandbox import DockerSandbox, run_docker_op
+
+pytestmark = pytest.mark.asyncio
+
+EXEC_SECONDS = 0.2
+
+
+class FakeAPI:
+    """docker-py low-level API whose exec stream stays open until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def exec_create(self, container_id, cmd):
+        return {"Id": "exec-1"}
+
+    def exec_start(self, exec_id, stream=True, demux=True):
+        yield b"started\n", None
+        self.release.wait(timeout=5)
+        yield b"done\n", None
+
+    def exec_inspect(self, exec_id):
+        return {"ExitCode": 0}
+
+
+class FakeContainer:
+    """Container whose exec_run blocks like a real docker-py call."""
+
+    def __init__(self, container_id="c0ffee0123456789"):
+        self.id = container_id
+        self.name = f"sandbox-{container_id[:6]}"
+        self.client = SimpleNamespace(api=FakeAPI())
+
+    def exec_run(self, cmd, **kwargs):
+        time.sleep(EXEC_SECONDS)
+        return SimpleNamespace(exit_code=0, output=(b"ok", b""))
+
+
+@pytest.fixture(autouse=True)
+def docker_pools(monkeypatch):
+    """Fresh executors and limits per test (each test has its own event loop)."""
+    monkeypatch.setattr(docker_sandbox.config, "SANDBOX_DOCKER_WORKERS", 4, raising=False)
+    monkeypatch.setattr(docker_sandbox.config, "SANDBOX_CONTAINER_CONCURRENCY", 4, raising=False)
+    monkeypatch.setattr(docker_sandbox.config, "SANDBOX_STREAM_WORKERS", 4, raising=False)
+    monkeypatch.setattr(docker_sandbox, "_docker_executor", None)
+    monkeypatch.setattr(docker_sandbox, "_stream_executor", None)
+    monkeypatch.setattr(docker_sandbox, "_container_limits", {})
+    yield
+    for executor in (docker_sandbox._docker_executor, docker_sandbox._stream_executor):
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+async def _tick(ticks, stop):
+    while not stop.is_set():
+        ticks.append(time.monotonic())
+        await asyncio.sleep(0.01)
+
+
+async def test_exec_run_calls_overlap_and_loop_keeps_ticking():
+    sandbox = DockerSandbox(FakeContainer())
+    ticks, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(_tick(ticks, stop))
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(sandbox.exec_run("process.test", ["true"]) for _ in range(4)))
+    elapsed = time.monotonic() - start
+    stop.set()
+    await ticker
+
+    assert all(result.exit_code == 0 for result in results)
+    # Four 0.2s calls back to back would take 0.8s
+    assert elapsed < EXEC_SECONDS * 2
+    # The loop was never blocked for the length of a call
+    assert len(ticks) >= 10
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < EXEC_SECONDS / 2
+
+
+async def test_container_limit_bounds_concurrent_calls(monkeypatch):
+    monkeypatch.setattr(docker_sandbox.config, "SANDBOX_CONTAINER_CONCURRENCY", 2, raising=False)
+    sandbox = DockerSandbox(FakeContainer())
+
+    start = time.monotonic()
+    await asyncio.gather(*(sandbox.exec_run("process.test", ["true"]) for _ in range(4)))
+    elapsed = time.monotonic() - start
+
+    # Two at a time: two rounds
+    assert elapsed >= EXEC_SECONDS * 2 * 0.9
+
+
+async def test_open_exec_streams_do_not_hold_docker_workers():
+    containers = [FakeContainer(f"{i:016x}") for i in range(4)]
+    started = asyncio.Event()
+    seen = []
+
+    async def on_output(stream, text):
+        seen.append(text)
+        if len(seen) == len(containers):
+            started.set()
+
+    streams = [
+        asyncio.create_task(DockerSandbox(container).process.exec_stream("sleep 60", on_output=on_output))
+        for container in containers
+    ]
+    await asyncio.wait_for(started.wait(), timeout=5)
+
+    # Every Docker worker would be taken if the pumps ran on the call pool
+    result = await asyncio.wait_for(run_docker_op("test.ping", lambda: "pong"), timeout=1)
+    assert result == "pong"
+
+    for container in containers:
+        container.client.api.release.set()
+    assert await asyncio.gather(*streams) == [0] * len(containers)